@@ -0,0 +1,270 @@
+"""
+Admission control for the API: bounded concurrency, queues and deadlines
+"""
+import asyncio
+import json
+import math
+import re
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.requests import HTTPConnection
+from common.config import settings
+from infrastructure.data.tabular import is_json, media_type_of
+
+INFERENCE = "inference"
+BATCH = "batch"
+TRAINING = "training"
+
+# Absolute deadline (Unix time in seconds) or timeout (seconds from arrival)
+DEADLINE_HEADER = "x-request-deadline"
+TIMEOUT_HEADER = "x-request-timeout"
+
+# Route class of each POST route, matched against the path without prefix
+ROUTE_LANES: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"/ml/predict/[^/]+/(batch|stream)$"), BATCH),
+    # One JSON row; a table body (CSV, .npy, ...) goes to the batch lane
+    (re.compile(r"/ml/predict/[^/]+$"), INFERENCE),
+    (re.compile(r"/ml/(train/.+|models/[^/]+/restore)$"), TRAINING),
+    (re.compile(r"/(classify-question|classify-hierarchical|similar-questions)$"), INFERENCE),
+    (re.compile(r"/classify-batch$"), BATCH),
+    (re.compile(
+        r"/(train-models|train-hierarchy|train-with-sample-data|calibrate-cascade"
+        r"|distill-model|export-compressed-models|save-models|load-models|shadow)$"
+    ), TRAINING)
+]
+
+
+class Lane:
+    """
+    Slots of one route class
+
+    At most ``limit`` requests run at once and at most ``queue`` wait for a
+    slot, served first come first served; a freed slot is handed straight
+    to the oldest waiter.
+    """
+
+    def __init__(self, name: str, limit: int, queue: int, max_wait: float):
+        self.name = name
+        self.limit = max(limit, 1)
+        self.queue = max(queue, 0)
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Smoothed time a request holds a slot, for Retry-After
+        self.service_seconds = 0.0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.expired = 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def is_full(self) -> bool:
+        return self.active >= self.limit and self.waiting >= self.queue
+
+    async def acquire(self, timeout: float) -> bool:
+        """Take a slot, waiting up to ``timeout`` seconds; False if none freed up"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(future, max(timeout, 0.0))
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            if future in self._waiters:
+                self._waiters.remove(future)
+
+    def release(self, held_seconds: Optional[float] = None):
+        if held_seconds is not None:
+            self.service_seconds += 0.2 * (held_seconds - self.service_seconds)
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until the requests ahead are likely done"""
+        backlog = (self.active + self.waiting) / self.limit
+        return min(max(math.ceil(backlog * self.service_seconds), 1), 60)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "queue": self.queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "expired": self.expired,
+            "mean_service_ms": round(self.service_seconds * 1000, 3)
+        }
+
+
+class AdmissionController:
+    """Route classes and their lanes, consulted by AdmissionMiddleware"""
+
+    def __init__(self, lanes: Dict[str, Lane], enabled: bool = True):
+        self.lanes = lanes
+        self.enabled = enabled
+
+    def lane_for(self, scope) -> Optional[Lane]:
+        if not self.enabled or scope["method"] != "POST":
+            return None
+        for pattern, name in ROUTE_LANES:
+            if pattern.search(scope["path"]):
+                if name == INFERENCE and "/ml/" in scope["path"] and not _has_json_body(scope):
+                    name = BATCH
+                return self.lanes.get(name)
+        return None
+
+    def lane(self, name: str) -> Optional[Lane]:
+        """Lane for work admitted outside the middleware, None when disabled"""
+        return self.lanes.get(name) if self.enabled else None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "lanes": {name: lane.get_metrics() for name, lane in self.lanes.items()}
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware admitting POST requests through the lane of their route
+
+    A request whose lane has a free slot runs at once. Otherwise it waits
+    in the lane's queue; if the queue is full it gets 429 at once, and if
+    no slot frees up within the lane's max wait it gets 503, both with
+    Retry-After. A deadline from ``X-Request-Deadline`` or
+    ``X-Request-Timeout`` bounds the wait as well: a request whose deadline
+    has passed is answered 504 before any model work. The deadline is
+    stored in ``request.state.deadline`` for the routes.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        lane = self.controller.lane_for(scope)
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            deadline = _deadline(scope)
+        except ValueError as e:
+            await _respond(send, 400, str(e))
+            return
+        scope.setdefault("state", {})["deadline"] = deadline
+
+        if deadline is not None and deadline <= time.time():
+            lane.expired += 1
+            await _respond(send, 504, "Request deadline passed before it was admitted")
+            return
+        if lane.is_full():
+            lane.rejected += 1
+            await _respond(
+                send, 429, f"Too many {lane.name} requests queued", lane.retry_after()
+            )
+            return
+
+        wait = lane.max_wait if deadline is None else min(lane.max_wait, deadline - time.time())
+        if not await lane.acquire(wait):
+            if deadline is not None and deadline <= time.time():
+                lane.expired += 1
+                await _respond(send, 504, "Request deadline passed while queued")
+            else:
+                lane.timed_out += 1
+                await _respond(
+                    send, 503, f"No {lane.name} capacity within {lane.max_wait:g}s",
+                    lane.retry_after()
+                )
+            return
+
+        lane.admitted += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release(time.perf_counter() - start)
+
+
+async def check_deadline(connection: HTTPConnection):
+    """Raise 504 if the request's deadline has passed, e.g. while its body was read"""
+    deadline = getattr(connection.state, "deadline", None)
+    if deadline is not None and deadline <= time.time():
+        raise HTTPException(status_code=504, detail="Request deadline passed")
+
+
+def _has_json_body(scope) -> bool:
+    content_type = dict(scope["headers"]).get(b"content-type", b"").decode("latin-1")
+    return is_json(media_type_of(content_type))
+
+
+def _deadline(scope) -> Optional[float]:
+    """Earliest deadline given by the request headers, as Unix time"""
+    headers = dict(scope["headers"])
+    deadlines = []
+    try:
+        if DEADLINE_HEADER.encode() in headers:
+            deadlines.append(float(headers[DEADLINE_HEADER.encode()]))
+        if TIMEOUT_HEADER.encode() in headers:
+            deadlines.append(time.time() + float(headers[TIMEOUT_HEADER.encode()]))
+    except ValueError:
+        raise ValueError(f"{DEADLINE_HEADER} and {TIMEOUT_HEADER} must be numbers of seconds")
+    return min(deadlines) if deadlines else None
+
+
+async def _respond(send, status_code: int, detail: str, retry_after: Optional[int] = None):
+    body = json.dumps({"detail": detail}).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode())
+    ]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+# Create a singleton instance
+admission_controller = AdmissionController(
+    {
+        INFERENCE: Lane(
+            INFERENCE, settings.inference_concurrency, settings.inference_queue,
+            settings.admission_max_wait
+        ),
+        BATCH: Lane(
+            BATCH, settings.batch_concurrency, settings.batch_queue,
+            settings.admission_max_wait
+        ),
+        TRAINING: Lane(
+            TRAINING, settings.training_concurrency, settings.training_queue,
+            settings.admission_max_wait
+        )
+    },
+    enabled=settings.admission_control
+)
@@ -0,0 +1,188 @@
+"""
+Pipelined classification over a WebSocket
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Set, Union
+from fastapi import WebSocket
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError as SchemaError
+from starlette.websockets import WebSocketDisconnect
+from api.admission import BATCH, admission_controller
+from api.models.classification_models import StreamQuestion
+from common.config import settings
+from infrastructure.data.encoding import dumps_json, dumps_msgpack, loads_msgpack
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ClassificationStream:
+    """
+    One /classify-stream connection
+
+    Frames are JSON text (or the same JSON as binary). With
+    ``msgpack=True`` the server sends binary MessagePack frames instead and
+    reads binary client frames as MessagePack:
+
+    - server: ``{"type": "ready", "credits": N, "max_batch": M}`` on connect
+    - client: ``{"id": ..., "question": ..., "model": ..., "weights": ...,
+      "voting": ...}`` or a list of such messages; only ``question`` is
+      required and ``id`` is echoed back
+    - server: ``{"type": "results", "results": [...]}`` with one entry per
+      question of a finished batch: the fields of a /classify-question
+      response without ``question``, or ``{"id": ..., "error": ...}``.
+      Batches are answered as they finish, so results of different batches
+      can arrive out of order
+    - server: ``{"type": "error", "detail": ...}`` for a frame that cannot
+      be decoded
+
+    Every question holds one of the connection's N credits until its
+    result is sent. While no credit is free the server reads no frames, and
+    questions in a frame beyond the free credits are answered with an error
+    at once, so a connection never holds more than N questions. Questions
+    that queued while earlier batches were computed are classified together,
+    up to M per batch, and each batch is admitted through the batch lane.
+    """
+
+    def __init__(self, websocket: WebSocket, service, msgpack: bool = False):
+        self.websocket = websocket
+        self.service = service
+        self.msgpack = msgpack
+        self.credits = max(settings.classify_stream_credits, 1)
+        self.max_batch = max(settings.classify_stream_max_batch, 1)
+        self._free = self.credits
+        self._credit_freed = asyncio.Event()
+        self._pending: "asyncio.Queue[StreamQuestion]" = asyncio.Queue()
+        self._batch_slots = asyncio.Semaphore(max(settings.classify_stream_batches, 1))
+        self._batches: Set[asyncio.Task] = set()
+        self._send_lock = asyncio.Lock()
+
+    async def run(self):
+        """Serve the connection until the client disconnects"""
+        await self.websocket.accept()
+        await self._send({"type": "ready", "credits": self.credits, "max_batch": self.max_batch})
+        dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            while True:
+                while self._free == 0:
+                    self._credit_freed.clear()
+                    await self._credit_freed.wait()
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                await self._read_frame(message)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            dispatcher.cancel()
+            for batch in list(self._batches):
+                batch.cancel()
+
+    async def _read_frame(self, message: Dict[str, Any]):
+        binary = message.get("bytes")
+        try:
+            if binary is not None and self.msgpack:
+                payload = loads_msgpack(binary)
+            else:
+                payload = json.loads(message.get("text") or binary or "")
+        except ValueError as e:
+            kind = "MessagePack" if binary is not None and self.msgpack else "JSON"
+            detail = f"Invalid {kind} frame: {str(e) or type(e).__name__}"
+            await self._send({"type": "error", "detail": detail})
+            return
+        rejected = []
+        for message in payload if isinstance(payload, list) else [payload]:
+            message_id = message.get("id") if isinstance(message, dict) else None
+            try:
+                question = StreamQuestion.model_validate(message)
+            except SchemaError as e:
+                error = e.errors()[0]
+                location = ".".join(str(part) for part in error["loc"])
+                rejected.append({"id": message_id, "error": f"{location}: {error['msg']}"})
+                continue
+            if self._free == 0:
+                rejected.append({"id": question.id, "error": "No credits left"})
+                continue
+            self._free -= 1
+            self._pending.put_nowait(question)
+        if rejected:
+            await self._send({"type": "results", "results": rejected})
+
+    async def _dispatch(self):
+        """Start a batch of the queued questions whenever a batch slot is free"""
+        while True:
+            await self._batch_slots.acquire()
+            questions = [await self._pending.get()]
+            while len(questions) < self.max_batch and not self._pending.empty():
+                questions.append(self._pending.get_nowait())
+            batch = asyncio.create_task(self._answer(questions))
+            self._batches.add(batch)
+            batch.add_done_callback(self._batches.discard)
+
+    async def _answer(self, questions: List[StreamQuestion]):
+        lane = admission_controller.lane(BATCH)
+        try:
+            if lane is not None and not await lane.acquire(lane.max_wait):
+                lane.timed_out += 1
+                error = f"No {BATCH} capacity; retry after {lane.retry_after()}s"
+                frame = self._encode({
+                    "type": "results",
+                    "results": [{"id": question.id, "error": error} for question in questions]
+                })
+            else:
+                start = time.perf_counter()
+                try:
+                    if lane is not None:
+                        lane.admitted += 1
+                    frame = await run_in_threadpool(self._classify, questions)
+                finally:
+                    if lane is not None:
+                        lane.release(time.perf_counter() - start)
+            await self._send_frame(frame)
+        except (WebSocketDisconnect, RuntimeError):
+            # The client went away; its results have nowhere to go
+            pass
+        finally:
+            self._free += len(questions)
+            self._credit_freed.set()
+            self._batch_slots.release()
+
+    def _classify(self, questions: List[StreamQuestion]) -> Union[str, bytes]:
+        """Results frame of a batch, one classify_batch call per model setting"""
+        groups: Dict[Any, List[StreamQuestion]] = {}
+        for question in questions:
+            weights = tuple(sorted(question.weights.items())) if question.weights else None
+            groups.setdefault((question.model, weights, question.voting), []).append(question)
+        results = []
+        for (model, weights, voting), group in groups.items():
+            try:
+                classified = self.service.classify_batch(
+                    [question.question for question in group],
+                    model_name=model,
+                    weights=dict(weights) if weights else None,
+                    voting=voting
+                )
+            except ValueError as e:
+                results.extend({"id": question.id, "error": str(e)} for question in group)
+                continue
+            for question, result in zip(group, classified):
+                result.pop("question", None)
+                results.append({"id": question.id, **result})
+        return self._encode({"type": "results", "results": results})
+
+    def _encode(self, payload: Dict[str, Any]) -> Union[str, bytes]:
+        if self.msgpack:
+            return dumps_msgpack(payload)
+        return dumps_json(payload).decode()
+
+    async def _send(self, payload: Dict[str, Any]):
+        await self._send_frame(self._encode(payload))
+
+    async def _send_frame(self, frame: Union[str, bytes]):
+        async with self._send_lock:
+            if isinstance(frame, bytes):
+                await self.websocket.send_bytes(frame)
+            else:
+                await self.websocket.send_text(frame)
@@ -1,14 +1,36 @@
 """
 Classification API Models - Request and Response schemas
 """
-from pydantic import BaseModel
-from typing import Dict, List
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional, Union
 
 
 class ClassificationRequest(BaseModel):
     """Request model for question classification"""
     question: str
     model: str = "MultinomialNB"
+    weights: Optional[Dict[str, float]] = None
+    voting: Literal["soft", "hard"] = "soft"
+    tenant_id: Optional[str] = None
+    # Number of similar training questions to attach (0 = none)
+    similar_questions: int = Field(0, ge=0, le=100)
+
+
+class StreamQuestion(BaseModel):
+    """One question sent over the /classify-stream WebSocket"""
+    # Client-chosen id echoed with the result
+    id: Union[str, int, None] = None
+    question: str
+    model: str = "MultinomialNB"
+    weights: Optional[Dict[str, float]] = None
+    voting: Literal["soft", "hard"] = "soft"
+
+
+class SimilarQuestion(BaseModel):
+    """An indexed training question and its cosine similarity"""
+    question: str
+    department: str
+    score: float
 
 
 class ClassificationResponse(BaseModel):
@@ -19,12 +41,112 @@ class ClassificationResponse(BaseModel):
     predictions: Dict[str, float]
     confidence: float
     is_mock: bool = True
+    answered_by: Optional[str] = None
+    cascade_depth: Optional[int] = None
+    model_predictions: Optional[Dict[str, Dict[str, float]]] = None
+    similar_questions: Optional[List[SimilarQuestion]] = None
+
+
+class BatchClassificationRequest(BaseModel):
+    """Request model for classifying several questions at once"""
+    questions: List[str]
+    model: str = "MultinomialNB"
+    weights: Optional[Dict[str, float]] = None
+    voting: Literal["soft", "hard"] = "soft"
+    tenant_id: Optional[str] = None
+
+
+class BatchClassificationResponse(BaseModel):
+    """Response model for batch classification"""
+    results: List[ClassificationResponse]
 
 
 class TrainingRequest(BaseModel):
     """Request model for training ML models"""
     questions: List[str]
     departments: List[str]
+    tenant_id: Optional[str] = None
+
+
+class ShadowCandidateRequest(BaseModel):
+    """Request model for shadow-evaluating a candidate bundle on live traffic"""
+    candidate: str
+    # Train the candidate from these instead of loading its saved bundle
+    questions: Optional[List[str]] = None
+    departments: Optional[List[str]] = None
+    # Share of /classify-question traffic mirrored; the configured one if omitted
+    sample_rate: Optional[float] = Field(None, ge=0.0, le=1.0)
+    tenant_id: Optional[str] = None
+
+
+class CascadeCalibrationRequest(BaseModel):
+    """Request model for picking cascade thresholds on validation data"""
+    questions: List[str]
+    departments: List[str]
+    target_accuracy: float = Field(0.95, ge=0.0, le=1.0)
+
+
+class DistillationRequest(BaseModel):
+    """Request model for distilling a teacher into the linear student"""
+    # Defaults to the corpus the models were trained on
+    questions: Optional[List[str]] = None
+    teacher: str = "Ensemble"
+    unlabelled_questions: List[str] = []
+    validation_questions: List[str] = []
+    validation_departments: List[str] = []
+
+
+class CompressionRequest(BaseModel):
+    """Request model for exporting pruned/quantized linear models"""
+    prune_ratio: float = Field(0.0, ge=0.0, lt=1.0)
+    quantize: bool = True
+    validation_questions: List[str] = []
+    validation_departments: List[str] = []
+
+
+class HierarchyTrainingRequest(BaseModel):
+    """Request model for training the department/team/queue classifier"""
+    questions: List[str]
+    paths: List[str]
+    node_model: Literal["MultinomialNB", "SVM", "RandomForest", "LogisticRegression"] = (
+        "LogisticRegression"
+    )
+    separator: str = "/"
+    tenant_id: Optional[str] = None
+
+
+class HierarchicalClassificationRequest(BaseModel):
+    """Request model for top-k taxonomy leaf classification"""
+    question: str
+    top_k: int = Field(5, ge=1, le=100)
+    beam_width: int = Field(10, ge=1, le=1000)
+    tenant_id: Optional[str] = None
+
+
+class SimilarQuestionsRequest(BaseModel):
+    """Request model for similar-question retrieval"""
+    question: str
+    top_k: int = Field(5, ge=1, le=100)
+    tenant_id: Optional[str] = None
+
+
+class SimilarQuestionsResponse(BaseModel):
+    """Response model for similar-question retrieval"""
+    question: str
+    results: List[SimilarQuestion]
+
+
+class LeafPrediction(BaseModel):
+    """One taxonomy leaf and its path probability"""
+    path: str
+    probability: float
+
+
+class HierarchicalClassificationResponse(BaseModel):
+    """Response model for hierarchical classification"""
+    question: str
+    model_used: str
+    leaves: List[LeafPrediction]
 
 
 class TrainingResponse(BaseModel):
@@ -0,0 +1,78 @@
+"""
+Fast response classes and Accept-header negotiation
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from fastapi.responses import Response
+from infrastructure.data.encoding import (
+    MSGPACK, MSGPACK_ALIASES, dumps_json, dumps_msgpack, msgpack_available,
+    msgpack_records, ndjson_records
+)
+from infrastructure.data.tabular import JSON, NDJSON
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response for results the services built themselves: the content is
+    encoded as is, without the response-model validation and
+    ``jsonable_encoder`` pass FastAPI applies to returned objects
+    """
+    media_type = JSON
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+class MsgPackResponse(Response):
+    """MessagePack counterpart of FastJSONResponse"""
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        return dumps_msgpack(content)
+
+
+def negotiate(accept: Optional[str], offered: Sequence[str]) -> str:
+    """
+    Offered media type the Accept header ranks highest (by q, then header
+    order). The first offered type is the default, also when the header
+    accepts none of them; MessagePack is only offered when msgpack is
+    installed.
+    """
+    offered = [media_type for media_type in offered if media_type != MSGPACK or msgpack_available()]
+    if not accept:
+        return offered[0]
+    best, best_q = offered[0], 0.0
+    for media_range in accept.split(","):
+        name, _, parameters = media_range.partition(";")
+        name = name.strip().lower()
+        if name in MSGPACK_ALIASES:
+            name = MSGPACK
+        q = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        for media_type in offered:
+            if name in (media_type, "*/*", media_type.split("/")[0] + "/*") and q > best_q:
+                best, best_q = media_type, q
+    return best
+
+
+def encode_response(data: Any, accept: Optional[str], status_code: int = 200) -> Response:
+    """JSON or, if the client prefers it, MessagePack response of a trusted result"""
+    if negotiate(accept, (JSON, MSGPACK)) == MSGPACK:
+        response_class = MsgPackResponse
+    else:
+        response_class = FastJSONResponse
+    return response_class(data, status_code=status_code, headers={"Vary": "Accept"})
+
+
+def stream_encoding(
+    accept: Optional[str]
+) -> Tuple[str, Callable[[List[Dict[str, Any]]], bytes]]:
+    """Media type and record encoder of a streamed response: NDJSON or MessagePack"""
+    if negotiate(accept, (NDJSON, MSGPACK)) == MSGPACK:
+        return MSGPACK, msgpack_records
+    return NDJSON, ndjson_records
@@ -1,14 +1,30 @@
 """
 Classification API routes for department classification
 """
-from fastapi import APIRouter, HTTPException
+from typing import Literal, Optional
+from fastapi import APIRouter, Header, HTTPException, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from api.classification_stream import ClassificationStream
 from api.models.classification_models import (
     ClassificationRequest, ClassificationResponse,
-    TrainingRequest, TrainingResponse,
+    BatchClassificationRequest, BatchClassificationResponse,
+    TrainingRequest, TrainingResponse, CascadeCalibrationRequest,
+    DistillationRequest, CompressionRequest,
+    HierarchyTrainingRequest, HierarchicalClassificationRequest, ShadowCandidateRequest,
+    HierarchicalClassificationResponse,
+    SimilarQuestionsRequest, SimilarQuestionsResponse,
     ModelStatusResponse, DepartmentsResponse, ModelsResponse
 )
-from business.services.classification_service import classification_service
+from api.responses import FastJSONResponse, encode_response
+from business.services.classification_service import (
+    classification_service,
+    classification_flights
+)
+from business.services.model_registry import model_registry, UnknownTenantError
+from business.services.shadow_evaluator import shadow_evaluator
 from business.services.training_data import get_training_data
+from common.config import settings
+from infrastructure.data.encoding import msgpack_available
 
 router = APIRouter()
 
@@ -20,21 +36,30 @@ async def classify_question(request: ClassificationRequest):
     Uses the classification service for predictions.
     """
     try:
-        # Use the classification service
-        result = classification_service.classify_question(
-            question=request.question,
-            model_name=request.model
-        )
+        if not settings.single_flight_classification:
+            result = await run_in_threadpool(_classify, None, request)
+        else:
+            # Identical in-flight requests share one computation
+            service = await _resolve_service(request.tenant_id)
+            key = service.coalescing_key(
+                request.question, request.model, request.weights, request.voting,
+                request.similar_questions
+            )
+            result = await classification_flights.do(
+                key, lambda: run_in_threadpool(_classify, service, request)
+            )
         
-        return ClassificationResponse(
-            question=result["question"],
-            predicted_department=result["predicted_department"],
-            model_used=result["model_used"],
-            predictions=result["predictions"],
-            confidence=result["confidence"],
-            is_mock=result.get("is_mock", True)
+        # Mirror a sample to the shadow candidate, if any, without waiting on it
+        shadow_evaluator.mirror(
+            request.tenant_id, request.question, request.model, request.weights,
+            request.voting, result
         )
+        return FastJSONResponse(_response_fields({**result, "question": request.question}))
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -42,8 +67,145 @@ async def classify_question(request: ClassificationRequest):
         )
 
 
+@router.post("/classify-batch", response_model=BatchClassificationResponse)
+def classify_batch(request: BatchClassificationRequest, accept: Optional[str] = Header(None)):
+    """
+    Classify several questions with one vectorization pass. With model
+    "Ensemble" every trained model scores the same rows and the results
+    are combined by soft or hard (weighted) voting. Answered in JSON or,
+    with ``Accept: application/msgpack``, MessagePack.
+    """
+    try:
+        results = _service_for(request.tenant_id).classify_batch(
+            questions=request.questions,
+            model_name=request.model,
+            weights=request.weights,
+            voting=request.voting
+        )
+        
+        return encode_response(
+            {"results": [_response_fields(result) for result in results]}, accept
+        )
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch classification error: {str(e)}"
+        )
+
+
+@router.websocket("/classify-stream")
+async def classify_stream(
+    websocket: WebSocket,
+    tenant_id: Optional[str] = None,
+    encoding: Literal["json", "msgpack"] = "json"
+):
+    """
+    Classify a continuous stream of questions over one connection. Clients
+    pipeline questions with their own ids within a credit window and get
+    results batch by batch as they finish (see ClassificationStream), as
+    JSON text frames or, with ``encoding=msgpack``, MessagePack binary frames.
+    """
+    try:
+        service = await _resolve_service(tenant_id)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=str(e.detail))
+        return
+    if encoding == "msgpack" and not msgpack_available():
+        await websocket.close(code=1008, reason="MessagePack support is not installed")
+        return
+    await ClassificationStream(websocket, service, msgpack=encoding == "msgpack").run()
+
+
+def _classify(service, request: ClassificationRequest) -> dict:
+    """
+    Classify one question, attaching similar questions when an index
+    exists. Without a service the request's tenant is resolved here, on the
+    worker thread.
+    """
+    if service is None:
+        service = _service_for(request.tenant_id)
+    return service.classify_question(
+        question=request.question,
+        model_name=request.model,
+        weights=request.weights,
+        voting=request.voting,
+        similar_questions=request.similar_questions
+    )
+
+
+async def _resolve_service(tenant_id: Optional[str]):
+    """
+    _service_for from async handlers: a tenant lookup may load a bundle
+    from disk or wait for the tenant's training, so it runs off the event loop
+    """
+    if tenant_id is None:
+        return classification_service
+    return await run_in_threadpool(_service_for, tenant_id)
+
+
+def _service_for(tenant_id: Optional[str]):
+    """Classification service of a tenant, or the default one"""
+    if tenant_id is None:
+        return classification_service
+    try:
+        return model_registry.get(tenant_id)
+    except UnknownTenantError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _response_fields(result: dict) -> dict:
+    """
+    The ClassificationResponse fields of a service classification result.
+    The service builds these results itself, so they are encoded directly
+    instead of being validated into the response model again.
+    """
+    return {
+        "question": result["question"],
+        "predicted_department": result["predicted_department"],
+        "model_used": result["model_used"],
+        "predictions": result["predictions"],
+        "confidence": result["confidence"],
+        "is_mock": result.get("is_mock", True),
+        "answered_by": result.get("answered_by"),
+        "cascade_depth": result.get("cascade_depth"),
+        "model_predictions": result.get("model_predictions"),
+        "similar_questions": result.get("similar_questions")
+    }
+
+
+@router.post("/similar-questions", response_model=SimilarQuestionsResponse)
+def find_similar_questions(request: SimilarQuestionsRequest):
+    """
+    Return the training questions most similar to a question, searched
+    through the inverted index over their TF-IDF vectors
+    """
+    try:
+        results = _service_for(request.tenant_id).find_similar_questions(
+            question=request.question,
+            top_k=request.top_k
+        )
+        return SimilarQuestionsResponse(question=request.question, results=results)
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Similar-question search error: {str(e)}"
+        )
+
+
 @router.post("/train-models", response_model=TrainingResponse)
-async def train_models(request: TrainingRequest):
+def train_models(request: TrainingRequest):
     """
     Train classification models with provided data
     """
@@ -61,10 +223,20 @@ async def train_models(request: TrainingRequest):
             )
         
         # Use the classification service to train models
-        result = classification_service.train_models(
-            questions=request.questions,
-            departments=request.departments
-        )
+        if request.tenant_id is None:
+            result = classification_service.train_models(
+                questions=request.questions,
+                departments=request.departments
+            )
+        else:
+            try:
+                result = model_registry.train(
+                    tenant_id=request.tenant_id,
+                    questions=request.questions,
+                    departments=request.departments
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
         return TrainingResponse(
             success=result["success"],
@@ -72,6 +244,8 @@ async def train_models(request: TrainingRequest):
             results=result["results"]
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -79,12 +253,183 @@ async def train_models(request: TrainingRequest):
         )
 
 
+@router.post("/train-hierarchy", response_model=TrainingResponse)
+def train_hierarchy(request: HierarchyTrainingRequest):
+    """
+    Train the hierarchical classifier: one small model per internal node
+    of the label tree given by the "/"-separated paths
+    """
+    try:
+        if len(request.questions) != len(request.paths):
+            raise HTTPException(
+                status_code=400,
+                detail="Questions and paths must have the same length"
+            )
+        
+        options = {"node_model": request.node_model, "separator": request.separator}
+        if request.tenant_id is None:
+            result = classification_service.train_hierarchy(
+                request.questions, request.paths, **options
+            )
+        else:
+            try:
+                result = model_registry.train_hierarchy(
+                    request.tenant_id, request.questions, request.paths, **options
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["message"])
+        return TrainingResponse(
+            success=result["success"],
+            message=result["message"],
+            results={"hierarchy": result["results"]}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Hierarchy training error: {str(e)}"
+        )
+
+
+@router.post("/classify-hierarchical", response_model=HierarchicalClassificationResponse)
+def classify_hierarchical(request: HierarchicalClassificationRequest):
+    """
+    Return the top-k taxonomy leaves for a question using beam search
+    down the label tree
+    """
+    try:
+        result = _service_for(request.tenant_id).classify_hierarchical(
+            question=request.question,
+            top_k=request.top_k,
+            beam_width=request.beam_width
+        )
+        return HierarchicalClassificationResponse(**result)
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Hierarchical classification error: {str(e)}"
+        )
+
+
+@router.post("/calibrate-cascade")
+def calibrate_cascade(request: CascadeCalibrationRequest):
+    """
+    Pick cascade thresholds that reach the target accuracy on the given
+    validation data at the lowest expected latency
+    """
+    try:
+        if len(request.questions) != len(request.departments):
+            raise HTTPException(
+                status_code=400,
+                detail="Questions and departments must have the same length"
+            )
+        
+        result = classification_service.calibrate_cascade(
+            questions=request.questions,
+            departments=request.departments,
+            target_accuracy=request.target_accuracy
+        )
+        if result["success"]:
+            return result
+        else:
+            raise HTTPException(status_code=500, detail=result["message"])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error calibrating cascade: {str(e)}"
+        )
+
+
+@router.post("/distill-model")
+def distill_model(request: DistillationRequest):
+    """
+    Train the "Distilled" linear student on the probabilities of a trained
+    teacher model or of the ensemble
+    """
+    try:
+        if len(request.validation_questions) != len(request.validation_departments):
+            raise HTTPException(
+                status_code=400,
+                detail="Validation questions and departments must have the same length"
+            )
+        
+        result = classification_service.distill_model(
+            questions=request.questions,
+            teacher=request.teacher,
+            unlabelled_questions=request.unlabelled_questions,
+            validation_questions=request.validation_questions,
+            validation_departments=request.validation_departments
+        )
+        if result["success"]:
+            return result
+        else:
+            raise HTTPException(status_code=500, detail=result["message"])
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error distilling model: {str(e)}"
+        )
+
+
+@router.post("/export-compressed-models")
+def export_compressed_models(request: CompressionRequest):
+    """
+    Prune and int8-quantize the trained linear models and report size,
+    latency and accuracy against the originals
+    """
+    try:
+        if len(request.validation_questions) != len(request.validation_departments):
+            raise HTTPException(
+                status_code=400,
+                detail="Validation questions and departments must have the same length"
+            )
+        
+        result = classification_service.export_compressed_models(
+            prune_ratio=request.prune_ratio,
+            quantize=request.quantize,
+            validation_questions=request.validation_questions,
+            validation_departments=request.validation_departments
+        )
+        if result["success"]:
+            return result
+        else:
+            raise HTTPException(status_code=500, detail=result["message"])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error exporting compressed models: {str(e)}"
+        )
+
+
 @router.get("/departments")
-async def get_departments():
+def get_departments(tenant_id: Optional[str] = None):
     """Get list of available departments"""
     try:
-        departments = classification_service.get_departments()
+        departments = _service_for(tenant_id).get_departments()
         return {"departments": departments}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -106,11 +451,13 @@ async def get_available_models():
 
 
 @router.get("/model-status")
-async def get_model_status():
+def get_model_status(tenant_id: Optional[str] = None):
     """Get status of all models"""
     try:
-        status = classification_service.get_model_status()
+        status = _service_for(tenant_id).get_model_status()
         return status
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -118,8 +465,107 @@ async def get_model_status():
         )
 
 
+@router.get("/model-registry")
+async def get_model_registry():
+    """Hit/miss/load-latency metrics and loaded bundles of the tenant registry"""
+    try:
+        return model_registry.get_metrics()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting model registry metrics: {str(e)}"
+        )
+
+
+@router.post("/shadow")
+def start_shadow(request: ShadowCandidateRequest):
+    """
+    Shadow-evaluate a candidate bundle: load it from the candidates
+    directory (or train and save it from the given data) and mirror a
+    sample of /classify-question traffic to it in the background
+    """
+    try:
+        _service_for(request.tenant_id)
+        options = {"tenant_id": request.tenant_id, "sample_rate": request.sample_rate}
+        if request.questions is None:
+            return shadow_evaluator.load_candidate(request.candidate, **options)
+        
+        if request.departments is None or len(request.questions) != len(request.departments):
+            raise HTTPException(
+                status_code=400,
+                detail="Questions and departments must have the same length"
+            )
+        return shadow_evaluator.train_candidate(
+            request.candidate, request.questions, request.departments, **options
+        )
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error starting shadow evaluation: {str(e)}"
+        )
+
+
+@router.get("/shadow")
+async def get_shadow_metrics():
+    """Agreement, confidence deltas and latency of the shadow candidate"""
+    try:
+        return shadow_evaluator.get_metrics()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting shadow metrics: {str(e)}"
+        )
+
+
+@router.delete("/shadow")
+async def stop_shadow():
+    """Stop shadow evaluation and return the candidate's final metrics"""
+    try:
+        return shadow_evaluator.stop()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error stopping shadow evaluation: {str(e)}"
+        )
+
+
+@router.get("/monitoring")
+def get_monitoring(tenant_id: Optional[str] = None):
+    """
+    Drift of /classify-question traffic: predicted departments, confidence
+    per model, out-of-vocabulary rate and question length over sliding
+    windows, compared with the profile of the training data
+    """
+    try:
+        return _service_for(tenant_id).state.monitor.get_report()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting monitoring report: {str(e)}"
+        )
+
+
+@router.get("/single-flight")
+async def get_single_flight_metrics():
+    """How many /classify-question requests shared an in-flight computation"""
+    try:
+        return classification_flights.get_metrics()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting single-flight metrics: {str(e)}"
+        )
+
+
 @router.post("/save-models")
-async def save_models():
+def save_models():
     """Save trained models to disk"""
     try:
         result = classification_service.save_models()
@@ -135,7 +581,7 @@ async def save_models():
 
 
 @router.post("/load-models")
-async def load_models():
+def load_models():
     """Load trained models from disk"""
     try:
         result = classification_service.load_models()
@@ -151,7 +597,7 @@ async def load_models():
 
 
 @router.post("/train-with-sample-data")
-async def train_with_sample_data():
+def train_with_sample_data():
     """Train models with sample data for testing"""
     try:
         sample_data = get_training_data()
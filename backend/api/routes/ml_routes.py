@@ -1,21 +1,65 @@
 """
 Machine Learning API Routes
 """
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict, Any
-from pydantic import BaseModel
+import io
+import numpy as np
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from typing import Callable, List, Dict, Any, Literal, Optional, Type, Union
+from pydantic import BaseModel, Field, ValidationError as SchemaError
+from api.admission import check_deadline
 from api.dependencies import get_ml_service
+from api.responses import encode_response, stream_encoding
 from business.services.ml_service import MLService
-from common.exceptions import ValidationError, PredictionError
+from common.config import settings
+from common.exceptions import ValidationError, UnsupportedMediaTypeError
+from infrastructure.ml.least_squares import LeastSquaresStatistics
+from infrastructure.data.tabular import (
+    COLUMNAR, CSV, JSON, NDJSON, NPZ, is_json, media_type_of, supported_media_types,
+    iter_feature_chunks, read_feature_matrix, read_table_columns, read_training_table
+)
 
 router = APIRouter(prefix="/ml", tags=["Machine Learning"])
 
 # Pydantic Models for Request/Response
+FeatureValue = Union[float, str, None]
+FeatureRow = Union[List[FeatureValue], Dict[str, FeatureValue]]
+
+class ColumnSpec(BaseModel):
+    name: str
+    type: Literal["numeric", "categorical"] = "numeric"
+    # Fixed dictionary of a categorical column; learned from the data if omitted
+    categories: Optional[List[Union[str, float]]] = None
+
+class TableSchemaSpec(BaseModel):
+    columns: List[ColumnSpec] = Field(..., min_length=1)
+    # Defaults to the last column of the data
+    target: Optional[str] = None
+
 class TrainingData(BaseModel):
     data: List[Dict[str, Any]]
+    # Declared column types; inferred from the data when omitted
+    table_schema: Optional[TableSchemaSpec] = Field(None, alias="schema")
+
+    def schema_spec(self) -> Optional[Dict[str, Any]]:
+        return self.table_schema.model_dump() if self.table_schema else None
+
+class FileTrainingRequest(BaseModel):
+    paths: List[str]
+    method: Literal["forest", "sgd"] = "forest"
+    chunk_rows: int = Field(100000, ge=100)
+    test_size: float = Field(0.2, gt=0.0, lt=1.0)
+    trees_per_chunk: int = Field(10, ge=1, le=1000)
+    epochs: int = Field(1, ge=1, le=100)
 
 class PredictionRequest(BaseModel):
-    features: List[float]
+    # Values in schema order, or keyed by column name
+    features: FeatureRow
+
+class BatchPredictionRequest(BaseModel):
+    features: List[FeatureRow]
 
 class PredictionResponse(BaseModel):
     success: bool
@@ -23,6 +67,70 @@ class PredictionResponse(BaseModel):
     data: Dict[str, Any]
     timestamp: str
 
+def _table_body(model: Type[BaseModel]) -> Dict[str, Any]:
+    """OpenAPI request body of routes that take JSON or a binary table"""
+    content = {JSON: {"schema": model.model_json_schema()}}
+    for media_type in supported_media_types():
+        content[media_type] = {"schema": {"type": "string", "format": "binary"}}
+    return {"requestBody": {"required": True, "content": content}}
+
+async def _read_json(request: Request, model: Type[BaseModel]) -> BaseModel:
+    """Validate a JSON body against its schema (422 on failure, as before)"""
+    body = await request.body()
+    await check_deadline(request)
+    try:
+        return model.model_validate_json(body)
+    except SchemaError as e:
+        raise RequestValidationError(e.errors())
+
+async def _read_table(request: Request, media_type: str, decode: Callable):
+    """Decode a CSV, .npy, .npz or Arrow body into NumPy arrays"""
+    if media_type not in supported_media_types():
+        raise UnsupportedMediaTypeError(
+            f"Unsupported content type '{media_type}'; use {JSON} or one of "
+            f"{', '.join(supported_media_types())}"
+        )
+    body = await request.body()
+    await check_deadline(request)
+    try:
+        return decode(body, media_type)
+    except ValueError as e:
+        raise ValidationError(str(e))
+
+async def _read_prediction_table(request: Request, media_type: str):
+    """A ``{name: column}`` table for CSV/Arrow bodies, otherwise a numeric matrix"""
+    if media_type in COLUMNAR:
+        names, columns = await _read_table(request, media_type, read_table_columns)
+        return dict(zip(names, columns))
+    return await _read_table(request, media_type, read_feature_matrix)
+
+def _batch_rows(batch: BatchPredictionRequest) -> List[Any]:
+    if not batch.features:
+        raise ValidationError("Features cannot be empty")
+    return batch.features
+
+def _stream_batches(request: Request):
+    """Chunked feature matrices of an NDJSON or CSV request body"""
+    media_type = media_type_of(request.headers.get("content-type"))
+    if media_type not in (NDJSON, CSV):
+        raise UnsupportedMediaTypeError(
+            f"Unsupported content type '{media_type}'; use {NDJSON} or {CSV}"
+        )
+    return iter_feature_chunks(request.stream(), media_type, settings.ml_stream_chunk_rows)
+
+class _BodyStreamingResponse(StreamingResponse):
+    """
+    Streaming response produced while the request body is still being read.
+
+    Starlette's StreamingResponse reads ``receive`` to watch for client
+    disconnects, which would swallow the body chunks the generator is
+    waiting for; a disconnect surfaces from ``request.stream()`` instead.
+    """
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
 @router.get("/status")
 async def get_model_status(
     ml_service: MLService = Depends(get_ml_service)
@@ -33,54 +141,269 @@ async def get_model_status(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/train/classification")
+@router.get("/schema/{model_type}")
+async def get_model_schema(
+    model_type: Literal["classification", "regression"],
+    ml_service: MLService = Depends(get_ml_service)
+) -> Dict[str, Any]:
+    """Column types and categorical dictionaries that prediction rows are encoded with"""
+    try:
+        return ml_service.get_schema(model_type)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/models/{model_type}/versions")
+async def list_model_versions(
+    model_type: Literal["classification", "regression"],
+    ml_service: MLService = Depends(get_ml_service)
+) -> Dict[str, Any]:
+    """Saved versions of a model with their training metadata, newest first"""
+    try:
+        return ml_service.list_model_versions(model_type)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/models/{model_type}/restore")
+async def restore_model(
+    model_type: Literal["classification", "regression"],
+    version: Optional[str] = Query(None, description="Version to restore; newest usable if omitted"),
+    ml_service: MLService = Depends(get_ml_service)
+) -> Dict[str, Any]:
+    """Reload a model from the model store, e.g. to roll back to an older version"""
+    try:
+        return await run_in_threadpool(ml_service.restore_models, model_type, version)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/train/classification", openapi_extra=_table_body(TrainingData))
 async def train_classification(
-    training_data: TrainingData,
+    request: Request,
     ml_service: MLService = Depends(get_ml_service)
 ) -> Dict[str, Any]:
-    """Train the classification model"""
+    """Train the classification model from JSON rows or a CSV/.npy/.npz/Arrow table"""
     try:
-        return ml_service.train_classification_model(training_data.data)
-    except (ValidationError, PredictionError) as e:
+        media_type = media_type_of(request.headers.get("content-type"))
+        if is_json(media_type):
+            training_data = await _read_json(request, TrainingData)
+            return await run_in_threadpool(
+                ml_service.train_classification_model,
+                training_data.data, training_data.schema_spec()
+            )
+        if media_type in COLUMNAR:
+            names, columns = await _read_table(request, media_type, read_table_columns)
+            return await run_in_threadpool(
+                ml_service.train_classification_table, names, columns
+            )
+        X, y = await _read_table(request, media_type, read_training_table)
+        return await run_in_threadpool(ml_service.train_classification_arrays, X, y)
+    except (HTTPException, RequestValidationError) as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/train/regression")
+@router.post("/train/classification/files")
+async def train_classification_from_files(
+    file_request: FileTrainingRequest,
+    ml_service: MLService = Depends(get_ml_service)
+) -> Dict[str, Any]:
+    """
+    Train the classification model out of core from .npy/.csv files in the
+    data directory, reading them chunk by chunk
+    """
+    try:
+        options = {"test_size": file_request.test_size}
+        if file_request.method == "forest":
+            options["trees_per_chunk"] = file_request.trees_per_chunk
+        else:
+            options["epochs"] = file_request.epochs
+        return await run_in_threadpool(
+            ml_service.train_classification_from_files,
+            file_request.paths, file_request.method, file_request.chunk_rows, **options
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/train/regression", openapi_extra=_table_body(TrainingData))
 async def train_regression(
-    training_data: TrainingData,
+    request: Request,
+    incremental: bool = False,
+    forgetting: float = Query(1.0, gt=0.0, le=1.0),
     ml_service: MLService = Depends(get_ml_service)
 ) -> Dict[str, Any]:
-    """Train the regression model"""
+    """
+    Train the regression model from JSON rows or a CSV/.npy/.npz/Arrow table.
+    With ``incremental=true`` the rows update the exact least-squares fit
+    of all earlier rows (weighted by ``forgetting``) instead of replacing it.
+    """
     try:
-        return ml_service.train_regression_model(training_data.data)
-    except (ValidationError, PredictionError) as e:
+        media_type = media_type_of(request.headers.get("content-type"))
+        if is_json(media_type):
+            training_data = await _read_json(request, TrainingData)
+            return await run_in_threadpool(
+                ml_service.train_regression_model,
+                training_data.data, incremental, forgetting, training_data.schema_spec()
+            )
+        if media_type in COLUMNAR:
+            names, columns = await _read_table(request, media_type, read_table_columns)
+            return await run_in_threadpool(
+                ml_service.train_regression_table, names, columns, incremental, forgetting
+            )
+        X, y = await _read_table(request, media_type, read_training_table)
+        return await run_in_threadpool(
+            ml_service.train_regression_arrays, X, y, incremental, forgetting
+        )
+    except (HTTPException, RequestValidationError) as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/predict/classification")
+@router.post(
+    "/train/regression/statistics",
+    openapi_extra={"requestBody": {"required": True, "content": {
+        NPZ: {"schema": {"type": "string", "format": "binary"}}
+    }}}
+)
+async def merge_regression_statistics(
+    request: Request,
+    ml_service: MLService = Depends(get_ml_service)
+) -> Dict[str, Any]:
+    """
+    Merge least-squares statistics computed on another worker, sent as the
+    .npz of ``LeastSquaresStatistics.to_arrays()``
+    """
+    try:
+        media_type = media_type_of(request.headers.get("content-type"))
+        if media_type != NPZ:
+            raise UnsupportedMediaTypeError(f"Statistics must be sent as {NPZ}")
+        try:
+            with np.load(io.BytesIO(await request.body()), allow_pickle=False) as archive:
+                statistics = LeastSquaresStatistics.from_arrays(dict(archive))
+        except Exception as e:
+            raise ValidationError(f"Invalid statistics payload: {e}")
+        return await run_in_threadpool(ml_service.merge_regression_statistics, statistics)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/predict/classification", openapi_extra=_table_body(PredictionRequest))
 async def predict_classification(
-    prediction_request: PredictionRequest,
+    request: Request,
     ml_service: MLService = Depends(get_ml_service)
 ) -> Dict[str, Any]:
-    """Make a classification prediction"""
+    """Make a classification prediction for a JSON row, or for every row of a table"""
     try:
-        return ml_service.predict_classification(prediction_request.features)
-    except (ValidationError, PredictionError) as e:
+        media_type = media_type_of(request.headers.get("content-type"))
+        if is_json(media_type):
+            prediction_request = await _read_json(request, PredictionRequest)
+            result = await run_in_threadpool(
+                ml_service.predict_classification, prediction_request.features
+            )
+        else:
+            table = await _read_prediction_table(request, media_type)
+            result = await run_in_threadpool(ml_service.predict_classification_batch, table)
+        return encode_response(result, request.headers.get("accept"))
+    except (HTTPException, RequestValidationError) as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/predict/regression")
+@router.post("/predict/regression", openapi_extra=_table_body(PredictionRequest))
 async def predict_regression(
-    prediction_request: PredictionRequest,
+    request: Request,
+    ml_service: MLService = Depends(get_ml_service)
+) -> Dict[str, Any]:
+    """Make a regression prediction for a JSON row, or for every row of a table"""
+    try:
+        media_type = media_type_of(request.headers.get("content-type"))
+        if is_json(media_type):
+            prediction_request = await _read_json(request, PredictionRequest)
+            result = await run_in_threadpool(
+                ml_service.predict_regression, prediction_request.features
+            )
+        else:
+            table = await _read_prediction_table(request, media_type)
+            result = await run_in_threadpool(ml_service.predict_regression_batch, table)
+        return encode_response(result, request.headers.get("accept"))
+    except (HTTPException, RequestValidationError) as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/predict/classification/batch")
+async def predict_classification_batch(
+    batch: BatchPredictionRequest,
+    accept: Optional[str] = Header(None),
     ml_service: MLService = Depends(get_ml_service)
 ) -> Dict[str, Any]:
-    """Make a regression prediction"""
+    """Make classification predictions for a list of feature rows (JSON or MessagePack)"""
+    try:
+        result = await run_in_threadpool(ml_service.predict_classification_batch, _batch_rows(batch))
+        return encode_response(result, accept)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/predict/regression/batch")
+async def predict_regression_batch(
+    batch: BatchPredictionRequest,
+    accept: Optional[str] = Header(None),
+    ml_service: MLService = Depends(get_ml_service)
+) -> Dict[str, Any]:
+    """Make regression predictions for a list of feature rows (JSON or MessagePack)"""
+    try:
+        result = await run_in_threadpool(ml_service.predict_regression_batch, _batch_rows(batch))
+        return encode_response(result, accept)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/predict/classification/stream")
+async def stream_classification(
+    request: Request,
+    ml_service: MLService = Depends(get_ml_service)
+):
+    """
+    Stream classification predictions for an NDJSON or CSV body, as NDJSON or,
+    with ``Accept: application/msgpack``, concatenated MessagePack maps
+    """
+    try:
+        media_type, encode = stream_encoding(request.headers.get("accept"))
+        return _BodyStreamingResponse(
+            ml_service.stream_predictions("classification", _stream_batches(request), encode),
+            media_type=media_type, headers={"Vary": "Accept"}
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/predict/regression/stream")
+async def stream_regression(
+    request: Request,
+    ml_service: MLService = Depends(get_ml_service)
+):
+    """
+    Stream regression predictions for an NDJSON or CSV body, as NDJSON or,
+    with ``Accept: application/msgpack``, concatenated MessagePack maps
+    """
     try:
-        return ml_service.predict_regression(prediction_request.features)
-    except (ValidationError, PredictionError) as e:
+        media_type, encode = stream_encoding(request.headers.get("accept"))
+        return _BodyStreamingResponse(
+            ml_service.stream_predictions("regression", _stream_batches(request), encode),
+            media_type=media_type, headers={"Vary": "Accept"}
+        )
+    except HTTPException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
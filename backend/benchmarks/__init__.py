@@ -0,0 +1,5 @@
+"""
+Benchmarks - Standalone performance measurements for the backend
+
+Run from the backend directory, e.g. ``python -m benchmarks.vectorizer_artifacts``.
+"""
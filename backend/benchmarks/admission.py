@@ -0,0 +1,86 @@
+"""
+Benchmark - Admission control under overload
+
+Drives the ASGI app with more concurrent work than one worker can serve:
+a flood of large .npy tables posted to /ml/predict/classification and a
+forest training request, while single-row predictions keep arriving at a steady
+pace. With admission control on, the batch and training lanes are bounded
+and the overflow is answered 429/503 at once; with it off, every request is
+accepted and queued. Reports the latency of the single-row predictions and
+the latency and outcome of the batch flood.
+"""
+import asyncio
+import io
+import sys
+import time
+from collections import Counter
+import httpx
+import numpy as np
+from api.admission import admission_controller
+from api.dependencies import ml_service
+from benchmarks.corpus import percentiles
+from main import app
+
+N_FEATURES = 20
+BATCH_ROWS = 5000
+PROBES = 100
+PROBE_INTERVAL = 0.02
+
+
+def _npy(array: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+async def _probe(client: httpx.AsyncClient, row: bytes):
+    samples = []
+    for _ in range(PROBES):
+        start = time.perf_counter()
+        response = await client.post(
+            "/api/v1/ml/predict/classification", content=row,
+            headers={"content-type": "application/json"}
+        )
+        assert response.status_code == 200, response.text
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL)
+    return samples
+
+
+async def overload(n_batches: int, X: np.ndarray, y: np.ndarray):
+    row = b'{"features": %s}' % str(X[0].tolist()).encode()
+    batch = _npy(X[:BATCH_ROWS])
+    table = _npy(np.column_stack([X, y]))
+    print(f"{n_batches} batch requests of {BATCH_ROWS} rows + 1 training request "
+          f"+ {PROBES} paced single-row predictions")
+    for enabled in (False, True):
+        admission_controller.enabled = enabled
+        async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=600) as client:
+            start = time.perf_counter()
+            flood = [
+                client.post("/api/v1/ml/predict/classification", content=batch,
+                            headers={"content-type": "application/x-npy"})
+                for _ in range(n_batches)
+            ]
+            training = client.post("/api/v1/ml/train/classification", content=table,
+                                   headers={"content-type": "application/x-npy"})
+            *responses, samples = await asyncio.gather(*flood, training, _probe(client, row))
+            seconds = time.perf_counter() - start
+        stats = percentiles(samples)
+        served = percentiles([
+            response.elapsed.total_seconds() * 1000
+            for response in responses if response.status_code == 200
+        ])
+        outcomes = Counter(response.status_code for response in responses)
+        print(f"  admission={enabled!s:<5} {seconds:7.2f}s  single-row p50={stats['p50']:8.2f}ms "
+              f"p99={stats['p99']:8.2f}ms  served batch/training p99={served['p99']:8.1f}ms  "
+              f"statuses={dict(sorted(outcomes.items()))}")
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(20000, N_FEATURES))
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    ml_service.train_classification_arrays(X, y)
+    for size in [int(arg) for arg in sys.argv[1:]] or [40]:
+        asyncio.run(overload(size, X, y))
@@ -0,0 +1,51 @@
+"""
+Benchmark - Cascade threshold calibration and cheap-first inference
+
+Trains all models on a synthetic corpus, calibrates the cascade on a held-out
+split for a target accuracy and compares accuracy and mean latency of each
+single model with the calibrated cascade.
+"""
+import sys
+import time
+from benchmarks.corpus import make_corpus
+from business.services.classification_service import (
+    CASCADE_MODEL,
+    DepartmentClassificationService
+)
+
+
+def _evaluate(service, model_name, questions, departments):
+    hits = 0
+    start = time.perf_counter()
+    for question, department in zip(questions, departments):
+        result = service.classify_question(question, model_name)
+        hits += result["predicted_department"] == department
+    elapsed = (time.perf_counter() - start) * 1000 / len(questions)
+    return hits / len(questions), elapsed
+
+
+def run(n_train: int, target_accuracy: float):
+    questions, departments = make_corpus(n_train + 1000, seed=3)
+    # Randomly relabel 10% so the models are not trivially perfect
+    for i in range(0, len(departments), 10):
+        departments[i] = departments[(i * 7 + 3) % len(departments)]
+
+    service = DepartmentClassificationService()
+    service.train_models(questions[:n_train], departments[:n_train])
+    validation = (questions[n_train:n_train + 500], departments[n_train:n_train + 500])
+    test = (questions[n_train + 500:], departments[n_train + 500:])
+
+    calibration = service.calibrate_cascade(*validation, target_accuracy=target_accuracy)
+    print(f"train={n_train} target={target_accuracy}")
+    print(f"  stages={calibration['stages']}")
+    print(f"  expected accuracy={calibration['expected_accuracy']} "
+          f"latency={calibration['expected_latency_ms']}ms")
+    for model_name in ["MultinomialNB", "LogisticRegression", "SVM", "RandomForest", CASCADE_MODEL]:
+        accuracy, latency = _evaluate(service, model_name, *test)
+        print(f"  {model_name:18s} accuracy={accuracy:.3f} latency={latency:.3f}ms")
+
+
+if __name__ == "__main__":
+    n_train = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else 0.9
+    run(n_train, target)
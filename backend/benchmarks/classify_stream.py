@@ -0,0 +1,114 @@
+"""
+Benchmark - WebSocket /classify-stream vs HTTP /classify-question
+
+Starts the API with uvicorn and classifies the same distinct questions
+with MultinomialNB:
+
+- HTTP: keep-alive connections each sending one POST /classify-question
+  at a time
+- WebSocket: one connection pipelining questions within its credits, one
+  question per frame and lists of questions per frame
+
+Reports questions per second and, for HTTP, the per-request latency.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import httpx
+from websockets.asyncio.client import connect
+from benchmarks.corpus import make_corpus, percentiles
+
+PORT = 8765
+BASE_URL = f"http://127.0.0.1:{PORT}/api/v1"
+STREAM_URL = f"ws://127.0.0.1:{PORT}/api/v1/classify-stream"
+HTTP_CONNECTIONS = 16
+
+
+def _start_server() -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning"],
+        env={**os.environ, "SINGLE_FLIGHT_CLASSIFICATION": "false"}
+    )
+    for _ in range(600):
+        try:
+            if httpx.get(f"http://127.0.0.1:{PORT}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("Server did not start")
+
+
+async def http(questions):
+    queue = list(reversed(questions))
+    samples = []
+
+    async def worker(client: httpx.AsyncClient):
+        while queue:
+            question = queue.pop()
+            start = time.perf_counter()
+            response = await client.post(f"{BASE_URL}/classify-question", json={"question": question})
+            assert response.status_code == 200, response.text
+            samples.append((time.perf_counter() - start) * 1000)
+
+    limits = httpx.Limits(max_connections=HTTP_CONNECTIONS)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(HTTP_CONNECTIONS)])
+        seconds = time.perf_counter() - start
+    stats = percentiles(samples)
+    print(f"  HTTP, {HTTP_CONNECTIONS} connections     {len(questions) / seconds:8.0f} questions/s  "
+          f"p50={stats['p50']:7.2f}ms p99={stats['p99']:7.2f}ms")
+
+
+async def stream(questions, per_frame: int):
+    async with connect(STREAM_URL, max_size=None) as websocket:
+        credits = json.loads(await websocket.recv())["credits"]
+        start = time.perf_counter()
+
+        async def send():
+            nonlocal credits
+            for i in range(0, len(questions), per_frame):
+                while credits < per_frame:
+                    await credits_freed.wait()
+                    credits_freed.clear()
+                credits -= per_frame
+                frame = [{"id": i + j, "question": q} for j, q in enumerate(questions[i:i + per_frame])]
+                await websocket.send(json.dumps(frame if per_frame > 1 else frame[0]))
+
+        async def receive():
+            nonlocal credits
+            answered = 0
+            while answered < len(questions):
+                results = json.loads(await websocket.recv())["results"]
+                assert all("error" not in result for result in results), results[0]
+                answered += len(results)
+                credits += len(results)
+                credits_freed.set()
+
+        credits_freed = asyncio.Event()
+        await asyncio.gather(send(), receive())
+        seconds = time.perf_counter() - start
+    print(f"  WebSocket, {per_frame:>3} per frame     {len(questions) / seconds:8.0f} questions/s")
+
+
+async def compare(n_questions: int):
+    questions, _ = make_corpus(n_questions, seed=7)
+    print(f"{n_questions} distinct questions, MultinomialNB")
+    await http(questions)
+    await stream(questions, per_frame=1)
+    await stream(questions, per_frame=32)
+
+
+if __name__ == "__main__":
+    server = _start_server()
+    try:
+        for size in [int(arg) for arg in sys.argv[1:]] or [5000]:
+            asyncio.run(compare(size))
+    finally:
+        server.terminate()
+        server.wait()
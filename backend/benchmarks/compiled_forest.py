@@ -0,0 +1,60 @@
+"""
+Benchmark - Compiled RandomForest inference vs. sklearn predict_proba
+
+Checks that the compiled forest reproduces sklearn's probabilities exactly
+and compares latency for single rows and batches plus the memory of the
+node arrays against the pickled sklearn model.
+"""
+import io
+import sys
+import time
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from benchmarks.corpus import make_corpus, percentiles
+from infrastructure.ml.classifiers import TextVectorizer
+from infrastructure.ml.compiled_forest import CompiledForest
+
+
+def _latency(predict_proba, X, batch_size: int, repeats: int):
+    samples = []
+    for i in range(repeats):
+        start_row = (i * batch_size) % (X.shape[0] - batch_size + 1)
+        batch = X[start_row:start_row + batch_size]
+        start = time.perf_counter()
+        predict_proba(batch)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def run(n_train: int):
+    questions, departments = make_corpus(n_train + 2000)
+    # Relabel 10% so trees grow to realistic depth
+    for i in range(0, len(departments), 10):
+        departments[i] = departments[(i * 7 + 3) % len(departments)]
+
+    vectorizer = TextVectorizer()
+    X_train = vectorizer.fit_transform(questions[:n_train])
+    forest = RandomForestClassifier(n_estimators=100, random_state=42)
+    forest.fit(X_train, departments[:n_train])
+    X_test = vectorizer.transform(questions[n_train:])
+
+    start = time.perf_counter()
+    compiled = CompiledForest(forest)
+    compile_ms = (time.perf_counter() - start) * 1000
+    assert np.array_equal(forest.predict_proba(X_test), compiled.predict_proba(X_test))
+
+    buffer = io.BytesIO()
+    joblib.dump(forest, buffer)
+    print(f"train={n_train} nodes={len(compiled.feature)} max_depth={compiled.max_depth}")
+    print(f"  memory  sklearn pickle={buffer.tell() / 1e6:.1f}MB "
+          f"compiled arrays={compiled.nbytes / 1e6:.1f}MB compile={compile_ms:.0f}ms")
+    for batch_size, repeats in ((1, 300), (16, 100), (64, 30), (1000, 5)):
+        print(f"  batch={batch_size:4d} sklearn  {_latency(forest.predict_proba, X_test, batch_size, repeats)} ms")
+        print(f"  batch={batch_size:4d} compiled {_latency(compiled.predict_proba, X_test, batch_size, repeats)} ms")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [5000, 20000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,73 @@
+"""
+Benchmark - Pruned and int8-quantized linear models
+
+For every compressible model and a sweep of pruning ratios, compares the
+artifact size, single-question latency and held-out accuracy of the
+compressed export against the original model.
+"""
+import io
+import sys
+import time
+import joblib
+import numpy as np
+from benchmarks.corpus import make_corpus, percentiles
+from infrastructure.ml.classifiers import (
+    CompressedLinearClassifier, TextVectorizer, create_classifier
+)
+
+MODELS = ["MultinomialNB", "LogisticRegression", "SVM"]
+SETTINGS = [(0.0, False), (0.0, True), (0.5, True), (0.8, True), (0.9, True), (0.95, True)]
+
+
+def _artifact_bytes(model) -> int:
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell()
+
+
+def _latency(classifier, X, repeats: int = 500):
+    samples = []
+    for i in range(repeats):
+        row = X[i % X.shape[0]]
+        start = time.perf_counter()
+        classifier.predict_proba(row)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def run(n_train: int):
+    questions, departments = make_corpus(n_train + 2000)
+    # Relabel 10% so the models do not separate the classes perfectly
+    for i in range(0, len(departments), 10):
+        departments[i] = departments[(i * 7 + 3) % len(departments)]
+    y_test = np.asarray(departments[n_train:])
+
+    vectorizer = TextVectorizer()
+    X_train = vectorizer.fit_transform(questions[:n_train])
+    X_test = vectorizer.transform(questions[n_train:])
+    print(f"train={n_train} features={vectorizer.n_features}")
+
+    for model_name in MODELS:
+        original = create_classifier(model_name)
+        original.train(X_train, departments[:n_train])
+        original_pred = original.predict(X_test)
+        accuracy = np.mean(original_pred == y_test)
+        print(f"  {model_name} size={_artifact_bytes(original.model) / 1e3:.0f}KB "
+              f"accuracy={accuracy:.4f} latency={_latency(original, X_test)} ms")
+
+        for prune_ratio, quantize in SETTINGS:
+            compressed = CompressedLinearClassifier.from_classifier(
+                original, prune_ratio, quantize
+            )
+            pred = compressed.predict(X_test)
+            print(f"    prune={prune_ratio:.2f} int8={quantize!s:5} "
+                  f"size={_artifact_bytes(compressed.model) / 1e3:.0f}KB "
+                  f"accuracy_delta={np.mean(pred == y_test) - accuracy:+.4f} "
+                  f"agreement={np.mean(pred == original_pred):.4f} "
+                  f"latency={_latency(compressed, X_test)} ms")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000]
+    for size in sizes:
+        run(size)
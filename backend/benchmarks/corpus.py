@@ -0,0 +1,46 @@
+"""
+Synthetic corpus generation for benchmarks
+"""
+import numpy as np
+from typing import Dict, List, Tuple
+from business.services.training_data import get_training_data
+
+
+def make_corpus(
+    n_samples: int,
+    extra_vocabulary: int = 20000,
+    seed: int = 42
+) -> Tuple[List[str], List[str]]:
+    """
+    Build a labelled question corpus of arbitrary size.
+
+    Each synthetic question starts from a sample training question and is
+    padded with Zipf-distributed filler words, so the vocabulary keeps
+    growing with corpus size the way real ticket text does.
+    """
+    rng = np.random.default_rng(seed)
+    data = get_training_data()
+    base_questions = data["questions"]
+    base_departments = data["departments"]
+    filler = [f"term{i}" for i in range(extra_vocabulary)]
+
+    questions = []
+    departments = []
+    for _ in range(n_samples):
+        i = int(rng.integers(len(base_questions)))
+        n_extra = int(rng.integers(2, 8))
+        ranks = np.minimum(rng.zipf(1.3, n_extra), extra_vocabulary) - 1
+        words = " ".join(filler[r] for r in ranks)
+        questions.append(f"{base_questions[i]} {words}")
+        departments.append(base_departments[i])
+    return questions, departments
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    """Summarize latency samples in milliseconds"""
+    values = np.asarray(samples_ms)
+    return {
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p99": round(float(np.percentile(values, 99)), 4)
+    }
@@ -0,0 +1,35 @@
+"""
+Benchmark - Distilled linear student vs. its teachers
+
+Trains the base models on a noisy synthetic corpus, distills the student
+from RandomForest, SVM and the ensemble (with extra unlabelled questions)
+and prints held-out accuracy retained and single-question latency.
+"""
+import sys
+from benchmarks.corpus import make_corpus
+from business.services.classification_service import DepartmentClassificationService
+
+
+def run(n_train: int):
+    questions, departments = make_corpus(n_train * 2 + 1000, seed=11)
+    for i in range(0, len(departments), 10):
+        departments[i] = departments[(i * 7 + 3) % len(departments)]
+    train_q, train_d = questions[:n_train], departments[:n_train]
+    unlabelled = questions[n_train:2 * n_train]
+    val_q, val_d = questions[2 * n_train:], departments[2 * n_train:]
+
+    service = DepartmentClassificationService()
+    service.train_models(train_q, train_d)
+    print(f"train={n_train} unlabelled={len(unlabelled)} validation={len(val_q)}")
+    for teacher in ("RandomForest", "SVM", "Ensemble"):
+        # Distils on the cached training corpus plus the unlabelled questions
+        result = service.distill_model(
+            teacher=teacher, unlabelled_questions=unlabelled,
+            validation_questions=val_q, validation_departments=val_d
+        )
+        print(f"  {teacher:12s} {result['validation']} "
+              f"fit={result['results']['training_time']}s")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
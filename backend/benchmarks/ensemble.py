@@ -0,0 +1,45 @@
+"""
+Benchmark - Ensemble scoring vs. one classify_question call per model
+
+Compares four separate single-model classifications (one vectorization and
+department mapping each) with one ensemble call on the shared feature
+matrix, for single questions and batches.
+"""
+import sys
+import time
+from benchmarks.corpus import make_corpus, percentiles
+from business.services.classification_service import (
+    ENSEMBLE_MODEL,
+    DepartmentClassificationService
+)
+
+MODELS = ["MultinomialNB", "SVM", "RandomForest", "LogisticRegression"]
+
+
+def run(n_train: int, batch_size: int, repeats: int = 200):
+    questions, departments = make_corpus(n_train)
+    service = DepartmentClassificationService()
+    service.train_models(questions, departments)
+
+    separate, ensemble = [], []
+    for i in range(repeats):
+        batch = questions[i * batch_size % n_train:][:batch_size]
+        start = time.perf_counter()
+        for question in batch:
+            for model_name in MODELS:
+                service.classify_question(question, model_name)
+        separate.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        service.classify_batch(batch, ENSEMBLE_MODEL)
+        ensemble.append((time.perf_counter() - start) * 1000)
+
+    print(f"train={n_train} batch={batch_size}")
+    print(f"  4 x classify_question  {percentiles(separate)} ms")
+    print(f"  ensemble               {percentiles(ensemble)} ms")
+
+
+if __name__ == "__main__":
+    n_train = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    for batch_size in (1, 32):
+        run(n_train, batch_size, repeats=200 if batch_size == 1 else 20)
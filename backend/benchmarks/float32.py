@@ -0,0 +1,92 @@
+"""
+Benchmark - Float32 vs. float64 feature pipeline
+
+Trains every department classifier once on float64 features, then fits a
+single-precision vectorizer on the same texts, as FLOAT32_FEATURES does,
+converts a copy of each model to single precision and compares
+predictions, probability drift, feature matrix and artifact size, and
+scoring latency for single questions and batches.
+"""
+import copy
+import io
+import sys
+import time
+import joblib
+import numpy as np
+from benchmarks.corpus import make_corpus, percentiles
+from infrastructure.ml.classifiers import TextVectorizer, create_classifier
+
+MODELS = ["MultinomialNB", "LogisticRegression", "SVM", "RandomForest"]
+
+
+def _matrix_bytes(X) -> int:
+    return int(X.data.nbytes + X.indices.nbytes + X.indptr.nbytes)
+
+
+def _artifact_bytes(obj) -> int:
+    buffer = io.BytesIO()
+    joblib.dump(obj, buffer)
+    return buffer.tell()
+
+
+def _latency(vectorizer, classifier, questions, batch_size: int, repeats: int):
+    samples = []
+    for i in range(repeats):
+        start_row = (i * batch_size) % (len(questions) - batch_size + 1)
+        batch = questions[start_row:start_row + batch_size]
+        start = time.perf_counter()
+        classifier.predict_proba(vectorizer.transform(batch))
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def run(n_train: int):
+    questions, departments = make_corpus(n_train + 2000)
+    train, test = questions[:n_train], questions[n_train:]
+
+    vectorizer64 = TextVectorizer()
+    X_train = vectorizer64.fit_transform(train)
+    vectorizer32 = TextVectorizer(dtype=np.float32)
+    vectorizer32.fit_transform(train)
+
+    X64 = vectorizer64.transform(test)
+    X32 = vectorizer32.transform(test)
+    print(f"train={n_train} features={vectorizer64.n_features}")
+    print(f"  X_test  float64={_matrix_bytes(X64) / 1e3:.0f}KB "
+          f"float32={_matrix_bytes(X32) / 1e3:.0f}KB "
+          f"max_diff={abs(X64 - X32.astype(np.float64)).max():.2e}")
+
+    for model_name in MODELS:
+        model64 = create_classifier(model_name)
+        model64.train(X_train, departments[:n_train])
+        model32 = copy.deepcopy(model64)
+        model32.to_float32()
+
+        proba64 = model64.predict_proba(X64)
+        proba32 = model32.predict_proba(X32)
+        same = np.mean(proba64.argmax(axis=1) == proba32.argmax(axis=1))
+        print(f"  {model_name}")
+        print(f"    labels identical={same:.4f} "
+              f"max_proba_diff={np.abs(proba64 - proba32).max():.2e}")
+        if model_name == "RandomForest":
+            # Large batches fall back to sklearn; check the compiled arrays too
+            compiled64 = model64.compiled.predict_proba(X64)
+            compiled32 = model32.compiled.predict_proba(X32)
+            print(f"    compiled labels identical="
+                  f"{np.mean(compiled64.argmax(axis=1) == compiled32.argmax(axis=1)):.4f} "
+                  f"max_proba_diff={np.abs(compiled64 - compiled32).max():.2e} "
+                  f"nodes float64={model64.compiled.nbytes / 1e3:.0f}KB "
+                  f"float32={model32.compiled.nbytes / 1e3:.0f}KB")
+        print(f"    artifact float64={_artifact_bytes(model64.model) / 1e3:.0f}KB "
+              f"float32={_artifact_bytes(model32.model) / 1e3:.0f}KB")
+        for batch_size, repeats in ((1, 500), (256, 20)):
+            print(f"    batch={batch_size} "
+                  f"float64={_latency(vectorizer64, model64, test, batch_size, repeats)} ms")
+            print(f"    batch={batch_size} "
+                  f"float32={_latency(vectorizer32, model32, test, batch_size, repeats)} ms")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,114 @@
+"""
+Benchmark - Hierarchical vs. flat classification over many leaf labels
+
+Builds a synthetic department/team/queue taxonomy with 100, 1k and 10k
+leaf queues and compares a flat MultinomialNB over all leaves with the
+hierarchical classifier (MultinomialNB and LogisticRegression node
+models): training time, parameter memory, single-question latency, top-1
+accuracy and top-5 recall.
+"""
+import sys
+import time
+import numpy as np
+from benchmarks.corpus import percentiles
+from infrastructure.ml.classifiers import TextVectorizer, create_classifier
+from infrastructure.ml.hierarchy import HierarchicalClassifier
+
+# departments, teams per department, queues per team
+SHAPES = {100: (5, 4, 5), 1000: (10, 10, 10), 10000: (10, 20, 50)}
+# Largest dense label matrix the flat baseline may allocate
+FLAT_LIMIT_GB = 1.0
+
+
+def make_taxonomy_corpus(n_leaves: int, samples_per_leaf: int, seed: int = 42):
+    """
+    Questions mentioning their department, team and queue plus noise
+
+    Team words are unique per department but queue words are reused by
+    every team, so a queue is only identified together with its team.
+    """
+    rng = np.random.default_rng(seed)
+    n_departments, n_teams, n_queues = SHAPES[n_leaves]
+    filler = [f"word{i}" for i in range(2000)]
+    questions, paths = [], []
+    for d in range(n_departments):
+        for t in range(n_teams):
+            for q in range(n_queues):
+                for _ in range(samples_per_leaf):
+                    words = [f"dept{d}", f"team{d}x{t}", f"queue{q}"]
+                    # Drop the department word now and then
+                    if rng.random() < 0.3:
+                        words = words[1:]
+                    words += [filler[i] for i in rng.integers(0, len(filler), 4)]
+                    rng.shuffle(words)
+                    questions.append(" ".join(words))
+                    paths.append(f"D{d}/T{d}-{t}/Q{d}-{t}-{q}")
+    return questions, paths
+
+
+def _latency(predict, X, repeats: int = 300):
+    samples = []
+    for i in range(repeats):
+        row = X[i % X.shape[0]]
+        start = time.perf_counter()
+        predict(row)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def _report(name, train_s, nbytes, latency, top_k, y_test):
+    top1 = np.mean([leaves[0] == y for leaves, y in zip(top_k, y_test)])
+    top5 = np.mean([y in leaves for leaves, y in zip(top_k, y_test)])
+    print(f"  {name:<26} train={train_s:7.2f}s params={nbytes / 1e6:7.1f}MB "
+          f"top1={top1:.3f} top5={top5:.3f} latency={latency} ms")
+
+
+def run(n_leaves: int):
+    questions, paths = make_taxonomy_corpus(n_leaves, samples_per_leaf=5)
+    test_questions, test_paths = make_taxonomy_corpus(n_leaves, samples_per_leaf=1, seed=7)
+    pick = np.random.default_rng(0).permutation(len(test_paths))[:1000]
+    test_questions = [test_questions[i] for i in pick]
+    test_paths = [test_paths[i] for i in pick]
+
+    vectorizer = TextVectorizer()
+    X = vectorizer.fit_transform(questions)
+    X_test = vectorizer.transform(test_questions)
+    print(f"leaves={n_leaves} samples={len(questions)} features={vectorizer.n_features}")
+
+    # MultinomialNB.fit binarizes the labels into a dense samples x classes
+    # float64 matrix
+    label_matrix_gb = len(paths) * n_leaves * 8 / 1e9
+    if label_matrix_gb > FLAT_LIMIT_GB:
+        print(f"  flat MultinomialNB         skipped: label matrix alone needs "
+              f"{label_matrix_gb:.1f}GB")
+    else:
+        start = time.perf_counter()
+        flat = create_classifier("MultinomialNB")
+        flat.train(X, paths)
+        train_s = time.perf_counter() - start
+        classes = flat.model.classes_
+
+        def flat_top_k(rows, k=5):
+            proba = flat.predict_proba(rows)
+            best = np.argsort(-proba, axis=1)[:, :k]
+            return [list(classes[row]) for row in best]
+
+        nbytes = flat.model.feature_log_prob_.nbytes + flat.model.feature_count_.nbytes
+        _report("flat MultinomialNB", train_s, nbytes, _latency(flat_top_k, X_test),
+                flat_top_k(X_test), test_paths)
+
+    for node_model in ("MultinomialNB", "LogisticRegression"):
+        hierarchy = HierarchicalClassifier(node_model=node_model)
+        result = hierarchy.fit(X, paths)
+
+        def hierarchy_top_k(rows, k=5):
+            return [[leaf for leaf, _ in leaves] for leaves in hierarchy.predict_top_k(rows, k=k)]
+
+        _report(f"hierarchical {node_model}", result["training_time"], hierarchy.nbytes,
+                _latency(hierarchy_top_k, X_test), hierarchy_top_k(X_test), test_paths)
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,45 @@
+"""
+Benchmark - Incremental vectorizer refits from cached term counts
+
+Times a cold fit of the corpus against refits after adding/removing a small
+fraction of samples, where only the changed samples go through the analyzer.
+"""
+import sys
+import time
+from sklearn.feature_extraction.text import TfidfVectorizer
+from benchmarks.corpus import make_corpus
+from infrastructure.ml.classifiers import TextVectorizer
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(n_samples: int, delta: float = 0.01):
+    questions, _ = make_corpus(n_samples + int(n_samples * delta), seed=7)
+    base = questions[:n_samples]
+    n_delta = int(n_samples * delta)
+    changed = base[n_delta:] + questions[n_samples:]
+
+    sklearn_vectorizer = TextVectorizer().vectorizer
+    _, sklearn_ms = _timed(lambda: TfidfVectorizer(**sklearn_vectorizer.get_params()).fit_transform(changed))
+
+    vectorizer = TextVectorizer()
+    _, cold_ms = _timed(lambda: vectorizer.fit_transform(base))
+    X, warm_ms = _timed(lambda: vectorizer.fit_transform(changed))
+
+    reference = TfidfVectorizer(**sklearn_vectorizer.get_params()).fit_transform(changed)
+    assert abs(X - reference).max() < 1e-12
+
+    print(f"corpus={n_samples} delta={n_delta} added/{n_delta} removed")
+    print(f"  sklearn fit_transform   {sklearn_ms:8.1f}ms")
+    print(f"  cold fit (empty cache)  {cold_ms:8.1f}ms")
+    print(f"  refit after delta       {warm_ms:8.1f}ms  {vectorizer.last_fit_stats}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,86 @@
+"""
+Benchmark - JSON rows vs. columnar payloads for the generic ML API
+
+Encodes the same numeric table as JSON list-of-dicts, CSV, .npy and .npz
+and measures payload size, the time to turn the request body into the
+feature matrix and target the models train on, and the end-to-end time
+of POST /ml/train/regression through the ASGI app.
+"""
+import io
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from api.routes.ml_routes import TrainingData
+from infrastructure.data.schema import TableSchema, columns_of_records
+from infrastructure.data.tabular import CSV, NPY, NPZ, read_training_table
+from main import app
+
+# JSON validation keeps a dict per row plus the decoded columns; above this many
+# rows it no longer fits the 6GB benchmark machine
+JSON_ROW_LIMIT = 300000
+
+
+def _encode(X: np.ndarray, y: np.ndarray):
+    names = [f"f{i}" for i in range(X.shape[1])]
+    frame = pd.DataFrame(X, columns=names).assign(target=y)
+    rows = frame.to_dict(orient="records") if len(X) <= JSON_ROW_LIMIT else []
+    payloads = {}
+    if len(X) <= JSON_ROW_LIMIT:
+        payloads["json"] = ("application/json", json.dumps({"data": rows}).encode())
+    del rows
+    payloads["csv"] = (CSV, frame.to_csv(index=False).encode())
+    buffer = io.BytesIO()
+    np.save(buffer, np.column_stack([X, y]))
+    payloads["npy"] = (NPY, buffer.getvalue())
+    buffer = io.BytesIO()
+    np.savez(buffer, X=X, y=y)
+    payloads["npz"] = (NPZ, buffer.getvalue())
+    return payloads
+
+
+def _decode_json(body: bytes):
+    """What the JSON route does before training"""
+    names, columns = columns_of_records(TrainingData.model_validate_json(body).data)
+    schema = TableSchema.infer(names, columns, one_hot=True, dtype="float64")
+    data = dict(zip(names, columns))
+    return schema.encode_columns(data), schema.target_values(data, numeric=True)
+
+
+def run(n_rows: int, n_features: int = 10):
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(n_rows, n_features))
+    y = X @ rng.normal(size=n_features) + rng.normal(scale=0.1, size=n_rows)
+    payloads = _encode(X, y)
+    print(f"rows={n_rows} features={n_features}")
+    if "json" not in payloads:
+        print(f"  json  skipped: more than {JSON_ROW_LIMIT} rows runs out of memory")
+
+    with TestClient(app) as client:
+        for name, (media_type, body) in payloads.items():
+            start = time.perf_counter()
+            if name == "json":
+                X_decoded, _ = _decode_json(body)
+            else:
+                X_decoded, _ = read_training_table(body, media_type)
+            decode_s = time.perf_counter() - start
+            assert np.allclose(X_decoded.astype(float), X)
+            del X_decoded
+
+            start = time.perf_counter()
+            response = client.post(
+                "/api/v1/ml/train/regression", content=body,
+                headers={"content-type": media_type}
+            )
+            request_s = time.perf_counter() - start
+            assert response.status_code == 200, response.text
+            print(f"  {name:<5} size={len(body) / 1e6:8.1f}MB decode={decode_s:7.3f}s "
+                  f"train request={request_s:7.3f}s")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+    for size in sizes:
+        run(size)
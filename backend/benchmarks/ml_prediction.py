@@ -0,0 +1,128 @@
+"""
+Benchmark - Per-row, batch and streaming prediction for the generic ML API
+
+Trains the generic classification and regression models once, then
+reports rows/sec through the ASGI app for one JSON request per row, JSON
+and .npy batches, and NDJSON/CSV bodies streamed to /predict/*/stream.
+Also measures the peak memory of the streaming pipeline itself for a
+growing number of rows, which should stay flat.
+"""
+import asyncio
+import io
+import json
+import sys
+import time
+import tracemalloc
+import numpy as np
+from fastapi.testclient import TestClient
+from api.dependencies import ml_service
+from common.config import settings
+from infrastructure.data.tabular import CSV, NDJSON, NPY, iter_feature_chunks
+from main import app
+
+N_FEATURES = 10
+PER_ROW_REQUESTS = 1000
+BATCH_ROWS = 10000
+
+
+def _rows(n_rows: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(n_rows, N_FEATURES))
+
+
+def _ndjson_chunks(X: np.ndarray, rows_per_chunk: int = 1000):
+    for start in range(0, len(X), rows_per_chunk):
+        yield "".join(
+            json.dumps(row) + "\n" for row in X[start:start + rows_per_chunk].tolist()
+        ).encode()
+
+
+def _csv_chunks(X: np.ndarray, rows_per_chunk: int = 1000):
+    yield (",".join(f"f{i}" for i in range(N_FEATURES)) + "\n").encode()
+    for start in range(0, len(X), rows_per_chunk):
+        buffer = io.StringIO()
+        np.savetxt(buffer, X[start:start + rows_per_chunk], delimiter=",", fmt="%.6f")
+        yield buffer.getvalue().encode()
+
+
+def _rate(n_rows: int, seconds: float) -> str:
+    return f"{n_rows / seconds:12,.0f} rows/s"
+
+
+def _train(client: TestClient):
+    X = _rows(20000, seed=1)
+    for kind, y in (("classification", (X[:, 0] > 0).astype(int)),
+                    ("regression", X @ np.arange(N_FEATURES))):
+        buffer = io.BytesIO()
+        np.save(buffer, np.column_stack([X, y]))
+        response = client.post(f"/api/v1/ml/train/{kind}", content=buffer.getvalue(),
+                               headers={"content-type": NPY})
+        assert response.status_code == 200, response.text
+
+
+def run(kind: str, stream_rows: int):
+    with TestClient(app) as client:
+        _train(client)
+        X = _rows(max(stream_rows, BATCH_ROWS))
+        print(f"{kind} (stream chunk={settings.ml_stream_chunk_rows} rows)")
+
+        start = time.perf_counter()
+        for row in X[:PER_ROW_REQUESTS].tolist():
+            client.post(f"/api/v1/ml/predict/{kind}", json={"features": row})
+        print(f"  per-row json    {_rate(PER_ROW_REQUESTS, time.perf_counter() - start)}")
+
+        start = time.perf_counter()
+        response = client.post(f"/api/v1/ml/predict/{kind}/batch",
+                               json={"features": X[:BATCH_ROWS].tolist()})
+        assert len(response.json()["data"]["predictions"]) == BATCH_ROWS
+        print(f"  batch json      {_rate(BATCH_ROWS, time.perf_counter() - start)}")
+
+        buffer = io.BytesIO()
+        np.save(buffer, X[:BATCH_ROWS])
+        start = time.perf_counter()
+        response = client.post(f"/api/v1/ml/predict/{kind}", content=buffer.getvalue(),
+                               headers={"content-type": NPY})
+        assert len(response.json()["data"]["predictions"]) == BATCH_ROWS
+        print(f"  batch npy       {_rate(BATCH_ROWS, time.perf_counter() - start)}")
+
+        for name, media_type, chunks in (("ndjson", NDJSON, _ndjson_chunks),
+                                         ("csv", CSV, _csv_chunks)):
+            start = time.perf_counter()
+            lines = 0
+            with client.stream("POST", f"/api/v1/ml/predict/{kind}/stream",
+                               content=chunks(X[:stream_rows]),
+                               headers={"content-type": media_type}) as response:
+                for _ in response.iter_lines():
+                    lines += 1
+            assert lines == stream_rows, lines
+            print(f"  stream {name:<8} {_rate(stream_rows, time.perf_counter() - start)}"
+                  f"  ({stream_rows} rows)")
+
+
+async def _drain(stream):
+    async for _ in stream:
+        pass
+
+
+def stream_memory():
+    """Peak traced memory of decode + predict over NDJSON bodies of growing size"""
+    print("streaming pipeline peak memory (regression, NDJSON)")
+    for n_rows in (10000, 100000, 300000):
+        X = _rows(n_rows)
+
+        async def body():
+            for chunk in _ndjson_chunks(X):
+                yield chunk
+
+        tracemalloc.start()
+        batches = iter_feature_chunks(body(), NDJSON, settings.ml_stream_chunk_rows)
+        asyncio.run(_drain(ml_service.stream_predictions("regression", batches)))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  rows={n_rows:>7}  peak={peak / 1e6:6.1f}MB")
+
+
+if __name__ == "__main__":
+    stream_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for kind in ("regression", "classification"):
+        run(kind, stream_rows)
+    stream_memory()
@@ -0,0 +1,56 @@
+"""
+Benchmark - Multi-tenant model registry under a memory budget
+
+Trains one bundle, copies it to many tenants and replays a skewed
+(Zipf-like) tenant access pattern against registries whose budget holds
+a varying share of the tenants. Reports hit ratio, evictions and the
+latency of hits and of on-demand loads.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+from benchmarks.corpus import make_corpus, percentiles
+from business.services.classification_service import DepartmentClassificationService
+from business.services.model_registry import TenantModelRegistry
+
+
+def run(n_tenants: int, n_requests: int = 2000):
+    questions, departments = make_corpus(2000)
+    with tempfile.TemporaryDirectory() as root:
+        service = DepartmentClassificationService()
+        service.train_models(questions, departments)
+        service.save_models(os.path.join(root, "tenant-0"))
+        for i in range(1, n_tenants):
+            shutil.copytree(os.path.join(root, "tenant-0"), os.path.join(root, f"tenant-{i}"))
+        bundle_bytes = TenantModelRegistry._directory_size(os.path.join(root, "tenant-0"))
+        print(f"tenants={n_tenants} bundle={bundle_bytes / 1e6:.1f}MB requests={n_requests}")
+
+        rng = np.random.default_rng(42)
+        popularity = 1.0 / np.arange(1, n_tenants + 1)
+        tenants = rng.choice(n_tenants, size=n_requests, p=popularity / popularity.sum())
+
+        for share in (0.1, 0.25, 0.5, 1.0):
+            resident = max(1, int(n_tenants * share))
+            registry = TenantModelRegistry(root, memory_budget_bytes=resident * bundle_bytes)
+            hit_ms = []
+            for tenant in tenants:
+                misses = registry.misses
+                start = time.perf_counter()
+                registry.get(f"tenant-{tenant}").classify_question(questions[0], "LogisticRegression")
+                elapsed = (time.perf_counter() - start) * 1000
+                if registry.misses == misses:
+                    hit_ms.append(elapsed)
+            metrics = registry.get_metrics()
+            print(f"  budget={resident} bundles hit_ratio={metrics['hit_ratio']} "
+                  f"evictions={metrics['evictions']}")
+            print(f"    hit+classify={percentiles(hit_ms)} ms")
+            print(f"    load={metrics['load_latency_ms']} ms")
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [20]
+    for count in counts:
+        run(count)
@@ -0,0 +1,103 @@
+"""
+Benchmark - Warm restore of the generic ML models
+
+Trains a forest and a linear regression once, saves them to a temporary
+ModelStore and compares, per worker start:
+
+- cold start: retraining from the table
+- restore: ModelStore.load with the compiled forest memory-mapped, and
+  with its arrays read into memory
+- the resident memory each adds, and the latency of the first small and
+  large prediction after restore (the large one loads the sklearn forest)
+"""
+import gc
+import sys
+import tempfile
+import time
+import numpy as np
+from benchmarks.corpus import percentiles
+from infrastructure.data.schema import TableSchema
+from infrastructure.ml.base_models import ClassificationModel, RegressionModel
+from infrastructure.ml.model_store import ModelStore
+
+N_FEATURES = 40
+SMALL_BATCH = 1
+LARGE_BATCH = 5000
+REPEATS = 5
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def _table(n_rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, N_FEATURES)).astype(np.float32)
+    y = (X[:, 0] + X[:, 1] * X[:, 2] > 0).astype(int) + (X[:, 3] > 1)
+    return X, y
+
+
+def _saved(store: ModelStore, name: str, model, n_rows: int) -> str:
+    model.schema = TableSchema.numeric(N_FEATURES, "float32")
+    return store.save(name, model, {
+        "data_shape": [n_rows, N_FEATURES],
+        "schema_hash": model.schema.fingerprint()
+    })
+
+
+def restore(n_rows: int):
+    X, y = _table(n_rows)
+    print(f"rows={n_rows} features={N_FEATURES}")
+    start = time.perf_counter()
+    forest = ClassificationModel()
+    forest.train(X, y)
+    print(f"  cold start (train forest)  {time.perf_counter() - start:8.3f}s")
+    start = time.perf_counter()
+    regression = RegressionModel()
+    regression.train(X.astype(np.float64), y.astype(np.float64))
+    print(f"  cold start (train linear)  {time.perf_counter() - start:8.3f}s")
+
+    with tempfile.TemporaryDirectory() as root:
+        store = ModelStore(root)
+        _saved(store, "classification", forest, n_rows)
+        _saved(store, "regression", regression, n_rows)
+        expected = forest.predict(X[:LARGE_BATCH])
+        del forest, regression
+        gc.collect()
+
+        for name, factory in (("classification", ClassificationModel),
+                              ("regression", RegressionModel)):
+            for mmap in (True, False):
+                samples = []
+                for _ in range(REPEATS):
+                    start = time.perf_counter()
+                    store.load(name, factory, mmap=mmap)
+                    samples.append((time.perf_counter() - start) * 1000)
+                stats = percentiles(samples)
+                print(f"  restore {name:<14} mmap={mmap!s:<5} p50={stats['p50']:9.2f}ms")
+
+        for mmap in (True, False):
+            gc.collect()
+            before = _rss_mb()
+            model, _ = store.load("classification", ClassificationModel, mmap=mmap)
+            after_load = _rss_mb()
+            timings = []
+            for size in (SMALL_BATCH, LARGE_BATCH):
+                start = time.perf_counter()
+                predicted = model.predict(X[:size])
+                timings.append((time.perf_counter() - start) * 1000)
+                assert np.array_equal(predicted, expected[:size])
+            print(f"  forest mmap={mmap!s:<5} rss +{after_load - before:7.1f}MB after load, "
+                  f"+{_rss_mb() - before:7.1f}MB after predict; first predict "
+                  f"{SMALL_BATCH} row {timings[0]:7.2f}ms, {LARGE_BATCH} rows {timings[1]:8.2f}ms")
+            del model
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [20000]
+    for size in sizes:
+        restore(size)
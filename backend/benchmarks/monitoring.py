@@ -0,0 +1,83 @@
+"""
+Benchmark - per-request cost of drift monitoring
+
+Measures DriftMonitor.observe on its own, and
+DepartmentClassificationService.classify_question (MultinomialNB) with the
+monitor on and off, after training on the synthetic corpus. The token
+counts the monitor needs come out of the vectorization the question goes
+through anyway, so the difference between the two runs is the whole
+monitoring overhead. Also reports how long a report over the full ring of
+buckets takes to build.
+"""
+import sys
+import time
+import numpy as np
+from benchmarks.corpus import make_corpus, percentiles
+from business.services.classification_service import DepartmentClassificationService
+from infrastructure.ml.monitoring import DriftMonitor
+
+ROUNDS = 5
+
+
+def _observe_us(n_calls: int) -> float:
+    monitor = DriftMonitor(windows=(300, 3600), bucket_seconds=60)
+    departments = ["HR", "Finance", "IT", "Production", "Sales"]
+    rng = np.random.default_rng(0)
+    calls = [
+        (departments[i % 5], float(c), int(t), int(t * 0.1))
+        for i, (c, t) in enumerate(zip(rng.uniform(0.2, 1.0, 1000), rng.integers(1, 40, 1000)))
+    ]
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for i in range(n_calls):
+            department, confidence, tokens, unknown = calls[i % 1000]
+            monitor.observe("MultinomialNB", department, confidence, tokens, unknown)
+        best = min(best, (time.perf_counter() - start) / n_calls * 1e6)
+    return best
+
+
+def _classify_us(service: DepartmentClassificationService, questions):
+    # Alternate on and off per question so both see the same conditions
+    samples = {False: [], True: []}
+    for i, question in enumerate(questions):
+        for enabled in ((False, True) if i % 2 else (True, False)):
+            service.state.monitor.enabled = enabled
+            start = time.perf_counter()
+            service.classify_question(question, "MultinomialNB")
+            samples[enabled].append((time.perf_counter() - start) * 1000)
+    return {enabled: percentiles(values) for enabled, values in samples.items()}
+
+
+def _report_ms(service: DepartmentClassificationService) -> float:
+    # Fill every bucket of the ring as if an hour of traffic had passed
+    monitor = service.state.monitor
+    bucket = next(b for b in monitor._buckets if b is not None)
+    for slot in range(len(monitor._buckets)):
+        copy = bucket.copy()
+        copy.id = bucket.id - slot
+        monitor._buckets[copy.id % len(monitor._buckets)] = copy
+    start = time.perf_counter()
+    for _ in range(20):
+        monitor.get_report()
+    return (time.perf_counter() - start) / 20 * 1000
+
+
+def run(n_requests: int):
+    print(f"observe(): {_observe_us(200000):.2f}us per call")
+    questions, departments = make_corpus(20000, seed=1)
+    service = DepartmentClassificationService()
+    service.train_models(questions, departments)
+    live, _ = make_corpus(n_requests, seed=7)
+    _classify_us(service, live[:500])
+    print(f"classify_question, MultinomialNB, {n_requests} questions")
+    for enabled, stats in _classify_us(service, live).items():
+        label = "monitoring on" if enabled else "monitoring off"
+        print(f"  {label:<16} mean={stats['mean'] * 1000:7.1f}us "
+              f"p50={stats['p50'] * 1000:7.1f}us p99={stats['p99'] * 1000:7.1f}us")
+    print(f"get_report() over {len(service.state.monitor._buckets)} buckets: {_report_ms(service):.2f}ms")
+
+
+if __name__ == "__main__":
+    for size in [int(arg) for arg in sys.argv[1:]] or [5000]:
+        run(size)
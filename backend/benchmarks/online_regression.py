@@ -0,0 +1,84 @@
+"""
+Benchmark - Exact online least squares vs. refitting LinearRegression
+
+Feeds a regression stream in chunks and publishes a model after every
+chunk, either by refitting LinearRegression on all rows seen so far or by
+updating the least-squares sufficient statistics. Reports publish latency,
+total time, retained memory and the largest coefficient difference, then
+checks that statistics merged from several workers give the same fit and
+that forgetting tracks a drifting target.
+"""
+import sys
+import time
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from infrastructure.ml.base_models import RegressionModel
+from infrastructure.ml.least_squares import LeastSquaresStatistics
+
+
+def _stream(n_rows: int, n_features: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    # Offset features stress the numerics of raw X^T X sums
+    X = rng.normal(loc=100.0, size=(n_rows, n_features))
+    y = X @ rng.normal(size=n_features) + 3.0 + rng.normal(scale=0.5, size=n_rows)
+    return X, y
+
+
+def run(n_rows: int, n_features: int = 50, chunk_rows: int = 10000):
+    X, y = _stream(n_rows, n_features)
+    n_chunks = n_rows // chunk_rows
+    print(f"rows={n_rows} features={n_features} chunks={n_chunks}x{chunk_rows}")
+
+    refit_ms, online_ms = [], []
+    online = RegressionModel()
+    max_diff = 0.0
+    for i in range(1, n_chunks + 1):
+        rows = slice((i - 1) * chunk_rows, i * chunk_rows)
+
+        start = time.perf_counter()
+        online, _ = online.partial_fit(X[rows], y[rows])
+        online_ms.append((time.perf_counter() - start) * 1000)
+
+        # The refit baseline must keep every row
+        start = time.perf_counter()
+        full = LinearRegression().fit(X[:i * chunk_rows], y[:i * chunk_rows])
+        refit_ms.append((time.perf_counter() - start) * 1000)
+
+        max_diff = max(max_diff, float(np.abs(full.coef_ - online.model.coef_).max()))
+
+    print(f"  refit   last publish={refit_ms[-1]:8.1f}ms total={sum(refit_ms) / 1000:7.2f}s "
+          f"retained={X.nbytes / 1e6:7.1f}MB")
+    statistics_bytes = sum(a.nbytes for a in online.statistics.to_arrays().values())
+    print(f"  online  last publish={online_ms[-1]:8.1f}ms total={sum(online_ms) / 1000:7.2f}s "
+          f"retained={statistics_bytes / 1e6:7.3f}MB")
+    print(f"  max |coef difference| = {max_diff:.2e}")
+
+    # Four workers accumulate disjoint shards, then merge
+    merged = LeastSquaresStatistics(n_features)
+    for shard in np.array_split(np.arange(n_rows), 4):
+        merged.merge(LeastSquaresStatistics.from_data(X[shard], y[shard]))
+    coef, _ = merged.solve()
+    print(f"  merged 4 workers vs online: max |coef difference| = "
+          f"{np.abs(coef - online.model.coef_).max():.2e}")
+
+
+def drift(n_features: int = 10, chunk_rows: int = 2000, n_chunks: int = 50):
+    """Coefficient error after the true weights switch halfway through"""
+    rng = np.random.default_rng(0)
+    before, after = rng.normal(size=n_features), rng.normal(size=n_features)
+    models = {forgetting: RegressionModel() for forgetting in (1.0, 0.9, 0.5)}
+    for i in range(n_chunks):
+        X = rng.normal(size=(chunk_rows, n_features))
+        y = X @ (before if i < n_chunks // 2 else after)
+        for forgetting, model in models.items():
+            models[forgetting], _ = model.partial_fit(X, y, forgetting)
+    print("drift: coefficient error 25 chunks after the switch")
+    for forgetting, model in models.items():
+        print(f"  forgetting={forgetting:<4} error={np.abs(model.model.coef_ - after).max():.4f}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [200000, 1000000]
+    for size in sizes:
+        run(size)
+    drift()
@@ -0,0 +1,121 @@
+"""
+Benchmark - Out-of-core vs. in-memory training of the generic classifier
+
+Writes synthetic classification tables of growing size as .npy files and
+trains the generic ClassificationModel on each, in a fresh process per
+run with its peak RSS measured from the start of training (Linux):
+
+- in-memory: the whole table loaded, train_test_split, one forest fit
+- forest: trees added per chunk with warm_start, streamed hold-out
+- sgd: logistic SGD with partial_fit per chunk, streamed hold-out
+
+Reports peak RSS, the growth over the process baseline, training time,
+held-out accuracy and the size of the fitted model.
+"""
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import joblib
+import numpy as np
+
+N_FEATURES = 20
+CHUNK_ROWS = 100000
+# Trees per 100k-row chunk; the in-memory forest gets the same total
+TREES_PER_CHUNK = 2
+IN_MEMORY_LIMIT = 1000000
+
+
+def _write_table(path: str, n_rows: int, seed: int = 42):
+    """Write the table in slices so the parent never holds all of it"""
+    rng = np.random.default_rng(seed)
+    weights = rng.normal(size=N_FEATURES)
+    table = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64,
+                                      shape=(n_rows, N_FEATURES + 1))
+    for start in range(0, n_rows, CHUNK_ROWS):
+        stop = min(start + CHUNK_ROWS, n_rows)
+        X = rng.normal(size=(stop - start, N_FEATURES))
+        score = X @ weights + 0.5 * X[:, 0] * X[:, 1]
+        table[start:stop, :-1] = X
+        table[start:stop, -1] = np.digitize(score, [-2.0, 0.0, 2.0])
+    table.flush()
+    del table
+
+
+def _reset_peak_rss():
+    """Restart the high-water mark (ru_maxrss is inherited from the parent)"""
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def _rss_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(method: str, path: str):
+    from infrastructure.data.tabular import iter_file_chunks
+    from infrastructure.ml.base_models import ClassificationModel
+
+    _reset_peak_rss()
+    baseline_mb = _rss_mb("VmRSS")
+    n_rows = np.load(path, mmap_mode="r").shape[0]
+    n_chunks = -(-n_rows // CHUNK_ROWS)
+    start = time.perf_counter()
+    if method == "in-memory":
+        model = ClassificationModel(n_estimators=TREES_PER_CHUNK * n_chunks)
+        table = np.load(path)
+        result = model.train(table[:, :-1], table[:, -1])
+        del table
+    else:
+        model = ClassificationModel()
+        result = model.train_out_of_core(
+            lambda: iter_file_chunks([path], CHUNK_ROWS), method,
+            trees_per_chunk=TREES_PER_CHUNK, epochs=1
+        )
+    elapsed = time.perf_counter() - start
+    buffer = io.BytesIO()
+    joblib.dump(model.model, buffer)
+    print(json.dumps({
+        "peak_mb": _rss_mb("VmHWM"),
+        "baseline_mb": baseline_mb,
+        "seconds": elapsed,
+        "accuracy": result["accuracy"],
+        "model_mb": buffer.tell() / 1e6
+    }))
+
+
+def run(n_rows: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "table.npy")
+        _write_table(path, n_rows)
+        print(f"rows={n_rows} features={N_FEATURES} table={os.path.getsize(path) / 1e6:.0f}MB")
+        for method in ("in-memory", "forest", "sgd"):
+            if method == "in-memory" and n_rows > IN_MEMORY_LIMIT:
+                print(f"  {method:<10} skipped above {IN_MEMORY_LIMIT} rows")
+                continue
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.out_of_core_training", "--child", method, path],
+                capture_output=True, text=True, check=True
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            print(f"  {method:<10} peak={stats['peak_mb']:7.0f}MB "
+                  f"(+{stats['peak_mb'] - stats['baseline_mb']:6.0f}MB) "
+                  f"time={stats['seconds']:7.1f}s accuracy={stats['accuracy']:.3f} "
+                  f"model={stats['model_mb']:7.1f}MB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        _child(sys.argv[2], sys.argv[3])
+    else:
+        sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 300000, 1000000, 3000000]
+        for size in sizes:
+            run(size)
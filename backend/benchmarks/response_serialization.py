@@ -0,0 +1,111 @@
+"""
+Benchmark - response serialization paths
+
+Encodes the same service results the way FastAPI does for a returned
+response model or dict (build the pydantic model, validate it against the
+response field, serialize and JSONResponse) and through the fast path
+(FastJSONResponse, MsgPackResponse). Payloads:
+
+- small: one /classify-question result, MultinomialNB and Ensemble
+- large: a /classify-batch result and an /ml/predict/*/batch result
+
+Reports microseconds per response and body size, next to the time the
+model took to produce the result.
+"""
+import asyncio
+import sys
+import time
+import numpy as np
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from typing import Any, Dict
+from api.dependencies import ml_service
+from api.models.classification_models import (
+    BatchClassificationResponse, ClassificationResponse
+)
+from api.responses import FastJSONResponse, MsgPackResponse
+from api.routes.classification_routes import _response_fields
+from benchmarks.corpus import make_corpus
+from business.services.classification_service import classification_service
+from infrastructure.data.encoding import msgpack_available, orjson
+
+REPEATS_SMALL = 2000
+REPEATS_LARGE = 20
+
+
+async def _fastapi(field, content) -> bytes:
+    """What FastAPI does with a value returned from a route with a response model"""
+    serialized = await serialize_response(field=field, response_content=content)
+    return JSONResponse(serialized).body
+
+
+async def _time(encode, repeats: int):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        body = encode()
+        if asyncio.iscoroutine(body):
+            body = await body
+    return (time.perf_counter() - start) / repeats * 1e6, len(body)
+
+
+async def compare(label: str, model_us: float, repeats: int, response_model, build, content):
+    """``build`` turns ``content`` into the response model, as the routes used to"""
+    field = create_response_field(name="response", type_=response_model, mode="serialization")
+    paths = {
+        "pydantic + FastAPI JSON": lambda: _fastapi(field, build(content)),
+        "fast JSON": lambda: FastJSONResponse(content).body
+    }
+    if msgpack_available():
+        paths["MessagePack"] = lambda: MsgPackResponse(content).body
+    print(f"{label} (model {model_us:,.0f}us)")
+    for name, encode in paths.items():
+        micros, size = await _time(encode, repeats)
+        print(f"  {name:<24} {micros:10,.1f}us  {size:>10,} bytes  "
+              f"{micros / model_us:6.1%} of model time")
+
+
+async def run(n_batch: int):
+    questions, departments = make_corpus(5000, seed=3)
+    classification_service.train_models(questions, departments)
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json'}; "
+          f"MessagePack {'available' if msgpack_available() else 'not installed'}")
+
+    for model in ("MultinomialNB", "Ensemble"):
+        start = time.perf_counter()
+        for question in questions[:200]:
+            result = classification_service.classify_question(question, model)
+        model_us = (time.perf_counter() - start) / 200 * 1e6
+        await compare(
+            f"classify-question, {model}", model_us, REPEATS_SMALL, ClassificationResponse,
+            lambda fields: ClassificationResponse(**fields), _response_fields(result)
+        )
+
+    start = time.perf_counter()
+    results = classification_service.classify_batch(questions[:n_batch], "MultinomialNB")
+    model_us = (time.perf_counter() - start) * 1e6
+    await compare(
+        f"classify-batch, {n_batch} questions", model_us, REPEATS_LARGE,
+        BatchClassificationResponse,
+        lambda fields: BatchClassificationResponse(
+            results=[ClassificationResponse(**result) for result in fields["results"]]
+        ),
+        {"results": [_response_fields(result) for result in results]}
+    )
+
+    rows = n_batch * 100
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, 10))
+    ml_service.train_regression_arrays(X, X @ rng.normal(size=10))
+    start = time.perf_counter()
+    content = ml_service.predict_regression_batch(X)
+    model_us = (time.perf_counter() - start) * 1e6
+    await compare(
+        f"ml predict/regression batch, {rows} rows", model_us, REPEATS_LARGE,
+        Dict[str, Any], lambda fields: fields, content
+    )
+
+
+if __name__ == "__main__":
+    for size in [int(arg) for arg in sys.argv[1:]] or [1000]:
+        asyncio.run(run(size))
@@ -0,0 +1,82 @@
+"""
+Benchmark - cost of shadow evaluation on the primary request path
+
+Sends /classify-question requests from concurrent clients through the
+ASGI app while a candidate bundle (trained on another sample of the
+corpus) shadows the traffic at several sample rates and queue sizes, and
+without a candidate. Reports primary latency and throughput, and how many
+mirrored questions the candidate evaluated or dropped.
+"""
+import asyncio
+import sys
+import tempfile
+import time
+import httpx
+from benchmarks.corpus import make_corpus, percentiles
+from business.services.classification_service import classification_service
+from business.services.shadow_evaluator import shadow_evaluator
+from common.config import settings
+from main import app
+
+CLIENTS = 8
+# (sample rate, queue size); None runs without a candidate
+SETTINGS = [None, (0.1, 256), (1.0, 256), (1.0, 8)]
+
+
+async def _load(client: httpx.AsyncClient, questions):
+    queued = list(reversed(questions))
+    samples = []
+
+    async def worker():
+        while queued:
+            question = queued.pop()
+            start = time.perf_counter()
+            response = await client.post("/api/v1/classify-question", json={"question": question})
+            assert response.status_code == 200, response.text
+            samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(CLIENTS)])
+    return samples, time.perf_counter() - start
+
+
+async def run(n_requests: int, candidate: str):
+    questions, _ = make_corpus(n_requests, seed=5)
+    print(f"{n_requests} requests from {CLIENTS} clients, MultinomialNB")
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+        for setting in SETTINGS:
+            if setting is None:
+                shadow_evaluator.stop()
+                label = "no shadow"
+            else:
+                sample_rate, queue_size = setting
+                shadow_evaluator._queue.maxsize = queue_size
+                shadow_evaluator.load_candidate(candidate, sample_rate=sample_rate)
+                label = f"shadow {sample_rate:.0%}, queue {queue_size}"
+            samples, seconds = await _load(client, questions)
+            stats = percentiles(samples)
+            line = (f"  {label:<24} {n_requests / seconds:7.0f} req/s  "
+                    f"p50={stats['p50']:6.2f}ms p99={stats['p99']:7.2f}ms")
+            if setting is not None:
+                # Let the worker finish what is queued before reading the counts
+                while shadow_evaluator.get_metrics()["queue_depth"]:
+                    await asyncio.sleep(0.05)
+                await asyncio.sleep(0.1)
+                metrics = shadow_evaluator.stop()
+                line += (f"  mirrored={metrics['mirrored']} dropped={metrics['dropped']} "
+                         f"evaluated={metrics['evaluated']} agreement={metrics['agreement_rate']} "
+                         f"candidate p99={metrics['candidate_latency_ms']['p99']:.2f}ms")
+            print(line)
+
+
+if __name__ == "__main__":
+    settings.single_flight_classification = False
+    questions, departments = make_corpus(20000, seed=1)
+    classification_service.train_models(questions, departments)
+    with tempfile.TemporaryDirectory() as candidates:
+        shadow_evaluator.root_dir = candidates
+        questions, departments = make_corpus(20000, seed=2)
+        shadow_evaluator.train_candidate("candidate", questions, departments)
+        shadow_evaluator.stop()
+        for size in [int(arg) for arg in sys.argv[1:]] or [2000]:
+            asyncio.run(run(size, "candidate"))
@@ -0,0 +1,77 @@
+"""
+Benchmark - Similar-question retrieval over 100k and 1M indexed questions
+
+Indexes a synthetic corpus with the inverted index and compares top-k
+query latency of MaxScore-pruned search against scoring every posting of
+the query terms and against a brute-force sparse matrix-vector product.
+Also checks that pruned results equal the exhaustive ones and reports
+index size and load time with and without memory-mapping.
+"""
+import sys
+import tempfile
+import time
+import numpy as np
+from benchmarks.corpus import make_corpus, percentiles
+from infrastructure.ml.classifiers import TextVectorizer
+from infrastructure.ml.retrieval import InvertedIndex
+
+
+def _brute_force(X, query, k):
+    scores = (X @ query.T).toarray().ravel()
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])], None
+
+
+def _latency(search, queries, k):
+    samples = []
+    for row in range(queries.shape[0]):
+        query = queries[row]
+        start = time.perf_counter()
+        search(query, k)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def run(n_docs: int, n_queries: int = 200, k: int = 10):
+    questions, departments = make_corpus(n_docs)
+    vectorizer = TextVectorizer(np.float32)
+    start = time.perf_counter()
+    X = vectorizer.fit_transform(questions)
+    vectorize_s = time.perf_counter() - start
+    start = time.perf_counter()
+    index = InvertedIndex.build(X, questions, departments)
+    build_s = time.perf_counter() - start
+    print(f"docs={n_docs} features={X.shape[1]} nnz={X.nnz} "
+          f"vectorize={vectorize_s:.1f}s build={build_s:.1f}s index={index.nbytes / 1e6:.1f}MB")
+
+    query_questions, _ = make_corpus(n_queries, seed=7)
+    queries = vectorizer.transform(query_questions)
+
+    # Pruning must not change the result set
+    mismatches = 0
+    for row in range(queries.shape[0]):
+        pruned, pruned_scores = index.search(queries[row], k)
+        exact, exact_scores = index.search_exhaustive(queries[row], k)
+        if not np.allclose(np.sort(pruned_scores), np.sort(exact_scores), atol=1e-5):
+            mismatches += 1
+    print(f"  top-{k} score mismatches vs exhaustive: {mismatches}/{n_queries}")
+
+    print(f"  maxscore     {_latency(index.search, queries, k)} ms")
+    print(f"  exhaustive   {_latency(index.search_exhaustive, queries, k)} ms")
+    print(f"  brute force  {_latency(lambda q, k: _brute_force(X, q, k), queries, k)} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        index.save(directory + "/index")
+        for mmap in (False, True):
+            start = time.perf_counter()
+            loaded = InvertedIndex.load(directory + "/index", mmap=mmap)
+            load_ms = (time.perf_counter() - start) * 1000
+            latency = _latency(loaded.search, queries, k)
+            print(f"  load mmap={mmap!s:<5} {load_ms:8.1f} ms  first-pass search {latency} ms")
+            del loaded
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,67 @@
+"""
+Benchmark - Single-flight coalescing of identical classifications
+
+Fires bursts of concurrent POST /classify-question requests through the
+ASGI app, as during an incident when many users submit the same question,
+with SINGLE_FLIGHT_CLASSIFICATION on and off. The bursts mix a few
+distinct questions, each sent many times with varying case and spacing.
+The costly path (ensemble plus similar questions, on models trained on a
+large corpus) is measured. Latency is counted from the start of the burst,
+since requests computed on the event loop only start their own clock when
+their turn comes.
+"""
+import asyncio
+import sys
+import time
+import httpx
+from benchmarks.corpus import make_corpus, percentiles
+from business.services.classification_service import (
+    classification_service,
+    classification_flights
+)
+from common.config import settings
+from main import app
+
+BURST_QUESTIONS = ["VPN is down", "I cannot log in to my email", "Where is my payslip"]
+
+
+def _burst(size: int):
+    variants = [str.lower, str.upper, lambda q: f"  {q} "]
+    n = len(BURST_QUESTIONS)
+    return [variants[i // n % len(variants)](BURST_QUESTIONS[i % n]) for i in range(size)]
+
+
+async def _fire(client: httpx.AsyncClient, questions):
+    """Completion time of each request since the burst started, and the total"""
+    async def one(question):
+        response = await client.post("/api/v1/classify-question", json={
+            "question": question, "model": "Ensemble", "similar_questions": 5
+        })
+        assert response.status_code == 200, response.text
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    samples = await asyncio.gather(*[one(question) for question in questions])
+    return samples, time.perf_counter() - start
+
+
+async def burst(size: int):
+    print(f"burst of {size} concurrent requests over {len(BURST_QUESTIONS)} questions")
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for enabled in (False, True):
+            settings.single_flight_classification = enabled
+            before = classification_flights.get_metrics()
+            samples, seconds = await _fire(client, _burst(size))
+            after = classification_flights.get_metrics()
+            stats = percentiles(samples)
+            computations = after["executions"] - before["executions"] if enabled else size
+            print(f"  single_flight={enabled!s:<5} {seconds:7.3f}s "
+                  f"p50={stats['p50']:9.2f}ms p99={stats['p99']:9.2f}ms "
+                  f"computations={computations}")
+
+
+if __name__ == "__main__":
+    questions, departments = make_corpus(20000)
+    classification_service.train_models(questions, departments)
+    for size in [int(arg) for arg in sys.argv[1:]] or [100, 500]:
+        asyncio.run(burst(size))
@@ -0,0 +1,136 @@
+"""
+Benchmark - Schema-aware ingestion of wide, mixed-type tables
+
+Builds JSON rows with numeric columns (with gaps) and categorical columns
+of growing cardinality, then compares:
+
+- ingestion: pd.DataFrame + get_dummies with dtypes re-inferred on every
+  call, vs. inferring a TableSchema once and encoding the columns through
+  its dictionaries (one-hot as for regression, codes as for the forest)
+- per-row encoding: a one-row DataFrame + get_dummies re-aligned to the
+  training columns, vs. TableSchema.encode_row
+- end to end: POST /ml/train/classification and per-row
+  POST /ml/predict/classification through the ASGI app
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from benchmarks.corpus import percentiles
+from infrastructure.data.schema import TableSchema, columns_of_records
+from main import app
+
+N_NUMERIC = 150
+N_CATEGORICAL = 50
+LATENCY_ROWS = 1000
+REQUEST_ROWS = 300
+
+
+def _records(n_rows: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    numeric = rng.normal(size=(n_rows, N_NUMERIC)).round(4)
+    gaps = rng.random((n_rows, N_NUMERIC)) < 0.01
+    cardinalities = np.geomspace(4, 1000, N_CATEGORICAL).astype(int)
+    codes = np.column_stack([rng.integers(0, k, n_rows) for k in cardinalities])
+    label = (numeric[:, 0] + (codes[:, 0] == 1) > 0.5).astype(int)
+    numeric_names = [f"n{i}" for i in range(N_NUMERIC)]
+    categorical_names = [f"c{i}" for i in range(N_CATEGORICAL)]
+    records = []
+    for i in range(n_rows):
+        record = {
+            name: (None if gap else value)
+            for name, value, gap in zip(numeric_names, numeric[i].tolist(), gaps[i])
+        }
+        record.update(
+            (name, f"v{code}") for name, code in zip(categorical_names, codes[i].tolist())
+        )
+        record["label"] = int(label[i])
+        records.append(record)
+    return records
+
+
+def _dataframe_encode(records, columns=None):
+    """Per-call DataFrame encoding, aligned to the training columns if given"""
+    frame = pd.DataFrame(records)
+    features = pd.get_dummies(frame.drop(columns="label", errors="ignore"), dtype=np.float32)
+    if columns is not None:
+        features = features.reindex(columns=columns, fill_value=0)
+    features = features.fillna(0)
+    return features.to_numpy(dtype=np.float32), features.columns
+
+
+def _schema_encode(records, one_hot: bool):
+    names, columns = columns_of_records(records)
+    schema = TableSchema.infer(names, columns, one_hot=one_hot)
+    data = dict(zip(names, columns))
+    return schema, schema.encode_columns(data), schema.target_values(data)
+
+
+def _timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def ingestion(n_rows: int):
+    records = _records(n_rows)
+    print(f"ingestion rows={n_rows} numeric={N_NUMERIC} categorical={N_CATEGORICAL}")
+    (X, _), seconds = _timed(_dataframe_encode, records)
+    print(f"  dataframe+get_dummies  {seconds:7.3f}s  matrix={X.nbytes / 1e6:7.1f}MB "
+          f"width={X.shape[1]}")
+    for name, one_hot in (("schema one-hot", True), ("schema codes", False)):
+        (schema, X, _), seconds = _timed(_schema_encode, records, one_hot)
+        print(f"  {name:<22} {seconds:7.3f}s  matrix={X.nbytes / 1e6:7.1f}MB "
+              f"width={X.shape[1]} contiguous={X.flags.c_contiguous}")
+
+
+def row_latency(n_rows: int = 20000):
+    records = _records(n_rows)
+    rows = [{k: v for k, v in record.items() if k != "label"} for record in records[:LATENCY_ROWS]]
+    _, train_columns = _dataframe_encode(records)
+    schema, _, _ = _schema_encode(records, one_hot=True)
+    print(f"per-row encoding ({LATENCY_ROWS} rows, one-hot width={schema.width})")
+    for name, encode in (
+        ("dataframe+get_dummies", lambda row: _dataframe_encode([row], train_columns)[0]),
+        ("schema.encode_row", schema.encode_row)
+    ):
+        samples = []
+        for row in rows:
+            start = time.perf_counter()
+            encode(row)
+            samples.append((time.perf_counter() - start) * 1000)
+        stats = percentiles(samples)
+        print(f"  {name:<22} p50={stats['p50']:8.3f}ms p99={stats['p99']:8.3f}ms")
+
+
+def end_to_end(n_rows: int = 20000):
+    records = _records(n_rows)
+    rows = [{k: v for k, v in record.items() if k != "label"} for record in records[:REQUEST_ROWS]]
+    print(f"end to end, classification (rows={n_rows})")
+    with TestClient(app) as client:
+        response, seconds = _timed(
+            client.post, "/api/v1/ml/train/classification", json={"data": records}
+        )
+        assert response.status_code == 200, response.text
+        print(f"  train request          {seconds:7.3f}s  "
+              f"accuracy={response.json()['data']['accuracy']:.3f}")
+        for name, payload in (("keyed row", lambda row: row),
+                              ("positional row", lambda row: list(row.values()))):
+            samples = []
+            for row in rows:
+                start = time.perf_counter()
+                response = client.post("/api/v1/ml/predict/classification",
+                                       json={"features": payload(row)})
+                samples.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.text
+            stats = percentiles(samples)
+            print(f"  predict {name:<14} p50={stats['p50']:8.3f}ms p99={stats['p99']:8.3f}ms")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000]
+    for size in sizes:
+        ingestion(size)
+    row_latency()
+    end_to_end()
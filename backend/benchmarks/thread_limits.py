@@ -0,0 +1,144 @@
+"""
+Benchmark - native thread limits under mixed training and inference load
+
+Starts the API with uvicorn and several workers, once with THREAD_LIMITS
+off (every BLAS/OpenMP pool sized to all cores in every worker) and once
+on (the cores split between the workers, one native thread per inference
+call). While training requests keep every worker busy - least-squares fits
+on a wide table and forests - paced inference requests measure
+/classify-question and /ml/predict/regression latency.
+
+Reports p50/p99 inference latency and the trainings finished. On a
+machine with one core both runs are the same: the limits only matter
+when there are more threads than cores to spread.
+"""
+import asyncio
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+import numpy as np
+from benchmarks.corpus import make_corpus, percentiles
+from infrastructure.ml.compute import available_cores
+
+PORT = 8766
+BASE_URL = f"http://127.0.0.1:{PORT}/api/v1"
+WORKERS = 2
+DURATION = 20.0
+TRAINERS = 2
+PROBES = 4
+PROBE_INTERVAL = 0.05
+NPY = {"content-type": "application/x-npy"}
+
+
+def _npy(array: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+def _start_server(limits: bool, model_dir: str, workers: int = WORKERS) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT),
+         "--workers", str(workers), "--log-level", "warning"],
+        env={
+            **os.environ,
+            "THREAD_LIMITS": str(limits).lower(),
+            "WEB_CONCURRENCY": str(workers),
+            "ADMISSION_CONTROL": "false",
+            "SINGLE_FLIGHT_CLASSIFICATION": "false",
+            "ML_MODEL_DIR": model_dir
+        }
+    )
+    for _ in range(600):
+        try:
+            if httpx.get(f"http://127.0.0.1:{PORT}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("Server did not start")
+
+
+async def _train(client: httpx.AsyncClient, regression: bytes, forest: bytes, stop: float) -> int:
+    finished = 0
+    while time.perf_counter() < stop:
+        for path, table in (("regression", regression), ("classification", forest)):
+            response = await client.post(f"{BASE_URL}/ml/train/{path}", content=table, headers=NPY)
+            assert response.status_code == 200, response.text
+            finished += 1
+    return finished
+
+
+async def _probe(client: httpx.AsyncClient, questions, rows: bytes, stop: float):
+    samples = {"classify-question": [], "ml predict (1000 rows)": []}
+    i = 0
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        response = await client.post(
+            f"{BASE_URL}/classify-question", json={"question": questions[i % len(questions)]}
+        )
+        assert response.status_code == 200, response.text
+        samples["classify-question"].append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        response = await client.post(f"{BASE_URL}/ml/predict/regression", content=rows, headers=NPY)
+        assert response.status_code == 200, response.text
+        samples["ml predict (1000 rows)"].append((time.perf_counter() - start) * 1000)
+        i += 1
+        await asyncio.sleep(PROBE_INTERVAL)
+    return samples
+
+
+async def mixed_load(limits: bool, tables):
+    regression, forest, rows = tables
+    questions, _ = make_corpus(500, seed=11)
+    with tempfile.TemporaryDirectory() as model_dir:
+        # Every worker restores the regression model saved by a first run
+        server = _start_server(limits, model_dir, workers=1)
+        try:
+            response = httpx.post(
+                f"{BASE_URL}/ml/train/regression", content=regression, headers=NPY, timeout=600
+            )
+            assert response.status_code == 200, response.text
+        finally:
+            server.terminate()
+            server.wait()
+        server = _start_server(limits, model_dir)
+        try:
+            async with httpx.AsyncClient(timeout=600) as client:
+                status = (await client.get(f"{BASE_URL}/model-status")).json()["compute"]
+                stop = time.perf_counter() + DURATION
+                results = await asyncio.gather(
+                    *[_train(client, regression, forest, stop) for _ in range(TRAINERS)],
+                    *[_probe(client, questions, rows, stop) for _ in range(PROBES)]
+                )
+        finally:
+            server.terminate()
+            server.wait()
+    trainings, probes = sum(results[:TRAINERS]), results[TRAINERS:]
+    if status["enabled"]:
+        label = (f"on  (inference={status['inference_threads']} "
+                 f"training={status['training_threads']} jobs={status['training_jobs']})")
+    else:
+        label = "off (library defaults)"
+    print(f"  thread limits {label}, {trainings} trainings finished")
+    for name in probes[0]:
+        stats = percentiles([sample for probe in probes for sample in probe[name]])
+        print(f"    {name:<24} p50={stats['p50']:8.2f}ms  p99={stats['p99']:8.2f}ms")
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(100000, 200))
+    y = X @ rng.normal(size=200)
+    regression = _npy(np.column_stack([X, y]))
+    forest = _npy(np.column_stack([X[:20000, :20], (X[:20000, 0] > 0).astype(int)]))
+    tables = (regression, forest, _npy(X[:1000]))
+    print(f"{available_cores()} cores, {WORKERS} workers, {TRAINERS} training loops, "
+          f"{PROBES} inference loops, {DURATION:g}s")
+    for limits in (False, True):
+        asyncio.run(mixed_load(limits, tables))
@@ -0,0 +1,67 @@
+"""
+Benchmark - Compact vectorizer artifacts vs. pickled TfidfVectorizer
+
+Compares artifact size, load time and single-question transform latency of
+the legacy ``joblib.dump(TfidfVectorizer)`` artifact with the compact format
+written by ``TextVectorizer.save``.
+"""
+import os
+import sys
+import tempfile
+import time
+import joblib
+from benchmarks.corpus import make_corpus, percentiles
+from infrastructure.ml.classifiers import TextVectorizer
+
+
+def _time_load(load, repeats: int = 5) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        load()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def _time_transform(transform, questions, repeats: int = 2000):
+    samples = []
+    for i in range(repeats):
+        question = questions[i % len(questions)]
+        start = time.perf_counter()
+        transform([question])
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def run(n_samples: int):
+    questions, _ = make_corpus(n_samples)
+    text_vectorizer = TextVectorizer()
+    legacy = text_vectorizer.vectorizer
+    legacy.fit(questions)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.joblib")
+        compact_path = os.path.join(tmp, "compact.joblib")
+        joblib.dump(legacy, legacy_path)
+
+        compact = TextVectorizer()
+        compact.load(legacy_path)
+        compact.save(compact_path)
+
+        X_legacy = legacy.transform(questions[:500])
+        X_compact = compact.transform(questions[:500])
+        assert abs(X_legacy - X_compact).max() < 1e-12
+
+        fresh = TextVectorizer()
+        print(f"corpus={n_samples} features={compact.n_features} "
+              f"pruned_terms={len(legacy.stop_words_)}")
+        print(f"  size   legacy={os.path.getsize(legacy_path) / 1e6:.2f}MB "
+              f"compact={os.path.getsize(compact_path) / 1e6:.2f}MB")
+        print(f"  load   legacy={_time_load(lambda: joblib.load(legacy_path)):.1f}ms "
+              f"compact={_time_load(lambda: fresh.load(compact_path)):.1f}ms")
+        print(f"  transform legacy={_time_transform(legacy.transform, questions)} ms")
+        print(f"  transform compact={_time_transform(compact.transform, questions)} ms")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,44 @@
+"""
+Benchmark - Warm-started LogisticRegression retraining
+
+Retrains on a corpus where a small fraction of samples was replaced by
+duplicates of other questions, and compares solver iterations and wall time
+of a cold and a warm start. Coefficients are carried over by term, so small
+vocabulary shifts from max_features pruning do not force a cold start.
+"""
+import sys
+from benchmarks.corpus import make_corpus
+from infrastructure.ml.classifiers import LogisticRegressionClassifier, TextVectorizer
+
+
+def run(n_samples: int, delta: float = 0.01):
+    questions, departments = make_corpus(n_samples)
+    vectorizer = TextVectorizer()
+    X = vectorizer.fit_transform(questions)
+    published = LogisticRegressionClassifier()
+    published.train(X, departments)
+
+    n_delta = int(n_samples * delta)
+    questions = questions[n_delta:] + questions[-n_delta:]
+    departments = departments[n_delta:] + departments[-n_delta:]
+    previous_vocabulary = vectorizer.vocabulary
+    X = vectorizer.fit_transform(questions)
+    feature_map = vectorizer.vocabulary.feature_map(previous_vocabulary)
+
+    cold = LogisticRegressionClassifier().train(X, departments)
+    warm_classifier = LogisticRegressionClassifier()
+    warm_classifier.set_warm_start(published, feature_map)
+    warm = warm_classifier.train(X, departments)
+
+    print(f"corpus={n_samples} delta={n_delta} "
+          f"feature_overlap={(feature_map >= 0).mean():.3f}")
+    for label, result in (("cold", cold), ("warm", warm)):
+        print(f"  {label}: n_iter={result['n_iter']:4d} "
+              f"time={result['training_time'] * 1000:8.1f}ms "
+              f"accuracy={result['accuracy']} warm_start={result['warm_start']}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    for size in sizes:
+        run(size)
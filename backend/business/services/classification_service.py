@@ -2,31 +2,154 @@
 Department Classification Service
 """
 import random
+import threading
 import numpy as np
-from typing import Dict, List, Any
+import scipy.sparse as sp
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from business.models.domain_models import (
     Question, Department, ClassificationResult, TrainingData, 
     ModelInfo, TrainingResult
 )
 from infrastructure.ml.classifiers import (
     create_classifier,
+    CompressedLinearClassifier,
     TextVectorizer,
     get_available_models
 )
+from infrastructure.ml.hierarchy import HierarchicalClassifier
+from infrastructure.ml.compute import compute_resources
+from infrastructure.ml.monitoring import DriftMonitor, ReferenceProfile
+from infrastructure.ml.retrieval import InvertedIndex
+from infrastructure.ml.cascade import (
+    CASCADE_ORDER,
+    CascadeStage,
+    calibrate_cascade,
+    parse_cascade_stages
+)
+from common.single_flight import SingleFlight
+from common.utils import parse_model_weights
+from common.config import settings
+import io
 import os
+import json
+import joblib
+import shutil
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+BASE_MODELS = ["MultinomialNB", "SVM", "RandomForest", "LogisticRegression"]
+CASCADE_MODEL = "Cascade"
+ENSEMBLE_MODEL = "Ensemble"
+DISTILLED_MODEL = "Distilled"
+# Models with a linear scoring function that can be pruned and quantized
+COMPRESSIBLE_MODELS = ["MultinomialNB", "LogisticRegression", "SVM", DISTILLED_MODEL]
+COMPRESSED_DIR = "compressed"
+SIMILAR_INDEX_DIR = "similar_questions"
+MONITORING_REFERENCE_FILE = "monitoring_reference.json"
+DEFAULT_DEPARTMENTS = ["HR", "Finance", "IT", "Production", "Sales"]
+# Largest share of the training data held out for the drift reference
+MAX_REFERENCE_SHARE = 0.1
+
+# Worker threads for ensemble scoring, shared by every service instance
+_scoring_pool = None
+
+
+def _get_scoring_pool() -> Optional[ThreadPoolExecutor]:
+    """Create the shared scoring pool on first use"""
+    global _scoring_pool
+    if _scoring_pool is None and settings.ensemble_workers > 0:
+        _scoring_pool = ThreadPoolExecutor(max_workers=settings.ensemble_workers)
+    return _scoring_pool
+
+
+def _new_vectorizer() -> TextVectorizer:
+    return TextVectorizer(np.float32 if settings.float32_features else np.float64)
+
+
+@dataclass(frozen=True)
+class ServingState:
+    """
+    Everything classification reads, published as one object
+    
+    Training, calibration, distillation, export and loading build a new
+    state aside and swap it in with a single assignment. A request reads
+    ``service.state`` once and uses only that snapshot, so it never pairs
+    a vectorizer with models fitted on other features. Published states
+    and the objects they hold are not modified.
+    """
+    departments: Tuple[str, ...]
+    vectorizer: TextVectorizer
+    trained_models: Dict[str, Any]
+    compressed_models: Dict[str, Any]
+    # Training questions searchable by TF-IDF similarity
+    similar_index: Optional[InvertedIndex]
+    # Department/team/queue taxonomy model with its own features
+    hierarchy: Optional[HierarchicalClassifier]
+    hierarchy_vectorizer: TextVectorizer
+    cascade_stages: Tuple[CascadeStage, ...]
+    # Live /classify-question distributions against the training data
+    monitor: DriftMonitor
+    # Bumped whenever a new state is published
+    generation: int = 0
+    
+    def serving_models(self) -> Dict[str, Any]:
+        """Models used for classification, compressed exports first if enabled"""
+        if not settings.serve_compressed_models or not self.compressed_models:
+            return self.trained_models
+        return {
+            name: self.compressed_models.get(name, classifier)
+            for name, classifier in self.trained_models.items()
+        }
+
 
 class DepartmentClassificationService:
     """Service for classifying questions into departments"""
     
-    def __init__(self):
-        self.departments = ["HR", "Finance", "IT", "Production", "Sales"]
-        self.vectorizer = TextVectorizer()
-        self.trained_models = {}
+    def __init__(self, departments: Optional[List[str]] = None):
+        self.state = ServingState(
+            departments=tuple(departments or DEFAULT_DEPARTMENTS),
+            vectorizer=_new_vectorizer(),
+            trained_models={},
+            compressed_models={},
+            similar_index=None,
+            hierarchy=None,
+            hierarchy_vectorizer=_new_vectorizer(),
+            cascade_stages=tuple(parse_cascade_stages(settings.cascade_stages)),
+            monitor=self._create_monitor()
+        )
+        self.ensemble_weights = parse_model_weights(settings.ensemble_weights)
+        self._scoring_pool = _get_scoring_pool()
+        # Serializes publishers; readers never take it
+        self._publish_lock = threading.Lock()
+    
+    def _publish(self, **changes) -> ServingState:
+        """Swap in a copy of the serving state with the given parts replaced"""
+        return self._publish_from(None, lambda current: changes)
+    
+    def _publish_from(
+        self,
+        based_on: Optional[ServingState],
+        update: Callable[[ServingState], Dict[str, Any]]
+    ) -> ServingState:
+        """
+        Swap in a copy of the current state with the parts ``update`` returns
         
+        Work computed on the features of ``based_on`` is refused when a
+        retrain or reload has published another vectorizer since.
+        """
+        with self._publish_lock:
+            current = self.state
+            if based_on is not None and current.vectorizer is not based_on.vectorizer:
+                raise ValueError("Models were retrained or reloaded meanwhile; run this again")
+            self.state = replace(current, generation=current.generation + 1, **update(current))
+            return self.state
+        
+    @compute_resources.training()
     def train_models(self, questions: List[str], departments: List[str]) -> Dict[str, Any]:
         """
         Train all models with provided data
@@ -45,21 +168,66 @@ class DepartmentClassificationService:
             if len(questions) < 10:
                 raise ValueError("Need at least 10 samples for training")
             
-            # Vectorize the text data
-            X = self.vectorizer.fit_transform(questions)
-            y = departments
+            state = self.state
+            # Departments follow the training labels; known ones keep their order
+            labels = list(dict.fromkeys(departments))
+            department_order = [d for d in state.departments if d in labels] + [
+                d for d in labels if d not in state.departments
+            ]
+            
+            # Everything is fitted aside and published at the end, so questions
+            # classified meanwhile see the previous vectorizer and models together
+            vectorizer = state.vectorizer.copy()
+            trained_models = dict(state.trained_models)
+            
+            # Questions profiled for drift monitoring; with DRIFT_REFERENCE_HOLDOUT
+            # they are kept out of training, so the reference sees the models
+            # the way new traffic will
+            reference_rows = self._reference_rows(departments)
+            held_out = set(reference_rows) if settings.drift_reference_holdout else set()
+            fit_questions = [q for i, q in enumerate(questions) if i not in held_out]
+            y = [d for i, d in enumerate(departments) if i not in held_out]
+            held_questions = [questions[i] for i in sorted(held_out)]
+            held_departments = [departments[i] for i in sorted(held_out)]
+            
+            # Vectorize the text data (reuses cached counts of unchanged samples)
+            previous_vocabulary = vectorizer.vocabulary
+            X = vectorizer.fit_transform(fit_questions)
+            logger.info(f"Vectorizer fitted: {vectorizer.last_fit_stats}")
+            
+            # Previous coefficients are only meaningful on mostly the same features
+            feature_map = None
+            if previous_vocabulary is not None:
+                feature_map = vectorizer.vocabulary.feature_map(previous_vocabulary)
+                if np.mean(feature_map >= 0) < settings.warm_start_min_overlap:
+                    feature_map = None
             
             results = {}
-            model_names = ["MultinomialNB", "SVM", "RandomForest", "LogisticRegression"]
+            model_names = BASE_MODELS
+            
+            # A distilled student was fitted on the previous features
+            if trained_models.pop(DISTILLED_MODEL, None) is not None:
+                logger.info("Dropped distilled student; rerun distillation after training")
+            if state.compressed_models:
+                logger.info("Dropped compressed models; rerun the export after training")
             
             for model_name in model_names:
                 try:
                     # Create and train the model
                     classifier = create_classifier(model_name)
+                    previous = trained_models.get(model_name)
+                    if (
+                        settings.warm_start_training
+                        and feature_map is not None
+                        and previous is not None
+                    ):
+                        classifier.set_warm_start(previous, feature_map)
                     training_result = classifier.train(X, y)
+                    if settings.float32_features:
+                        classifier.to_float32()
                     
                     # Store trained model
-                    self.trained_models[model_name] = classifier
+                    trained_models[model_name] = classifier
                     
                     results[model_name] = training_result
                     
@@ -73,11 +241,40 @@ class DepartmentClassificationService:
                         "status": f"error: {str(e)}"
                     }
             
+            # The index shares the vectorizer's feature ids and also covers
+            # the held-out questions
+            similar_index = None
+            if settings.similar_questions_index:
+                X_index = X
+                if held_questions:
+                    X_index = sp.vstack([X, vectorizer.transform(held_questions)])
+                similar_index = InvertedIndex.build(
+                    X_index, fit_questions + held_questions, y + held_departments
+                )
+                logger.info(f"Similar-question index built over {len(similar_index)} questions")
+            
+            # Live traffic is compared with the new training data from now on
+            monitor = self._create_monitor(
+                self._reference_profile(
+                    vectorizer, trained_models, [questions[i] for i in reference_rows], departments
+                )
+            )
+            
+            self._publish(
+                departments=tuple(department_order),
+                vectorizer=vectorizer,
+                trained_models=trained_models,
+                compressed_models={},
+                similar_index=similar_index,
+                monitor=monitor
+            )
             return {
                 "success": True,
                 "message": "Models trained successfully",
                 "results": results,
                 "total_samples": len(questions),
+                "training_samples": len(fit_questions),
+                "held_out_samples": len(held_out),
                 "departments": list(set(departments))
             }
             
@@ -89,10 +286,14 @@ class DepartmentClassificationService:
                 "results": {}
             }
     
+    @compute_resources.inference()
     def classify_question(
         self, 
         question: str, 
-        model_name: str = "MultinomialNB"
+        model_name: str = "MultinomialNB",
+        weights: Optional[Dict[str, float]] = None,
+        voting: str = "soft",
+        similar_questions: int = 0
     ) -> Dict[str, Any]:
         """
         Classify a question into a department
@@ -100,56 +301,829 @@ class DepartmentClassificationService:
         Args:
             question: The question to classify
             model_name: Name of the model to use
+            weights: Ensemble weight per model (only for "Ensemble")
+            voting: Ensemble combination, "soft" or "hard"
+            similar_questions: Attach this many similar training questions,
+                searched with the same vectorized row (when an index exists)
             
         Returns:
             Classification results with predictions and confidence
+            
+        Raises:
+            ValueError: If the ensemble weights leave no trained model
         """
+        state = self.state
+        if model_name == ENSEMBLE_MODEL:
+            self._ensemble_models(state, weights)
         try:
-            # If models are not trained, return mock data
-            if not self.trained_models or model_name not in self.trained_models:
-                return self._get_mock_prediction(question, model_name)
+            # Vectorize the question once for every path; the token counts
+            # feed the drift monitor
+            X = None
+            if state.vectorizer.is_fitted:
+                X, tokens, unknown_tokens = state.vectorizer.transform_with_stats([question])
             
-            if not self.vectorizer.is_fitted:
-                raise ValueError("Vectorizer is not fitted. Please train models first.")
+            if model_name == CASCADE_MODEL:
+                result = self._classify_cascade(state, question, X)
+            elif model_name == ENSEMBLE_MODEL:
+                result = self._classify_ensemble(state, [question], weights, voting, X)[0]
+            else:
+                models = state.serving_models()
+                
+                # If models are not trained, return mock data
+                if not models or model_name not in models:
+                    return self._get_mock_prediction(question, model_name)
+                
+                if X is None:
+                    raise ValueError("Vectorizer is not fitted. Please train models first.")
+                
+                # Get the trained model
+                classifier = models[model_name]
+                
+                # Make prediction
+                prediction = classifier.predict(X)[0]
+                probabilities = classifier.predict_proba(X)[0]
+                
+                result = self._build_result(
+                    state, question, model_name, prediction,
+                    self._align_probabilities(state, classifier, probabilities[np.newaxis, :])[0]
+                )
+            
+            if not result["is_mock"]:
+                state.monitor.observe(
+                    model_name, result["predicted_department"], result["confidence"],
+                    int(tokens[0]), int(unknown_tokens[0])
+                )
+            if similar_questions and X is not None and state.similar_index is not None:
+                result["similar_questions"] = self._search_similar(state, X, similar_questions)
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error classifying question: {str(e)}")
+            # Fallback to mock data on error
+            return self._get_mock_prediction(question, model_name)
+    
+    def coalescing_key(
+        self,
+        question: str,
+        model_name: str,
+        weights: Optional[Dict[str, float]] = None,
+        voting: str = "soft",
+        *extra
+    ) -> tuple:
+        """
+        Key under which concurrent identical classifications share one result
+        
+        Questions that differ only in case or whitespace vectorize the same.
+        The model generation keeps requests made after a retrain or reload
+        from joining a computation on the previous models.
+        """
+        return (
+            id(self),
+            self.state.generation,
+            " ".join(question.lower().split()),
+            model_name,
+            tuple(sorted(weights.items())) if weights else None,
+            voting,
+            *extra
+        )
+    
+    @compute_resources.training()
+    def train_hierarchy(
+        self,
+        questions: List[str],
+        paths: List[str],
+        node_model: str = "LogisticRegression",
+        separator: str = "/"
+    ) -> Dict[str, Any]:
+        """
+        Train the hierarchical classifier on taxonomy label paths
+        
+        Args:
+            questions: List of questions
+            paths: Leaf path per question, e.g. "IT/Network/VPN"
+            node_model: Classifier type trained at every internal node
+            separator: Separator between path segments
+            
+        Returns:
+            Training results with the size of the taxonomy
+        """
+        try:
+            if len(questions) != len(paths):
+                raise ValueError("Questions and label paths must have the same length")
+            
+            vectorizer = _new_vectorizer()
+            X = vectorizer.fit_transform(questions)
+            hierarchy = HierarchicalClassifier(node_model=node_model, separator=separator)
+            result = hierarchy.fit(X, paths)
+            if settings.float32_features:
+                hierarchy.to_float32()
+            
+            self._publish(hierarchy=hierarchy, hierarchy_vectorizer=vectorizer)
+            logger.info(f"Hierarchy trained: {result}")
+            
+            return {
+                "success": True,
+                "message": "Hierarchical classifier trained successfully",
+                "results": result
+            }
+            
+        except Exception as e:
+            logger.error(f"Error training hierarchy: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Hierarchy training failed: {str(e)}"
+            }
+    
+    @compute_resources.inference()
+    def classify_hierarchical(
+        self, question: str, top_k: int = 5, beam_width: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Most probable taxonomy leaves for a question
+        
+        Args:
+            question: The question to classify
+            top_k: Number of leaves to return
+            beam_width: Nodes kept per tree level during the search
+            
+        Returns:
+            Leaf paths with their probabilities, best first
+        """
+        state = self.state
+        if state.hierarchy is None:
+            raise ValueError("Hierarchical classifier is not trained. Train a hierarchy first.")
+        
+        X = state.hierarchy_vectorizer.transform([question])
+        leaves = state.hierarchy.predict_top_k(X, k=top_k, beam_width=beam_width)[0]
+        
+        return {
+            "question": question,
+            "model_used": f"Hierarchical {state.hierarchy.node_model}",
+            "leaves": [
+                {"path": path, "probability": round(probability, 4)}
+                for path, probability in leaves
+            ]
+        }
+    
+    @compute_resources.inference()
+    def find_similar_questions(self, question: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Training questions most similar to a question
+        
+        Args:
+            question: The question to look up
+            top_k: Number of questions to return
+            
+        Returns:
+            Questions with their department and cosine similarity, best first
+        """
+        state = self.state
+        if state.similar_index is None or not state.vectorizer.is_fitted:
+            raise ValueError("Similar-question index is not built. Please train models first.")
+        
+        return self._search_similar(state, state.vectorizer.transform([question]), top_k)
+    
+    @staticmethod
+    def _search_similar(state: ServingState, X, top_k: int) -> List[Dict[str, Any]]:
+        """Indexed questions most similar to an already vectorized row"""
+        doc_ids, scores = state.similar_index.search(X, k=top_k)
+        return [
+            {
+                "question": state.similar_index.text(doc_id),
+                "department": state.similar_index.label(doc_id),
+                "score": round(float(score), 4)
+            }
+            for doc_id, score in zip(doc_ids, scores)
+        ]
+    
+    @compute_resources.inference()
+    def classify_batch(
+        self,
+        questions: List[str],
+        model_name: str = "MultinomialNB",
+        weights: Optional[Dict[str, float]] = None,
+        voting: str = "soft"
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify several questions with a single vectorization pass
+        
+        Args:
+            questions: Questions to classify
+            model_name: Model to use, or "Ensemble" to combine all models
+            weights: Ensemble weight per model (default from settings, else 1)
+            voting: Ensemble combination, "soft" or "hard"
+            
+        Returns:
+            One classification result per question, in order
+            
+        Raises:
+            ValueError: If the ensemble weights leave no trained model
+        """
+        state = self.state
+        if model_name == ENSEMBLE_MODEL:
+            self._ensemble_models(state, weights)
+        try:
+            if model_name == ENSEMBLE_MODEL:
+                return self._classify_ensemble(state, questions, weights, voting)
             
-            # Vectorize the question
-            X = self.vectorizer.transform([question])
+            if model_name == CASCADE_MODEL:
+                return [self._classify_cascade(state, question) for question in questions]
             
-            # Get the trained model
-            classifier = self.trained_models[model_name]
+            models = state.serving_models()
+            if model_name not in models or not state.vectorizer.is_fitted:
+                return [self._get_mock_prediction(q, model_name) for q in questions]
             
-            # Make prediction
-            prediction = classifier.predict(X)[0]
+            X = state.vectorizer.transform(questions)
+            classifier = models[model_name]
+            predictions = classifier.predict(X)
+            aligned = self._align_probabilities(state, classifier, classifier.predict_proba(X))
+            
+            return [
+                self._build_result(state, question, model_name, predictions[i], aligned[i])
+                for i, question in enumerate(questions)
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error classifying batch: {str(e)}")
+            return [self._get_mock_prediction(q, model_name) for q in questions]
+    
+    def _classify_ensemble(
+        self,
+        state: ServingState,
+        questions: List[str],
+        weights: Optional[Dict[str, float]] = None,
+        voting: str = "soft",
+        X=None
+    ) -> List[Dict[str, Any]]:
+        """
+        Score every trained model on one shared feature matrix and combine
+        
+        Soft voting averages the department probabilities, hard voting
+        averages one-hot votes for each model's top department; both use the
+        per-model weights. Models with weight 0 are not run at all. ``X``
+        holds the questions' features when already vectorized.
+        """
+        if voting not in ("soft", "hard"):
+            raise ValueError(f"Unknown voting mode: {voting}")
+        
+        weights = weights if weights is not None else self.ensemble_weights
+        models = self._ensemble_models(state, weights)
+        if not models or not state.vectorizer.is_fitted:
+            return [self._get_mock_prediction(q, ENSEMBLE_MODEL) for q in questions]
+        
+        if X is None:
+            X = state.vectorizer.transform(questions)
+        scores = self._score_models(state, models, X)
+        
+        combined = np.zeros((len(questions), len(state.departments)))
+        total_weight = 0.0
+        for name, aligned in scores.items():
+            weight = weights.get(name, 1.0 if name in BASE_MODELS else 0.0)
+            if voting == "hard":
+                aligned = np.eye(len(state.departments))[aligned.argmax(axis=1)]
+            combined += weight * aligned
+            total_weight += weight
+        combined /= total_weight
+        
+        results = []
+        for i, question in enumerate(questions):
+            prediction = state.departments[int(combined[i].argmax())]
+            result = self._build_result(state, question, ENSEMBLE_MODEL, prediction, combined[i])
+            result["model_predictions"] = {
+                name: {
+                    dept: round(float(aligned[i, j]), 3)
+                    for j, dept in enumerate(state.departments)
+                }
+                for name, aligned in scores.items()
+            }
+            results.append(result)
+        return results
+    
+    def _ensemble_models(
+        self, state: ServingState, weights: Optional[Dict[str, float]]
+    ) -> Dict[str, Any]:
+        """
+        Serving models with a positive ensemble weight
+        
+        Raises:
+            ValueError: If models are trained but the weights leave none
+        """
+        weights = weights if weights is not None else self.ensemble_weights
+        trained = state.serving_models()
+        # The distilled student only joins when given an explicit weight
+        models = {
+            name: classifier for name, classifier in trained.items()
+            if weights.get(name, 1.0 if name in BASE_MODELS else 0.0) > 0
+        }
+        if trained and not models:
+            raise ValueError(
+                f"Ensemble weights leave no trained model to combine; "
+                f"trained: {', '.join(trained)}"
+            )
+        return models
+    
+    def _score_models(
+        self, state: ServingState, models: Dict[str, Any], X
+    ) -> Dict[str, np.ndarray]:
+        """
+        Department-aligned probabilities of several models on the same rows
+        
+        Models whose prediction code releases the GIL are submitted to the
+        scoring pool first so they overlap with the ones run on this thread.
+        """
+        futures = {}
+        if self._scoring_pool is not None:
+            futures = {
+                name: self._scoring_pool.submit(classifier.predict_proba, X)
+                for name, classifier in models.items()
+                if classifier.releases_gil
+            }
+        probabilities = {
+            name: classifier.predict_proba(X)
+            for name, classifier in models.items()
+            if name not in futures
+        }
+        for name, future in futures.items():
+            probabilities[name] = future.result()
+        
+        return {
+            name: self._align_probabilities(state, classifier, probabilities[name])
+            for name, classifier in models.items()
+        }
+    
+    @staticmethod
+    def _align_probabilities(
+        state: ServingState, classifier, probabilities: np.ndarray
+    ) -> np.ndarray:
+        """Reorder probability columns to follow the state's departments"""
+        classes = getattr(classifier.model, 'classes_', None)
+        if classes is not None:
+            column_of = {label: i for i, label in enumerate(classes)}
+            columns = np.array([column_of.get(dept, -1) for dept in state.departments])
+        else:
+            columns = np.arange(len(state.departments))
+        columns[columns >= probabilities.shape[1]] = -1
+        
+        aligned = probabilities[:, columns]
+        aligned[:, columns < 0] = 0.0
+        return aligned
+    
+    @staticmethod
+    def _build_result(
+        state: ServingState,
+        question: str,
+        model_name: str,
+        prediction: str,
+        aligned: np.ndarray
+    ) -> Dict[str, Any]:
+        """Build a classification result from department-aligned probabilities"""
+        # Create predictions dictionary
+        predictions = {
+            dept: round(float(aligned[i]), 3)
+            for i, dept in enumerate(state.departments)
+        }
+        
+        # Get confidence (highest probability)
+        confidence = max(predictions.values())
+        
+        return {
+            "question": question,
+            "predicted_department": prediction,
+            "model_used": model_name,
+            "predictions": predictions,
+            "confidence": confidence,
+            "is_mock": False
+        }
+    
+    def _classify_cascade(self, state: ServingState, question: str, X=None) -> Dict[str, Any]:
+        """
+        Classify with the cheapest configured model whose answer is confident
+        
+        The question is vectorized once (unless ``X`` already holds its
+        features); each stage either accepts its own prediction or escalates
+        to the next one. The last available stage always answers.
+        """
+        models = state.serving_models()
+        stages = [
+            stage for stage in state.cascade_stages
+            if stage.model_name in models
+        ]
+        if not stages or not state.vectorizer.is_fitted:
+            return self._get_mock_prediction(question, CASCADE_MODEL)
+        
+        if X is None:
+            X = state.vectorizer.transform([question])
+        for depth, stage in enumerate(stages, start=1):
+            classifier = models[stage.model_name]
             probabilities = classifier.predict_proba(X)[0]
+            if depth == len(stages) or stage.accepts(probabilities):
+                prediction = classifier.predict(X)[0]
+                result = self._build_result(
+                    state, question, CASCADE_MODEL, prediction,
+                    self._align_probabilities(state, classifier, probabilities[np.newaxis, :])[0]
+                )
+                result["answered_by"] = stage.model_name
+                result["cascade_depth"] = depth
+                return result
+    
+    @compute_resources.training()
+    def calibrate_cascade(
+        self,
+        questions: List[str],
+        departments: List[str],
+        target_accuracy: float = 0.95
+    ) -> Dict[str, Any]:
+        """
+        Pick cascade thresholds on a labelled validation set
+        
+        Args:
+            questions: Validation questions (not used for training)
+            departments: Their correct departments
+            target_accuracy: Accuracy the cascade has to reach
             
-            # Create predictions dictionary
-            predictions = {}
-            for i, dept in enumerate(self.departments):
-                if hasattr(classifier.model, 'classes_'):
-                    dept_index = np.where(classifier.model.classes_ == dept)[0]
-                    if len(dept_index) > 0:
-                        predictions[dept] = round(probabilities[dept_index[0]], 3)
-                    else:
-                        predictions[dept] = 0.0
-                else:
-                    predictions[dept] = round(probabilities[i] if i < len(probabilities) else 0.0, 3)
+        Returns:
+            Chosen stages with their expected accuracy and latency
+        """
+        try:
+            if len(questions) != len(departments):
+                raise ValueError("Questions and departments must have the same length")
+            state = self.state
+            if not state.vectorizer.is_fitted:
+                raise ValueError("Vectorizer is not fitted. Please train models first.")
+            
+            # Calibration time is linear in the rows; bound it with a fixed sample
+            if len(questions) > settings.cascade_calibration_samples:
+                sample = random.Random(0).sample(
+                    range(len(questions)), settings.cascade_calibration_samples
+                )
+                questions = [questions[i] for i in sample]
+                departments = [departments[i] for i in sample]
             
-            # Get confidence (highest probability)
-            confidence = max(predictions.values())
+            X = state.vectorizer.transform(questions)
+            y = np.asarray(departments)
+            probabilities = {}
+            correct = {}
+            latency_ms = {}
+            
+            for model_name in CASCADE_ORDER:
+                classifier = state.trained_models.get(model_name)
+                if classifier is None:
+                    continue
+                probabilities[model_name] = classifier.predict_proba(X)
+                correct[model_name] = classifier.predict(X) == y
+                latency_ms[model_name] = self._measure_latency(classifier, X)
+            
+            calibration = calibrate_cascade(
+                probabilities, correct, latency_ms, target_accuracy
+            )
+            self._publish(cascade_stages=tuple(
+                CascadeStage(**stage) for stage in calibration["stages"]
+            ))
             
             return {
-                "question": question,
-                "predicted_department": prediction,
-                "model_used": model_name,
-                "predictions": predictions,
-                "confidence": confidence,
-                "is_mock": False
+                "success": True,
+                "message": "Cascade thresholds calibrated",
+                "target_accuracy": target_accuracy,
+                "model_latency_ms": {
+                    name: round(value, 4) for name, value in latency_ms.items()
+                },
+                "model_accuracy": {
+                    name: round(float(value.mean()), 4) for name, value in correct.items()
+                },
+                **calibration
             }
             
         except Exception as e:
-            logger.error(f"Error classifying question: {str(e)}")
-            # Fallback to mock data on error
-            return self._get_mock_prediction(question, model_name)
+            logger.error(f"Error calibrating cascade: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Cascade calibration failed: {str(e)}"
+            }
+    
+    @compute_resources.training()
+    def distill_model(
+        self,
+        questions: Optional[List[str]] = None,
+        teacher: str = ENSEMBLE_MODEL,
+        unlabelled_questions: Optional[List[str]] = None,
+        validation_questions: Optional[List[str]] = None,
+        validation_departments: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Train the linear "Distilled" student on a teacher's probabilities
+        
+        Args:
+            questions: Training corpus questions; by default the corpus the
+                models were trained on, rebuilt from the vectorizer's cached
+                term counts
+            teacher: A trained model name, or "Ensemble" for the soft vote
+                of all trained base models with their ensemble weights
+            unlabelled_questions: Extra questions labelled only by the teacher
+            validation_questions: Held-out questions for the report
+            validation_departments: Their correct departments
+            
+        Returns:
+            Distillation results with the teacher accuracy the student keeps
+            and both models' single-question latency
+            
+        Raises:
+            ValueError: If there is no trained teacher with a positive
+                weight or no corpus to distill on
+        """
+        state = self.state
+        if not state.vectorizer.is_fitted:
+            raise ValueError("Vectorizer is not fitted. Please train models first.")
+        
+        if teacher == ENSEMBLE_MODEL:
+            teacher_weights = {
+                name: self.ensemble_weights.get(name, 1.0)
+                for name in BASE_MODELS if name in state.trained_models
+            }
+            if not teacher_weights:
+                raise ValueError("No trained teacher models available")
+            teacher_weights = {
+                name: weight for name, weight in teacher_weights.items() if weight > 0
+            }
+            if not teacher_weights:
+                raise ValueError("Every trained teacher model has an ensemble weight of zero")
+        elif teacher in BASE_MODELS and teacher in state.trained_models:
+            teacher_weights = {teacher: 1.0}
+        else:
+            raise ValueError(f"Teacher model is not trained: {teacher}")
+        teacher_models = {name: state.trained_models[name] for name in teacher_weights}
+        
+        if questions:
+            X = state.vectorizer.transform(list(questions) + list(unlabelled_questions or []))
+        else:
+            try:
+                X = state.vectorizer.transform_training_corpus()
+            except ValueError as e:
+                raise ValueError(f"{str(e)}; pass the training questions")
+            if unlabelled_questions:
+                X = sp.vstack([X, state.vectorizer.transform(unlabelled_questions)]).tocsr()
+        
+        try:
+            soft_targets = self._soft_vote(
+                self._score_models(state, teacher_models, X), teacher_weights
+            )
+            
+            student = create_classifier(DISTILLED_MODEL)
+            result = student.distill(X, soft_targets, list(state.departments))
+            if not student.is_trained:
+                raise ValueError(result["status"])
+            if settings.float32_features:
+                student.to_float32()
+            
+            logger.info(f"Distilled student from {teacher}: {result}")
+            
+            report = {}
+            if validation_questions:
+                X_val = state.vectorizer.transform(validation_questions)
+                y_val = np.asarray(validation_departments)
+                teacher_proba = self._soft_vote(
+                    self._score_models(state, teacher_models, X_val), teacher_weights
+                )
+                teacher_pred = np.asarray(state.departments)[teacher_proba.argmax(axis=1)]
+                student_pred = student.predict(X_val)
+                teacher_accuracy = float(np.mean(teacher_pred == y_val))
+                student_accuracy = float(np.mean(student_pred == y_val))
+                report = {
+                    "teacher_accuracy": round(teacher_accuracy, 4),
+                    "student_accuracy": round(student_accuracy, 4),
+                    "accuracy_retained": round(
+                        student_accuracy / teacher_accuracy if teacher_accuracy else 0.0, 4
+                    ),
+                    "teacher_agreement": round(float(np.mean(teacher_pred == student_pred)), 4),
+                    "teacher_latency_ms": round(sum(
+                        self._measure_latency(model, X_val)
+                        for model in teacher_models.values()
+                    ), 4),
+                    "student_latency_ms": round(self._measure_latency(student, X_val), 4)
+                }
+            
+            # A compressed export of an earlier student no longer applies
+            self._publish_from(state, lambda current: {
+                "trained_models": {**current.trained_models, DISTILLED_MODEL: student},
+                "compressed_models": {
+                    name: model for name, model in current.compressed_models.items()
+                    if name != DISTILLED_MODEL
+                }
+            })
+            
+            return {
+                "success": True,
+                "message": f"Distilled student trained from {teacher}",
+                "teacher": teacher,
+                "results": result,
+                "validation": report
+            }
+            
+        except Exception as e:
+            logger.error(f"Error distilling model: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Distillation failed: {str(e)}"
+            }
+    
+    @compute_resources.training()
+    def export_compressed_models(
+        self,
+        prune_ratio: float = 0.0,
+        quantize: bool = True,
+        validation_questions: Optional[List[str]] = None,
+        validation_departments: Optional[List[str]] = None,
+        model_dir: str = "saved_models"
+    ) -> Dict[str, Any]:
+        """
+        Prune and quantize the trained linear models for small deployments
+        
+        Every trained model in COMPRESSIBLE_MODELS is compressed and written
+        to ``<model_dir>/compressed``. The compressed models answer in place
+        of the originals when SERVE_COMPRESSED_MODELS is enabled.
+        
+        Args:
+            prune_ratio: Share of smallest-magnitude weights dropped per class
+            quantize: Store the kept weights as int8 with per-class scales
+            validation_questions: Held-out questions for the accuracy report
+            validation_departments: Their correct departments
+            model_dir: Directory the saved models live in
+            
+        Returns:
+            Per-model artifact size, latency and accuracy of the original
+            and the compressed model; models that cannot be compressed are
+            reported as skipped with the reason
+        """
+        try:
+            state = self.state
+            if not state.vectorizer.is_fitted:
+                raise ValueError("Vectorizer is not fitted. Please train models first.")
+            names = [name for name in COMPRESSIBLE_MODELS if name in state.trained_models]
+            if not names:
+                raise ValueError("No trained linear models to compress")
+            
+            X_val = y_val = None
+            if validation_questions:
+                X_val = state.vectorizer.transform(validation_questions)
+                y_val = np.asarray(validation_departments)
+            
+            export_dir = os.path.join(model_dir, COMPRESSED_DIR)
+            os.makedirs(export_dir, exist_ok=True)
+            compressed_models = {}
+            report = {}
+            
+            for name in names:
+                original = state.trained_models[name]
+                path = os.path.join(export_dir, f"{name}.joblib")
+                try:
+                    compressed = CompressedLinearClassifier.from_classifier(
+                        original, prune_ratio, quantize
+                    )
+                except ValueError as e:
+                    # e.g. a binary SVC; the other models are still exported
+                    logger.warning(f"Skipping compression of {name}: {str(e)}")
+                    report[name] = {"status": "skipped", "error": str(e)}
+                    # Don't let an earlier export of it be loaded later
+                    if os.path.exists(path):
+                        os.remove(path)
+                    continue
+                compressed.save(path)
+                compressed_models[name] = compressed
+                
+                original_bytes = self._artifact_size(original.model)
+                compressed_bytes = self._artifact_size(compressed.model)
+                entry = {
+                    "status": "exported",
+                    "original_bytes": original_bytes,
+                    "compressed_bytes": compressed_bytes,
+                    "size_reduction": round(1 - compressed_bytes / original_bytes, 4),
+                    "density": round(compressed.model.density, 4)
+                }
+                if X_val is not None:
+                    original_pred = original.predict(X_val)
+                    compressed_pred = compressed.predict(X_val)
+                    original_accuracy = float(np.mean(original_pred == y_val))
+                    compressed_accuracy = float(np.mean(compressed_pred == y_val))
+                    entry.update({
+                        "original_accuracy": round(original_accuracy, 4),
+                        "compressed_accuracy": round(compressed_accuracy, 4),
+                        "accuracy_delta": round(compressed_accuracy - original_accuracy, 4),
+                        "agreement": round(float(np.mean(original_pred == compressed_pred)), 4),
+                        "original_latency_ms": round(self._measure_latency(original, X_val), 4),
+                        "compressed_latency_ms": round(self._measure_latency(compressed, X_val), 4)
+                    })
+                report[name] = entry
+            
+            if not compressed_models:
+                raise ValueError(
+                    "No model could be compressed: "
+                    + "; ".join(f"{name}: {entry['error']}" for name, entry in report.items())
+                )
+            
+            self._publish_from(state, lambda current: {"compressed_models": compressed_models})
+            logger.info(f"Exported compressed models to {export_dir}: {report}")
+            
+            return {
+                "success": True,
+                "message": f"Compressed models exported to {export_dir}",
+                "prune_ratio": prune_ratio,
+                "quantize": quantize,
+                "serving": settings.serve_compressed_models,
+                "results": report
+            }
+            
+        except Exception as e:
+            logger.error(f"Error exporting compressed models: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Compression failed: {str(e)}"
+            }
+    
+    @staticmethod
+    def _create_monitor(reference: Optional[ReferenceProfile] = None) -> DriftMonitor:
+        return DriftMonitor(
+            reference,
+            windows=settings.drift_windows,
+            bucket_seconds=settings.drift_bucket_seconds,
+            psi_threshold=settings.drift_psi_threshold,
+            min_samples=settings.drift_min_samples,
+            enabled=settings.drift_monitoring
+        )
+    
+    @staticmethod
+    def _reference_profile(
+        vectorizer: TextVectorizer,
+        models: Dict[str, Any],
+        questions: List[str],
+        departments: List[str]
+    ) -> Optional[ReferenceProfile]:
+        """
+        Profile the training data for drift monitoring
+        
+        Lengths, out-of-vocabulary rates and per-model confidences come from
+        the sampled questions (see _reference_rows); department counts cover
+        all training labels.
+        """
+        if not settings.drift_monitoring or not questions:
+            return None
+        X, tokens, unknown_tokens = vectorizer.transform_with_stats(questions)
+        confidences = {
+            name: classifier.predict_proba(X).max(axis=1)
+            for name, classifier in models.items()
+        }
+        return ReferenceProfile.build(departments, confidences, tokens, unknown_tokens)
+    
+    @staticmethod
+    def _reference_rows(departments: List[str]) -> List[int]:
+        """
+        Rows the drift reference is built from
+        
+        A fixed-seed sample of DRIFT_REFERENCE_SAMPLES rows. When they are
+        held out of training (DRIFT_REFERENCE_HOLDOUT), at most
+        MAX_REFERENCE_SHARE of the data is taken and a row stays in training
+        when it is the last one of its department.
+        """
+        if not settings.drift_monitoring:
+            return []
+        if not settings.drift_reference_holdout:
+            n_samples = min(settings.drift_reference_samples, len(departments))
+            return sorted(random.Random(0).sample(range(len(departments)), n_samples))
+        n_samples = min(
+            settings.drift_reference_samples, int(len(departments) * MAX_REFERENCE_SHARE)
+        )
+        remaining = Counter(departments)
+        held_out = []
+        for i in random.Random(0).sample(range(len(departments)), n_samples):
+            if remaining[departments[i]] > 1:
+                remaining[departments[i]] -= 1
+                held_out.append(i)
+        return sorted(held_out)
+    
+    @staticmethod
+    def _artifact_size(model) -> int:
+        """Size in bytes of a model's joblib artifact"""
+        buffer = io.BytesIO()
+        joblib.dump(model, buffer)
+        return buffer.tell()
+    
+    @staticmethod
+    def _soft_vote(scores: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+        """Weighted average of department-aligned model probabilities"""
+        weights = np.array([weights[name] for name in scores])
+        if weights.sum() <= 0:
+            raise ValueError("Model weights must sum to a positive value")
+        stacked = np.stack(list(scores.values()))
+        return np.tensordot(weights / weights.sum(), stacked, axes=1)
+    
+    @staticmethod
+    def _measure_latency(classifier, X, max_rows: int = 50) -> float:
+        """Mean single-row predict + predict_proba time in milliseconds"""
+        n_rows = min(max_rows, X.shape[0])
+        start = time.perf_counter()
+        for i in range(n_rows):
+            row = X[i]
+            classifier.predict_proba(row)
+            classifier.predict(row)
+        return (time.perf_counter() - start) * 1000 / max(n_rows, 1)
     
     def _get_mock_prediction(self, question: str, model_name: str) -> Dict[str, Any]:
         """Generate mock prediction for testing purposes"""
@@ -157,10 +1131,11 @@ class DepartmentClassificationService:
             # Generate random but realistic probabilities
             predictions = {}
             
+            departments = self.state.departments
             # Choose a random department to be dominant
-            dominant_dept = random.choice(self.departments)
+            dominant_dept = random.choice(departments)
             
-            for dept in self.departments:
+            for dept in departments:
                 if dept == dominant_dept:
                     # High confidence for dominant department
                     predictions[dept] = round(random.uniform(0.6, 0.9), 3)
@@ -195,7 +1170,7 @@ class DepartmentClassificationService:
                 "question": question,
                 "predicted_department": "IT",
                 "model_used": model_name,
-                "predictions": {dept: 0.2 for dept in self.departments},
+                "predictions": {dept: 0.2 for dept in self.state.departments},
                 "confidence": 0.2,
                 "is_mock": True,
                 "error": str(e)
@@ -203,48 +1178,131 @@ class DepartmentClassificationService:
     
     def get_available_models(self) -> List[Dict[str, str]]:
         """Get list of available models"""
-        return get_available_models()
+        models = get_available_models()
+        models.append({"value": CASCADE_MODEL, "label": "Cascade (cheapest confident model)"})
+        models.append({"value": ENSEMBLE_MODEL, "label": "Ensemble (all models)"})
+        return models
     
     def get_departments(self) -> List[str]:
         """Get list of available departments"""
-        return self.departments.copy()
+        return list(self.state.departments)
     
     def get_model_status(self) -> Dict[str, Any]:
         """Get status of all models"""
-        model_names = ["MultinomialNB", "SVM", "RandomForest", "LogisticRegression"]
+        state = self.state
+        model_names = BASE_MODELS + [DISTILLED_MODEL]
         status = {}
         
         for model_name in model_names:
             status[model_name] = {
-                "is_trained": model_name in self.trained_models,
-                "available": True
+                "is_trained": model_name in state.trained_models,
+                "available": True,
+                "compressed": model_name in state.compressed_models
             }
         
         return {
             "models": status,
-            "vectorizer_fitted": self.vectorizer.is_fitted,
-            "total_departments": len(self.departments),
-            "departments": self.departments
+            "vectorizer_fitted": state.vectorizer.is_fitted,
+            "total_departments": len(state.departments),
+            "departments": list(state.departments),
+            "hierarchy": {
+                "node_model": state.hierarchy.node_model,
+                "leaves": len(state.hierarchy.leaves),
+                "node_models": len(state.hierarchy.models),
+                "depth": state.hierarchy.depth
+            } if state.hierarchy is not None else None,
+            "similar_questions_indexed": (
+                len(state.similar_index) if state.similar_index is not None else 0
+            ),
+            # Native thread limits of this worker process
+            "compute": compute_resources.get_settings()
         }
     
+    def resident_bytes(self) -> int:
+        """
+        Estimated memory held by the serving state
+        
+        Models count with the size of their joblib artifact. Memory-mapped
+        index arrays and saved term counts that were not read yet are left
+        out, since they take no memory of their own.
+        """
+        state = self.state
+        models = [*state.trained_models.values(), *state.compressed_models.values()]
+        if state.hierarchy is not None:
+            models.append(state.hierarchy)
+        total = state.vectorizer.nbytes + state.hierarchy_vectorizer.nbytes
+        total += sum(self._artifact_size(model) for model in models)
+        if state.similar_index is not None:
+            total += state.similar_index.resident_nbytes
+        return total
+    
     def save_models(self, model_dir: str = "saved_models") -> Dict[str, Any]:
         """Save trained models to disk"""
         try:
+            state = self.state
             os.makedirs(model_dir, exist_ok=True)
             saved_models = []
             
             # Save vectorizer
-            if self.vectorizer.is_fitted:
+            if state.vectorizer.is_fitted:
                 vectorizer_path = os.path.join(model_dir, "vectorizer.joblib")
-                self.vectorizer.save(vectorizer_path)
+                state.vectorizer.save(vectorizer_path)
                 saved_models.append("vectorizer")
+                
+                # Training-only term counts used for incremental refits
+                state.vectorizer.save_term_counts(
+                    os.path.join(model_dir, "term_counts.joblib")
+                )
             
             # Save trained models
-            for model_name, classifier in self.trained_models.items():
+            for model_name, classifier in state.trained_models.items():
                 model_path = os.path.join(model_dir, f"{model_name}.joblib")
                 classifier.save(model_path)
                 saved_models.append(model_name)
             
+            # A student distilled before the last training no longer matches
+            # the saved vectorizer
+            student_path = os.path.join(model_dir, f"{DISTILLED_MODEL}.joblib")
+            if DISTILLED_MODEL not in state.trained_models and os.path.exists(student_path):
+                os.remove(student_path)
+            
+            # Likewise for compressed exports of models retrained since
+            for model_name in COMPRESSIBLE_MODELS:
+                export_path = os.path.join(model_dir, COMPRESSED_DIR, f"{model_name}.joblib")
+                if model_name not in state.compressed_models and os.path.exists(export_path):
+                    os.remove(export_path)
+            
+            # Save the similar-question index as memory-mappable arrays
+            index_dir = os.path.join(model_dir, SIMILAR_INDEX_DIR)
+            if state.similar_index is not None:
+                state.similar_index.save(index_dir)
+                saved_models.append(SIMILAR_INDEX_DIR)
+            elif os.path.isdir(index_dir):
+                shutil.rmtree(index_dir)
+            
+            # Save cascade thresholds
+            with open(os.path.join(model_dir, "cascade.json"), "w") as f:
+                json.dump([stage.to_dict() for stage in state.cascade_stages], f)
+            
+            with open(os.path.join(model_dir, "departments.json"), "w") as f:
+                json.dump(list(state.departments), f)
+            
+            # Save the drift monitoring reference of the training data
+            reference_path = os.path.join(model_dir, MONITORING_REFERENCE_FILE)
+            if state.monitor.reference is not None:
+                with open(reference_path, "w") as f:
+                    json.dump(state.monitor.reference.to_dict(), f)
+            elif os.path.exists(reference_path):
+                os.remove(reference_path)
+            
+            # Save the taxonomy model with its own vectorizer
+            if state.hierarchy is not None:
+                state.hierarchy_vectorizer.save(
+                    os.path.join(model_dir, "hierarchy_vectorizer.joblib")
+                )
+                joblib.dump(state.hierarchy, os.path.join(model_dir, "hierarchy.joblib"))
+                saved_models.append("hierarchy")
+            
             return {
                 "success": True,
                 "message": f"Models saved to {model_dir}",
@@ -261,24 +1319,103 @@ class DepartmentClassificationService:
     def load_models(self, model_dir: str = "saved_models") -> Dict[str, Any]:
         """Load trained models from disk"""
         try:
+            # The bundle is loaded aside and published as one state
+            state = self.state
             loaded_models = []
             
-            # Load vectorizer
+            departments = state.departments
+            departments_path = os.path.join(model_dir, "departments.json")
+            if os.path.exists(departments_path):
+                with open(departments_path) as f:
+                    departments = tuple(json.load(f))
+            
+            # Load vectorizer; models of the previous one are not kept with it
+            vectorizer = state.vectorizer
+            trained_models = dict(state.trained_models)
             vectorizer_path = os.path.join(model_dir, "vectorizer.joblib")
             if os.path.exists(vectorizer_path):
-                self.vectorizer.load(vectorizer_path)
+                # Created with the configured feature dtype, which loading keeps
+                vectorizer = _new_vectorizer()
+                vectorizer.load(vectorizer_path)
+                trained_models = {}
                 loaded_models.append("vectorizer")
+                
+                if vectorizer.load_term_counts(
+                    os.path.join(model_dir, "term_counts.joblib")
+                ):
+                    loaded_models.append("term_counts")
             
             # Load models
-            model_names = ["MultinomialNB", "SVM", "RandomForest", "LogisticRegression"]
+            model_names = BASE_MODELS + [DISTILLED_MODEL]
             for model_name in model_names:
                 model_path = os.path.join(model_dir, f"{model_name}.joblib")
                 if os.path.exists(model_path):
                     classifier = create_classifier(model_name)
                     classifier.load(model_path)
-                    self.trained_models[model_name] = classifier
+                    if settings.float32_features:
+                        classifier.to_float32()
+                    trained_models[model_name] = classifier
                     loaded_models.append(model_name)
             
+            # Load compressed exports of the linear models
+            compressed_models = {}
+            for model_name in COMPRESSIBLE_MODELS:
+                export_path = os.path.join(model_dir, COMPRESSED_DIR, f"{model_name}.joblib")
+                if model_name in trained_models and os.path.exists(export_path):
+                    compressed = CompressedLinearClassifier(model_name)
+                    compressed.load(export_path)
+                    compressed_models[model_name] = compressed
+                    loaded_models.append(f"{COMPRESSED_DIR}/{model_name}")
+            
+            # Open the similar-question index
+            similar_index = None
+            index_dir = os.path.join(model_dir, SIMILAR_INDEX_DIR)
+            if vectorizer.is_fitted and os.path.isdir(index_dir):
+                similar_index = InvertedIndex.load(
+                    index_dir, mmap=settings.similar_questions_mmap
+                )
+                loaded_models.append(SIMILAR_INDEX_DIR)
+            
+            # Load the taxonomy model
+            hierarchy, hierarchy_vectorizer = state.hierarchy, state.hierarchy_vectorizer
+            hierarchy_path = os.path.join(model_dir, "hierarchy.joblib")
+            if os.path.exists(hierarchy_path):
+                hierarchy_vectorizer = _new_vectorizer()
+                hierarchy_vectorizer.load(
+                    os.path.join(model_dir, "hierarchy_vectorizer.joblib")
+                )
+                hierarchy = joblib.load(hierarchy_path)
+                if settings.float32_features:
+                    hierarchy.to_float32()
+                loaded_models.append("hierarchy")
+            
+            # Load cascade thresholds
+            cascade_stages = state.cascade_stages
+            cascade_path = os.path.join(model_dir, "cascade.json")
+            if os.path.exists(cascade_path):
+                with open(cascade_path) as f:
+                    cascade_stages = tuple(CascadeStage(**stage) for stage in json.load(f))
+            
+            # Restart drift monitoring against the saved reference, if any
+            reference = None
+            reference_path = os.path.join(model_dir, MONITORING_REFERENCE_FILE)
+            if os.path.exists(reference_path):
+                with open(reference_path) as f:
+                    reference = ReferenceProfile(**json.load(f))
+                loaded_models.append("monitoring_reference")
+            
+            self._publish(
+                departments=departments,
+                vectorizer=vectorizer,
+                trained_models=trained_models,
+                compressed_models=compressed_models,
+                similar_index=similar_index,
+                hierarchy=hierarchy,
+                hierarchy_vectorizer=hierarchy_vectorizer,
+                cascade_stages=cascade_stages,
+                monitor=self._create_monitor(reference)
+            )
+            
             return {
                 "success": True,
                 "message": f"Models loaded from {model_dir}",
@@ -295,3 +1432,6 @@ class DepartmentClassificationService:
 
 # Create a singleton instance
 classification_service = DepartmentClassificationService()
+
+# In-flight /classify-question computations shared by identical requests
+classification_flights = SingleFlight()
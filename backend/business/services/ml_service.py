@@ -1,16 +1,34 @@
 """
 Machine Learning Service Layer
 """
+import os
+import threading
+from datetime import datetime
 import numpy as np
-import pandas as pd
-from typing import Dict, List, Any
-from infrastructure.ml.base_models import ClassificationModel, RegressionModel
+from typing import AsyncIterator, Callable, Dict, List, Any, Optional, Union
+from infrastructure.ml.base_models import MLModel, ClassificationModel, RegressionModel
+from infrastructure.ml.compute import compute_resources
+from infrastructure.ml.least_squares import LeastSquaresStatistics
+from infrastructure.ml.model_store import ModelStore
+from infrastructure.data.schema import FeatureRow, TableSchema, columns_of_records
+from infrastructure.data.encoding import ndjson_records
+from infrastructure.data.tabular import iter_file_chunks
+from common.config import settings
 from common.exceptions import ValidationError, PredictionError
 from common.utils import format_response
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Trees split on float32 internally; least squares keeps float64 to stay exact
+CLASSIFICATION_DTYPE = "float32"
+REGRESSION_DTYPE = "float64"
+
+# Feature rows of a prediction request: a numeric matrix, {name: column}, or JSON rows
+FeatureTable = Union[np.ndarray, Dict[str, Any], List[FeatureRow]]
+# Encodes a chunk of streamed records into response bytes
+RecordEncoder = Callable[[List[Dict[str, Any]]], bytes]
+
 
 class MLService:
     """Machine Learning Service"""
@@ -18,27 +36,48 @@ class MLService:
     def __init__(self):
         self.classification_model = ClassificationModel()
         self.regression_model = RegressionModel()
+        self.store = ModelStore(settings.ml_model_dir, settings.ml_model_versions)
+        # Incremental regression updates build on the model they replace;
+        # one at a time, so none is lost
+        self._regression_update_lock = threading.Lock()
         
-    def train_classification_model(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    @compute_resources.training()
+    def train_classification_model(
+        self, data: List[Dict[str, Any]], schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Train classification model with provided data"""
+        if not data:
+            raise ValidationError("Training data cannot be empty")
+        names, columns = columns_of_records(data)
+        return self.train_classification_table(names, columns, schema)
+    
+    @compute_resources.training()
+    def train_classification_table(
+        self, names: List[str], columns: List[Any], schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Train classification model on named columns of any type
+        
+        The schema is declared or inferred from the columns, the last column
+        being the target; categorical columns are dictionary-encoded.
+        """
+        table_schema, X, y = self._encode_training_table(
+            names, columns, schema, one_hot=False, dtype=CLASSIFICATION_DTYPE
+        )
+        return self.train_classification_arrays(X, y, table_schema)
+    
+    @compute_resources.training()
+    def train_classification_arrays(
+        self, X: np.ndarray, y: np.ndarray, schema: Optional[TableSchema] = None
+    ) -> Dict[str, Any]:
+        """Train classification model on a decoded feature matrix and target"""
         try:
-            # Convert data to DataFrame
-            df = pd.DataFrame(data)
-            
-            if df.empty:
-                raise ValidationError("Training data cannot be empty")
-                
-            # Assuming last column is target variable
-            if len(df.columns) < 2:
-                raise ValidationError(
-                    "Data must have at least 2 columns (features and target)"
-                )
-                
-            X = df.iloc[:, :-1].values
-            y = df.iloc[:, -1].values
-            
-            # Train the model
-            training_results = self.classification_model.train(X, y)
+            # Trained aside and swapped in, so predictions never see a half-fit model
+            model = self._new_classification_model()
+            training_results = model.train(X, y)
+            model.schema = schema or TableSchema.numeric(X.shape[1], CLASSIFICATION_DTYPE)
+            self.classification_model = model
+            training_results["version"] = self._persist("classification", training_results)
             
             logger.info(
                 f"Classification model trained with accuracy: "
@@ -54,28 +93,135 @@ class MLService:
             logger.error(f"Error training classification model: {str(e)}")
             raise PredictionError(f"Failed to train model: {str(e)}")
     
+    @compute_resources.training()
+    def train_classification_from_files(
+        self, paths: List[str], method: str = "forest", chunk_rows: int = 100000, **options
+    ) -> Dict[str, Any]:
+        """
+        Train classification model out of core from .npy/.csv files
+        
+        Files are resolved inside the configured data directory and read in
+        chunks of ``chunk_rows`` rows on every pass.
+        """
+        if not paths:
+            raise ValidationError("At least one file is required")
+        data_dir = os.path.realpath(settings.ml_data_dir)
+        resolved = []
+        for path in paths:
+            full_path = os.path.realpath(os.path.join(data_dir, path))
+            if os.path.commonpath([data_dir, full_path]) != data_dir:
+                raise ValidationError(f"'{path}' is outside the data directory")
+            if not os.path.isfile(full_path):
+                raise ValidationError(f"'{path}' does not exist in the data directory")
+            resolved.append(full_path)
+        
+        model = self._new_classification_model()
+        try:
+            training_results = model.train_out_of_core(
+                lambda: iter_file_chunks(resolved, chunk_rows), method, **options
+            )
+        except ValueError as e:
+            raise ValidationError(str(e))
+        model.schema = TableSchema.numeric(model.model.n_features_in_, CLASSIFICATION_DTYPE)
+        self.classification_model = model
+        training_results["version"] = self._persist("classification", training_results)
+        
+        logger.info(
+            f"Classification model trained out of core ({method}) with accuracy: "
+            f"{training_results['accuracy']}"
+        )
+        return format_response(
+            training_results,
+            "Classification model trained successfully"
+        )
+    
+    @compute_resources.training()
     def train_regression_model(
-        self, data: List[Dict[str, Any]]
+        self,
+        data: List[Dict[str, Any]],
+        incremental: bool = False,
+        forgetting: float = 1.0,
+        schema: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Train regression model with provided data"""
+        if not data:
+            raise ValidationError("Training data cannot be empty")
+        names, columns = columns_of_records(data)
+        return self.train_regression_table(names, columns, incremental, forgetting, schema)
+    
+    @compute_resources.training()
+    def train_regression_table(
+        self,
+        names: List[str],
+        columns: List[Any],
+        incremental: bool = False,
+        forgetting: float = 1.0,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Train regression model on named columns of any type
+        
+        Categorical columns are one-hot encoded. An incremental update keeps
+        the schema of the current fit, so its columns stay aligned.
+        """
+        if incremental and self.regression_model.schema is not None and schema is None:
+            try:
+                table_schema = self.regression_model.schema
+                data = dict(zip(names, columns))
+                X = table_schema.encode_columns(data)
+                y = table_schema.target_values(data, numeric=True)
+            except ValueError as e:
+                raise ValidationError(str(e))
+        else:
+            table_schema, X, y = self._encode_training_table(
+                names, columns, schema, one_hot=True, dtype=REGRESSION_DTYPE, numeric_target=True
+            )
+        return self.train_regression_arrays(X, y, incremental, forgetting, table_schema)
+    
+    @compute_resources.training()
+    def train_regression_arrays(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+        incremental: bool = False,
+        forgetting: float = 1.0,
+        schema: Optional[TableSchema] = None
+    ) -> Dict[str, Any]:
+        """
+        Train regression model on a decoded feature matrix and target
+        
+        With ``incremental`` the rows are added to the statistics of the
+        current fit instead of replacing it; ``forgetting`` is the weight
+        kept by all earlier rows.
+        """
+        if incremental and schema is None and self.regression_model.schema is not None:
+            # Raw rows of a binary table, encoded like the rows before them
+            schema = self.regression_model.schema
+            try:
+                X = schema.encode_matrix(X)
+            except ValueError as e:
+                raise ValidationError(str(e))
+        schema = schema or TableSchema.numeric(X.shape[1], REGRESSION_DTYPE)
+        if incremental:
+            # The serving model is left as is; predictions switch to the
+            # updated copy in one assignment
+            with self._regression_update_lock:
+                try:
+                    model, training_results = self.regression_model.partial_fit(
+                        X, y, forgetting
+                    )
+                except ValueError as e:
+                    raise ValidationError(str(e))
+                model.schema = schema
+                self.regression_model = model
+                return self._publish_regression(training_results)
+        
         try:
-            # Convert data to DataFrame
-            df = pd.DataFrame(data)
-            
-            if df.empty:
-                raise ValidationError("Training data cannot be empty")
-                
-            # Assuming last column is target variable
-            if len(df.columns) < 2:
-                raise ValidationError(
-                    "Data must have at least 2 columns (features and target)"
-                )
-                
-            X = df.iloc[:, :-1].values
-            y = df.iloc[:, -1].values
-            
-            # Train the model
-            training_results = self.regression_model.train(X, y)
+            model = RegressionModel()
+            training_results = model.train(X, y)
+            model.schema = schema
+            self.regression_model = model
+            training_results["version"] = self._persist("regression", training_results)
             
             logger.info(
                 f"Regression model trained with MSE: {training_results['mse']}"
@@ -90,31 +236,82 @@ class MLService:
             logger.error(f"Error training regression model: {str(e)}")
             raise PredictionError(f"Failed to train model: {str(e)}")
     
-    def predict_classification(self, features: List[float]) -> Dict[str, Any]:
+    @compute_resources.training()
+    def merge_regression_statistics(self, statistics: LeastSquaresStatistics) -> Dict[str, Any]:
+        """Fold least-squares statistics computed on another worker into the model"""
+        with self._regression_update_lock:
+            try:
+                model, training_results = self.regression_model.merge_statistics(statistics)
+            except ValueError as e:
+                raise ValidationError(str(e))
+            if model.schema is None:
+                model.schema = TableSchema.numeric(statistics.n_features, REGRESSION_DTYPE)
+            self.regression_model = model
+            return self._publish_regression(training_results)
+    
+    def _encode_training_table(
+        self,
+        names: List[str],
+        columns: List[Any],
+        schema: Optional[Dict[str, Any]],
+        one_hot: bool,
+        dtype: str,
+        numeric_target: bool = False
+    ):
+        """Fit a declared or inferred schema and encode the table with it"""
+        try:
+            if schema is not None:
+                table_schema = TableSchema.from_dict(
+                    {**schema, "target": schema.get("target") or names[-1]}, one_hot, dtype
+                ).fit(dict(zip(names, columns)))
+            else:
+                table_schema = TableSchema.infer(names, columns, one_hot=one_hot, dtype=dtype)
+            data = dict(zip(names, columns))
+            return (
+                table_schema,
+                table_schema.encode_columns(data),
+                table_schema.target_values(data, numeric=numeric_target)
+            )
+        except ValueError as e:
+            raise ValidationError(str(e))
+    
+    def _publish_regression(self, training_results: Dict[str, Any]) -> Dict[str, Any]:
+        training_results["version"] = self._persist("regression", training_results)
+        logger.info(
+            f"Regression model updated ({training_results['mode']}) with in-sample MSE: "
+            f"{training_results['mse']}"
+        )
+        return format_response(training_results, "Regression model updated successfully")
+    
+    @compute_resources.inference()
+    def predict_classification(self, features: FeatureRow) -> Dict[str, Any]:
         """Make classification prediction"""
         try:
             if not self.classification_model.is_trained:
                 raise ValidationError("Classification model is not trained yet")
-                
-            X = np.array([features])
+            
+            X = self._encode_row(self.classification_model, features)
             prediction = self.classification_model.predict(X)
             
             return format_response(
-                {"prediction": int(prediction[0])},  # Convert to Python int
+                {"prediction": _label(prediction[0])},
                 "Classification prediction completed"
             )
             
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error making classification prediction: {str(e)}")
             raise PredictionError(f"Failed to make prediction: {str(e)}")
     
-    def predict_regression(self, features: List[float]) -> Dict[str, Any]:
+    @compute_resources.inference()
+    def predict_regression(self, features: FeatureRow) -> Dict[str, Any]:
         """Make regression prediction"""
         try:
             if not self.regression_model.is_trained:
                 raise ValidationError("Regression model is not trained yet")
                 
-            X = np.array([features])
+            X = self._encode_row(self.regression_model, features)
             prediction = self.regression_model.predict(X)
             
             return format_response(
@@ -122,19 +319,228 @@ class MLService:
                 "Regression prediction completed"
             )
             
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error making regression prediction: {str(e)}")
             raise PredictionError(f"Failed to make prediction: {str(e)}")
     
+    @compute_resources.inference()
+    def predict_classification_batch(self, features: FeatureTable) -> Dict[str, Any]:
+        """
+        Make classification predictions for every row of a feature matrix,
+        a ``{name: column}`` table or a list of JSON rows
+        """
+        try:
+            if not self.classification_model.is_trained:
+                raise ValidationError("Classification model is not trained yet")
+            
+            X = self._encode_table(self.classification_model, features)
+            predictions = self.classification_model.predict(X)
+            
+            return format_response(
+                {"predictions": predictions.tolist()},
+                "Classification prediction completed"
+            )
+            
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error making classification prediction: {str(e)}")
+            raise PredictionError(f"Failed to make prediction: {str(e)}")
+    
+    @compute_resources.inference()
+    def predict_regression_batch(self, features: FeatureTable) -> Dict[str, Any]:
+        """
+        Make regression predictions for every row of a feature matrix,
+        a ``{name: column}`` table or a list of JSON rows
+        """
+        try:
+            if not self.regression_model.is_trained:
+                raise ValidationError("Regression model is not trained yet")
+            
+            X = self._encode_table(self.regression_model, features)
+            predictions = self.regression_model.predict(X)
+            
+            return format_response(
+                {"predictions": predictions.astype(float).tolist()},
+                "Regression prediction completed"
+            )
+            
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error making regression prediction: {str(e)}")
+            raise PredictionError(f"Failed to make prediction: {str(e)}")
+    
+    def _encode_row(self, model: MLModel, features: FeatureRow) -> np.ndarray:
+        """One JSON row encoded with the model's cached schema"""
+        try:
+            if model.schema is None:
+                return np.array([features], dtype=np.float64)
+            return model.schema.encode_row(features)
+        except (TypeError, ValueError) as e:
+            raise ValidationError(f"Invalid features: {e}")
+    
+    def _encode_table(self, model: MLModel, features: FeatureTable) -> np.ndarray:
+        """Feature rows of a request encoded with the model's cached schema"""
+        try:
+            if model.schema is None:
+                return np.asarray(features, dtype=np.float64)
+            if isinstance(features, np.ndarray):
+                return model.schema.encode_matrix(features)
+            if isinstance(features, dict):
+                return model.schema.encode_columns(features)
+            return model.schema.encode_records(features)
+        except (TypeError, ValueError) as e:
+            raise ValidationError(f"Invalid features: {e}")
+    
+    def stream_predictions(
+        self, model_type: str, batches: AsyncIterator[np.ndarray],
+        encode: RecordEncoder = ndjson_records
+    ) -> AsyncIterator[bytes]:
+        """
+        Encoded prediction records (NDJSON lines by default) for a stream of
+        feature matrices
+        
+        Each matrix is predicted in one vectorized call and its records are
+        encoded together. The model is checked before the stream starts;
+        later errors can no longer change the response status, so they end
+        the stream with an ``{"error": ...}`` record.
+        """
+        return self._predict_chunks(
+            model_type, self._trained_model(model_type), batches, encode
+        )
+    
+    async def _predict_chunks(
+        self, model_type: str, model, batches: AsyncIterator[np.ndarray],
+        encode: RecordEncoder
+    ) -> AsyncIterator[bytes]:
+        rows = 0
+        try:
+            async for X in batches:
+                if model.schema is not None:
+                    X = model.schema.encode_matrix(X)
+                predictions = model.predict(X)
+                if model_type == "regression":
+                    predictions = predictions.astype(float)
+                rows += len(predictions)
+                yield encode([{"prediction": prediction} for prediction in predictions.tolist()])
+        except Exception as e:
+            logger.error(
+                f"Error streaming {model_type} predictions after {rows} rows: {str(e)}"
+            )
+            yield encode([{"error": str(e), "rows": rows}])
+    
+    def _trained_model(self, model_type: str):
+        """Model by type, checked to be trained"""
+        models = self._models()
+        if model_type not in models:
+            raise ValidationError(f"Unknown model type: {model_type}")
+        if not models[model_type].is_trained:
+            raise ValidationError(f"{model_type.capitalize()} model is not trained yet")
+        return models[model_type]
+    
     def get_model_status(self) -> Dict[str, Any]:
         """Get status of all models"""
         return format_response({
-            "classification_model": {
-                "is_trained": self.classification_model.is_trained,
-                "model_type": "RandomForestClassifier"
-            },
-            "regression_model": {
-                "is_trained": self.regression_model.is_trained,
-                "model_type": "LinearRegression"
+            f"{model_type}_model": {
+                "is_trained": model.is_trained,
+                "model_type": model.model_type,
+                "version": model.metadata.get("version"),
+                "trained_at": model.metadata.get("trained_at"),
+                "schema_hash": model.metadata.get("schema_hash")
             }
+            for model_type, model in self._models().items()
         }, "Model status retrieved successfully")
+    
+    def restore_models(
+        self, model_type: Optional[str] = None, version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Replace the in-memory models with their newest usable saved version
+        
+        Also picks up models another worker has saved since. With
+        ``model_type`` and ``version`` a specific version is restored, e.g.
+        to roll back.
+        """
+        if model_type is not None and model_type not in self._models():
+            raise ValidationError(f"Unknown model type: {model_type}")
+        factories = {"classification": ClassificationModel, "regression": RegressionModel}
+        restored = {}
+        for kind, factory in factories.items():
+            if model_type not in (None, kind):
+                continue
+            try:
+                result = self.store.load(kind, factory, version, mmap=settings.ml_model_mmap)
+            except ValueError as e:
+                raise ValidationError(str(e))
+            if result is None:
+                restored[kind] = None
+                continue
+            model, model.metadata = result
+            setattr(self, f"{kind}_model", model)
+            restored[kind] = model.metadata["version"]
+            logger.info(f"Restored {kind} model version {restored[kind]}")
+        return format_response({"restored": restored}, "Models restored from the model store")
+    
+    def list_model_versions(self, model_type: str) -> Dict[str, Any]:
+        """Saved versions of a model with their training metadata, newest first"""
+        if model_type not in self._models():
+            raise ValidationError(f"Unknown model type: {model_type}")
+        return format_response(
+            {"versions": self.store.versions(model_type)},
+            "Model versions retrieved successfully"
+        )
+    
+    def _persist(self, model_type: str, training_results: Dict[str, Any]) -> Optional[str]:
+        """
+        Save a freshly trained model as a new store version
+        
+        A failed save is logged and leaves the trained model in service.
+        """
+        model = self._models()[model_type]
+        metadata = {
+            "model_type": model_type,
+            "estimator": model.model_type,
+            "data_shape": [
+                int(training_results.get("train_size", 0) + training_results.get("test_size", 0)),
+                model.schema.width
+            ],
+            "schema_hash": model.schema.fingerprint(),
+            "metrics": {
+                key: value for key, value in training_results.items() if key != "version"
+            },
+            "trained_at": datetime.now().isoformat()
+        }
+        try:
+            version = self.store.save(model_type, model, metadata)
+        except Exception as e:
+            logger.error(f"Error saving {model_type} model: {str(e)}")
+            model.metadata = metadata
+            return None
+        model.metadata = {**metadata, "version": version}
+        return version
+    
+    def _new_classification_model(self) -> ClassificationModel:
+        """Untrained model configured like the serving one"""
+        return ClassificationModel(
+            self.classification_model.n_estimators, self.classification_model.random_state
+        )
+    
+    def _models(self) -> Dict[str, MLModel]:
+        return {
+            "classification": self.classification_model,
+            "regression": self.regression_model
+        }
+    
+    def get_schema(self, model_type: str) -> Dict[str, Any]:
+        """Column types and categorical encodings the model encodes requests with"""
+        model = self._trained_model(model_type)
+        if model.schema is None:
+            raise ValidationError(f"{model_type.capitalize()} model has no schema")
+        return format_response(model.schema.to_dict(), "Model schema retrieved successfully")
+
+def _label(prediction: Any) -> Any:
+    """JSON value of a class label; numeric labels stay ints as before"""
+    return int(prediction) if np.asarray(prediction).dtype.kind in "biuf" else str(prediction)
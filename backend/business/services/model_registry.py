@@ -0,0 +1,235 @@
+"""
+Tenant-aware registry of classification model bundles
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from business.services.classification_service import DepartmentClassificationService
+from common.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class UnknownTenantError(ValueError):
+    """The tenant has no saved model bundle"""
+
+
+class TenantModelRegistry:
+    """
+    Per-tenant classification services loaded on demand under a memory budget
+
+    Each tenant owns a bundle (vectorizer, models and department list)
+    stored in ``<root_dir>/<tenant_id>``. A bundle is loaded the first time
+    the tenant is used and kept in an LRU order; when the loaded bundles
+    exceed the budget, the least recently used ones are dropped. Bundles
+    are saved right after training, so eviction never loses work. A
+    bundle's memory is estimated from its loaded objects (see
+    ``DepartmentClassificationService.resident_bytes``).
+
+    The registry lock only guards the maps and counters. Loading and
+    training hold a per-tenant lock instead, so they never delay lookups
+    of other tenants or cache hits of the same one.
+    """
+
+    def __init__(self, root_dir: str, memory_budget_bytes: int, latency_window: int = 1000):
+        self.root_dir = root_dir
+        self.memory_budget_bytes = memory_budget_bytes
+        self._bundles: "OrderedDict[str, DepartmentClassificationService]" = OrderedDict()
+        self._bundle_bytes: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        # Serializes loading and training per tenant; only created for
+        # tenants with a bundle on disk or being trained
+        self._tenant_locks: Dict[str, threading.Lock] = {}
+        self._load_latency_ms = deque(maxlen=latency_window)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, tenant_id: str) -> DepartmentClassificationService:
+        """
+        Return the tenant's service, loading its bundle if needed
+
+        Raises:
+            UnknownTenantError: If the tenant has no saved bundle
+            ValueError: If the tenant id is invalid or its bundle fails to load
+        """
+        self._validate(tenant_id)
+        service = self._resident(tenant_id)
+        if service is not None:
+            return service
+        if not os.path.isdir(self._tenant_dir(tenant_id)):
+            raise UnknownTenantError(f"No model bundle for tenant '{tenant_id}'")
+
+        with self._tenant_lock(tenant_id):
+            # Another request may have loaded the bundle while this one waited
+            service = self._resident(tenant_id) or self._load(tenant_id)
+            if service is None:
+                raise UnknownTenantError(f"No model bundle for tenant '{tenant_id}'")
+            return service
+
+    def train(self, tenant_id: str, questions: List[str], departments: List[str]) -> Dict[str, Any]:
+        """
+        Train and persist the tenant's bundle
+
+        Raises:
+            ValueError: If the tenant id is invalid
+        """
+        return self._update(
+            tenant_id, lambda service: service.train_models(questions, departments)
+        )
+
+    def train_hierarchy(
+        self, tenant_id: str, questions: List[str], paths: List[str], **options
+    ) -> Dict[str, Any]:
+        """
+        Train and persist the tenant's hierarchical classifier
+
+        Raises:
+            ValueError: If the tenant id is invalid
+        """
+        return self._update(
+            tenant_id, lambda service: service.train_hierarchy(questions, paths, **options)
+        )
+
+    def _update(
+        self, tenant_id: str, action: Callable[[DepartmentClassificationService], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Apply a training action to a tenant's bundle and save it
+
+        A tenant without a bundle starts from an empty service, which is
+        only kept once it was trained and saved.
+        """
+        self._validate(tenant_id)
+        with self._tenant_lock(tenant_id):
+            service = (
+                self._resident(tenant_id, count=False)
+                or self._load(tenant_id)
+                or DepartmentClassificationService()
+            )
+            result = action(service)
+            if result["success"]:
+                tenant_dir = self._tenant_dir(tenant_id)
+                save_result = service.save_models(tenant_dir)
+                if not save_result["success"]:
+                    # An unsaved bundle must not be evicted; drop it instead
+                    self.evict(tenant_id)
+                    return {**result, "success": False, "message": save_result["message"]}
+                self._install(tenant_id, service, service.resident_bytes())
+            return result
+
+    def _resident(
+        self, tenant_id: str, count: bool = True
+    ) -> Optional[DepartmentClassificationService]:
+        """The tenant's loaded service, marked as most recently used"""
+        with self._lock:
+            service = self._bundles.get(tenant_id)
+            if service is not None:
+                if count:
+                    self.hits += 1
+                self._bundles.move_to_end(tenant_id)
+            return service
+
+    def _load(self, tenant_id: str) -> Optional[DepartmentClassificationService]:
+        """
+        Load the tenant's bundle from disk; None if it has none
+
+        Called with the tenant lock held, outside the registry lock.
+        """
+        tenant_dir = self._tenant_dir(tenant_id)
+        if not os.path.isdir(tenant_dir):
+            return None
+        start = time.perf_counter()
+        service = DepartmentClassificationService()
+        result = service.load_models(tenant_dir)
+        if not result["success"]:
+            raise ValueError(result["message"])
+        latency_ms = (time.perf_counter() - start) * 1000
+        size = service.resident_bytes()
+        with self._lock:
+            self.misses += 1
+            self._load_latency_ms.append(latency_ms)
+        self._install(tenant_id, service, size)
+        return service
+
+    def _install(self, tenant_id: str, service: DepartmentClassificationService, size: int):
+        """Make a loaded or trained service resident and enforce the budget"""
+        with self._lock:
+            self._bundles[tenant_id] = service
+            self._bundles.move_to_end(tenant_id)
+            self._bundle_bytes[tenant_id] = size
+            self._enforce_budget(keep=tenant_id)
+
+    def _tenant_lock(self, tenant_id: str) -> threading.Lock:
+        with self._lock:
+            return self._tenant_locks.setdefault(tenant_id, threading.Lock())
+
+    def evict(self, tenant_id: str) -> bool:
+        """Drop a tenant's loaded bundle; it reloads from disk on next use"""
+        with self._lock:
+            if self._bundles.pop(tenant_id, None) is None:
+                return False
+            self._bundle_bytes.pop(tenant_id, None)
+            self.evictions += 1
+            return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Hit/miss counts, load latency and the loaded tenant bundles"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            latencies = np.array(self._load_latency_ms)
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "load_latency_ms": {
+                    "count": len(latencies),
+                    "mean": round(float(latencies.mean()), 3) if len(latencies) else 0.0,
+                    "p50": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else 0.0,
+                    "p99": round(float(np.percentile(latencies, 99)), 3) if len(latencies) else 0.0
+                },
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "resident_bytes": sum(self._bundle_bytes.values()),
+                # Least recently used first
+                "tenants": [
+                    {"tenant_id": tenant_id, "bytes": self._bundle_bytes[tenant_id]}
+                    for tenant_id in self._bundles
+                ]
+            }
+
+    def _enforce_budget(self, keep: str):
+        """Evict least recently used bundles until the budget is met"""
+        while sum(self._bundle_bytes.values()) > self.memory_budget_bytes:
+            victim = next((t for t in self._bundles if t != keep), None)
+            if victim is None:
+                logger.warning(
+                    f"Bundle of tenant {keep} alone exceeds the model memory budget"
+                )
+                return
+            self.evict(victim)
+            logger.info(f"Evicted model bundle of tenant {victim}")
+
+    def _tenant_dir(self, tenant_id: str) -> str:
+        return os.path.join(self.root_dir, tenant_id)
+
+    @staticmethod
+    def _validate(tenant_id: str):
+        if not TENANT_ID_PATTERN.match(tenant_id or ""):
+            raise ValueError(
+                "Tenant id must be 1-64 letters, digits, '-' or '_'"
+            )
+
+
+# Create a singleton instance
+model_registry = TenantModelRegistry(
+    root_dir=settings.tenant_model_dir,
+    memory_budget_bytes=int(settings.model_memory_budget_mb * 1024 * 1024)
+)
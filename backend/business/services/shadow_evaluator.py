@@ -0,0 +1,302 @@
+"""
+Shadow evaluation of a candidate classification bundle on live traffic
+"""
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import numpy as np
+from business.services.classification_service import DepartmentClassificationService
+from common.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class ShadowEvaluator:
+    """
+    Mirrors a sample of /classify-question traffic to a candidate bundle
+
+    A candidate (vectorizer, models and department list, as saved by
+    ``save_models``) is loaded next to the service it shadows. After the
+    primary answer is computed, ``mirror`` puts a sampled question on a
+    bounded queue without waiting; when the queue is full the question is
+    dropped. A single background thread with a raised nice value classifies
+    the queued questions with the candidate and aggregates agreement with
+    the primary answer, confidence deltas and candidate latency.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        queue_size: int,
+        sample_rate: float,
+        niceness: int = 10,
+        latency_window: int = 1000,
+        recent_disagreements: int = 20
+    ):
+        self.root_dir = root_dir
+        self.sample_rate = sample_rate
+        self.niceness = niceness
+        self.candidate: Optional[DepartmentClassificationService] = None
+        self.candidate_name: Optional[str] = None
+        # Tenant whose traffic is mirrored; None for the default service
+        self.tenant_id: Optional[str] = None
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max(queue_size, 1))
+        self._lock = threading.RLock()
+        self._worker: Optional[threading.Thread] = None
+        self._random = random.Random()
+        # Bumped per candidate so questions queued for an earlier one are skipped
+        self._generation = 0
+        self._latency_window = latency_window
+        self._recent_disagreements = recent_disagreements
+        self._reset_metrics()
+
+    def _reset_metrics(self):
+        self.started_at: Optional[str] = None
+        self.mirrored = 0
+        self.dropped = 0
+        self.evaluated = 0
+        self.errors = 0
+        self.mock = 0
+        self.agreements = 0
+        self.compared = 0
+        self._confidence_delta_sum = 0.0
+        self._confidence_delta_abs_sum = 0.0
+        self._latency_ms = deque(maxlen=self._latency_window)
+        self._disagreements: Counter = Counter()
+        self._recent = deque(maxlen=self._recent_disagreements)
+
+    def load_candidate(
+        self, name: str, tenant_id: Optional[str] = None, sample_rate: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Shadow traffic with the bundle saved in ``<root_dir>/<name>``
+
+        Raises:
+            ValueError: If the name is invalid or the bundle fails to load
+        """
+        path = self._candidate_dir(name)
+        if not os.path.isdir(path):
+            raise ValueError(f"No candidate bundle named '{name}'")
+        candidate = self._new_candidate()
+        result = candidate.load_models(path)
+        if not result["success"]:
+            raise ValueError(result["message"])
+        self._start(name, candidate, tenant_id, sample_rate)
+        return self.get_metrics()
+
+    def train_candidate(
+        self,
+        name: str,
+        questions: List[str],
+        departments: List[str],
+        tenant_id: Optional[str] = None,
+        sample_rate: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Train a candidate bundle, save it as ``<root_dir>/<name>`` and shadow
+        traffic with it
+
+        Raises:
+            ValueError: If the name is invalid or training or saving fails
+        """
+        path = self._candidate_dir(name)
+        candidate = self._new_candidate()
+        result = candidate.train_models(questions, departments)
+        if not result["success"]:
+            raise ValueError(result["message"])
+        save_result = candidate.save_models(path)
+        if not save_result["success"]:
+            raise ValueError(save_result["message"])
+        self._start(name, candidate, tenant_id, sample_rate)
+        return {**self.get_metrics(), "training": result["results"]}
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop shadowing; returns the final metrics of the candidate"""
+        with self._lock:
+            metrics = self.get_metrics()
+            self._generation += 1
+            self.candidate = None
+            self.candidate_name = None
+            self.tenant_id = None
+        return metrics
+
+    def mirror(
+        self,
+        tenant_id: Optional[str],
+        question: str,
+        model_name: str,
+        weights: Optional[Dict[str, float]],
+        voting: str,
+        primary: Dict[str, Any]
+    ) -> bool:
+        """Queue a sampled question for the candidate; never blocks"""
+        candidate = self.candidate
+        if candidate is None or tenant_id != self.tenant_id:
+            return False
+        if self._random.random() >= self.sample_rate:
+            return False
+        item = (
+            self._generation, candidate, question, model_name, weights, voting,
+            primary.get("predicted_department"), primary.get("confidence"),
+            primary.get("is_mock", False)
+        )
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.mirrored += 1
+        return True
+
+    @staticmethod
+    def _new_candidate() -> DepartmentClassificationService:
+        """
+        Service for a candidate bundle
+
+        Ensemble scoring stays on the calling thread rather than the scoring
+        pool primary traffic uses, so it runs at the shadow worker's priority.
+        """
+        candidate = DepartmentClassificationService()
+        candidate._scoring_pool = None
+        return candidate
+
+    def _start(
+        self,
+        name: str,
+        candidate: DepartmentClassificationService,
+        tenant_id: Optional[str],
+        sample_rate: Optional[float]
+    ):
+        with self._lock:
+            self._generation += 1
+            self.candidate = candidate
+            self.candidate_name = name
+            self.tenant_id = tenant_id
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            self._reset_metrics()
+            self.started_at = datetime.now().isoformat()
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="shadow-evaluator", daemon=True
+                )
+                self._worker.start()
+        logger.info(f"Shadowing {tenant_id or 'default'} traffic with candidate {name}")
+
+    def _run(self):
+        try:
+            # Linux schedules threads individually, so this lowers only the worker
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.niceness)
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not lower the shadow worker's priority: {str(e)}")
+        while True:
+            item = self._queue.get()
+            try:
+                self._evaluate(*item)
+            except Exception as e:
+                logger.error(f"Shadow evaluation failed: {str(e)}")
+
+    def _evaluate(
+        self, generation, candidate, question, model_name, weights, voting,
+        primary_department, primary_confidence, primary_mock
+    ):
+        if generation != self._generation:
+            return
+        start = time.perf_counter()
+        try:
+            result = candidate.classify_question(question, model_name, weights, voting)
+        except Exception:
+            with self._lock:
+                if generation == self._generation:
+                    self.errors += 1
+            raise
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.evaluated += 1
+            self._latency_ms.append(latency_ms)
+            if primary_mock or result.get("is_mock", False):
+                # Placeholder answers say nothing about either bundle
+                self.mock += 1
+                return
+            self.compared += 1
+            delta = float(result["confidence"]) - float(primary_confidence)
+            self._confidence_delta_sum += delta
+            self._confidence_delta_abs_sum += abs(delta)
+            candidate_department = str(result["predicted_department"])
+            if candidate_department == str(primary_department):
+                self.agreements += 1
+            else:
+                self._disagreements[f"{primary_department} -> {candidate_department}"] += 1
+                self._recent.append({
+                    "question": question,
+                    "model": model_name,
+                    "primary": str(primary_department),
+                    "candidate": candidate_department,
+                    "primary_confidence": round(float(primary_confidence), 4),
+                    "candidate_confidence": round(float(result["confidence"]), 4)
+                })
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Agreement, confidence deltas and candidate latency of the current candidate"""
+        with self._lock:
+            latencies = np.array(self._latency_ms)
+            compared = self.compared
+            return {
+                "active": self.candidate is not None,
+                "candidate": self.candidate_name,
+                "tenant_id": self.tenant_id,
+                "started_at": self.started_at,
+                "sample_rate": self.sample_rate,
+                "queue_size": self._queue.maxsize,
+                "queue_depth": self._queue.qsize(),
+                "mirrored": self.mirrored,
+                "dropped": self.dropped,
+                "evaluated": self.evaluated,
+                "errors": self.errors,
+                "mock": self.mock,
+                "compared": compared,
+                "agreement_rate": round(self.agreements / compared, 4) if compared else None,
+                "confidence_delta": {
+                    "mean": round(self._confidence_delta_sum / compared, 4) if compared else None,
+                    "mean_abs": (
+                        round(self._confidence_delta_abs_sum / compared, 4) if compared else None
+                    )
+                },
+                "candidate_latency_ms": {
+                    "count": len(latencies),
+                    "mean": round(float(latencies.mean()), 3) if len(latencies) else 0.0,
+                    "p50": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else 0.0,
+                    "p99": round(float(np.percentile(latencies, 99)), 3) if len(latencies) else 0.0
+                },
+                # Primary -> candidate department, most frequent first
+                "disagreements": dict(self._disagreements.most_common(10)),
+                "recent_disagreements": list(self._recent)
+            }
+
+    def _candidate_dir(self, name: str) -> str:
+        if not CANDIDATE_NAME_PATTERN.match(name or ""):
+            raise ValueError("Candidate name must be 1-64 letters, digits, '-' or '_'")
+        return os.path.join(self.root_dir, name)
+
+
+# Create a singleton instance
+shadow_evaluator = ShadowEvaluator(
+    settings.shadow_model_dir,
+    settings.shadow_queue_size,
+    settings.shadow_sample_rate,
+    niceness=settings.shadow_niceness
+)
@@ -30,6 +30,149 @@ class Settings:
                 "http://frontend:3000"
             ]
         
+        # Training Configuration
+        self.warm_start_training: bool = (
+            os.getenv("WARM_START_TRAINING", "true").lower() == "true"
+        )
+        # Minimum share of features that must carry over from the previous
+        # vocabulary for a warm start to be attempted
+        self.warm_start_min_overlap: float = float(
+            os.getenv("WARM_START_MIN_OVERLAP", "0.9")
+        )
+        # LogisticRegression stops once its solver improves by less than this
+        self.logistic_regression_tol: float = float(
+            os.getenv("LOGISTIC_REGRESSION_TOL", "1e-4")
+        )
+        
+        # Single-precision features and model parameters
+        self.float32_features: bool = (
+            os.getenv("FLOAT32_FEATURES", "false").lower() == "true"
+        )
+        
+        # Cascade stages, cheapest first: model[:min_confidence[:min_margin]]
+        self.cascade_stages: str = os.getenv(
+            "CASCADE_STAGES",
+            "MultinomialNB:0.6:0.2,LogisticRegression:0.6:0.2,SVM:0.5:0.1,RandomForest"
+        )
+        # Validation rows used for cascade calibration; larger sets are sampled
+        self.cascade_calibration_samples: int = int(
+            os.getenv("CASCADE_CALIBRATION_SAMPLES", "20000")
+        )
+        
+        # Ensemble Configuration
+        # Default per-model weights, e.g. "SVM:2,RandomForest:0.5" (others 1)
+        self.ensemble_weights: str = os.getenv("ENSEMBLE_WEIGHTS", "")
+        # Threads used to overlap GIL-releasing models; 0 scores sequentially
+        self.ensemble_workers: int = int(os.getenv("ENSEMBLE_WORKERS", "2"))
+        
+        # Serve exported pruned/int8 linear models in place of the originals
+        self.serve_compressed_models: bool = (
+            os.getenv("SERVE_COMPRESSED_MODELS", "false").lower() == "true"
+        )
+        
+        # Build the similar-question index over the training questions
+        self.similar_questions_index: bool = (
+            os.getenv("SIMILAR_QUESTIONS_INDEX", "true").lower() == "true"
+        )
+        # Memory-map the saved index instead of reading it into memory
+        self.similar_questions_mmap: bool = (
+            os.getenv("SIMILAR_QUESTIONS_MMAP", "true").lower() == "true"
+        )
+        
+        # Share one computation between concurrent identical /classify-question
+        # requests; the computation then runs in the threadpool
+        self.single_flight_classification: bool = (
+            os.getenv("SINGLE_FLIGHT_CLASSIFICATION", "true").lower() == "true"
+        )
+        
+        # WebSocket /classify-stream: questions a client may have unanswered,
+        # questions classified per batch, and batches computed at once
+        self.classify_stream_credits: int = int(os.getenv("CLASSIFY_STREAM_CREDITS", "256"))
+        self.classify_stream_max_batch: int = int(os.getenv("CLASSIFY_STREAM_MAX_BATCH", "64"))
+        self.classify_stream_batches: int = int(os.getenv("CLASSIFY_STREAM_BATCHES", "2"))
+        
+        # Multi-tenant model registry
+        self.tenant_model_dir: str = os.getenv(
+            "TENANT_MODEL_DIR", os.path.join("saved_models", "tenants")
+        )
+        # Estimated memory of the tenant bundles kept loaded at once
+        self.model_memory_budget_mb: float = float(
+            os.getenv("MODEL_MEMORY_BUDGET_MB", "512")
+        )
+        
+        # Shadow evaluation: candidate bundles, the share of /classify-question
+        # traffic mirrored to the candidate, the mirrored questions that may
+        # wait (more are dropped) and the nice value of the shadow worker
+        self.shadow_model_dir: str = os.getenv(
+            "SHADOW_MODEL_DIR", os.path.join("saved_models", "candidates")
+        )
+        self.shadow_sample_rate: float = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+        self.shadow_queue_size: int = int(os.getenv("SHADOW_QUEUE_SIZE", "256"))
+        self.shadow_niceness: int = int(os.getenv("SHADOW_NICENESS", "10"))
+        
+        # Drift monitoring of /classify-question traffic: sliding windows
+        # (seconds) made of buckets of DRIFT_BUCKET_SECONDS, the training
+        # questions profiled as reference, and the PSI above which a sketch
+        # counts as drifting once a window holds DRIFT_MIN_SAMPLES questions
+        self.drift_monitoring: bool = (
+            os.getenv("DRIFT_MONITORING", "true").lower() == "true"
+        )
+        self.drift_windows: List[int] = [
+            int(window) for window in os.getenv("DRIFT_WINDOWS", "300,3600").split(",")
+            if window.strip()
+        ]
+        self.drift_bucket_seconds: int = int(os.getenv("DRIFT_BUCKET_SECONDS", "60"))
+        self.drift_reference_samples: int = int(os.getenv("DRIFT_REFERENCE_SAMPLES", "2000"))
+        # Keep the reference questions out of training (at most a tenth of
+        # the data); otherwise they are profiled in-sample, which shows
+        # almost no out-of-vocabulary tokens and higher confidences
+        self.drift_reference_holdout: bool = (
+            os.getenv("DRIFT_REFERENCE_HOLDOUT", "false").lower() == "true"
+        )
+        self.drift_psi_threshold: float = float(os.getenv("DRIFT_PSI_THRESHOLD", "0.2"))
+        self.drift_min_samples: int = int(os.getenv("DRIFT_MIN_SAMPLES", "200"))
+        
+        # Rows predicted per vectorized chunk on /ml/predict/*/stream
+        self.ml_stream_chunk_rows: int = int(os.getenv("ML_STREAM_CHUNK_ROWS", "10000"))
+        
+        # Directory that /ml/train/classification/files may read tables from
+        self.ml_data_dir: str = os.getenv("ML_DATA_DIR", "data")
+        
+        # Versioned store of the /ml models, restored at startup
+        self.ml_model_dir: str = os.getenv(
+            "ML_MODEL_DIR", os.path.join("saved_models", "ml")
+        )
+        # Saved versions kept per model, the current one included
+        self.ml_model_versions: int = int(os.getenv("ML_MODEL_VERSIONS", "3"))
+        # Memory-map large model arrays (forest node tables) on restore
+        self.ml_model_mmap: bool = (
+            os.getenv("ML_MODEL_MMAP", "true").lower() == "true"
+        )
+        
+        # Admission control per route class: requests running at once,
+        # requests waiting for a slot, and the longest wait before a 503
+        self.admission_control: bool = (
+            os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+        )
+        self.inference_concurrency: int = int(os.getenv("INFERENCE_CONCURRENCY", "8"))
+        self.inference_queue: int = int(os.getenv("INFERENCE_QUEUE", "64"))
+        self.batch_concurrency: int = int(os.getenv("BATCH_CONCURRENCY", "2"))
+        self.batch_queue: int = int(os.getenv("BATCH_QUEUE", "8"))
+        self.training_concurrency: int = int(os.getenv("TRAINING_CONCURRENCY", "1"))
+        self.training_queue: int = int(os.getenv("TRAINING_QUEUE", "2"))
+        self.admission_max_wait: float = float(os.getenv("ADMISSION_MAX_WAIT", "5"))
+        
+        # Native (BLAS/OpenMP) threads per worker process. Cores are split
+        # between the WEB_CONCURRENCY workers; a count of 0 means all cores
+        # of the worker. Inference calls run side by side on the request
+        # thread pool, so each gets one thread by default
+        self.thread_limits: bool = os.getenv("THREAD_LIMITS", "true").lower() == "true"
+        self.web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+        self.inference_threads: int = int(os.getenv("INFERENCE_THREADS", "1"))
+        self.training_threads: int = int(os.getenv("TRAINING_THREADS", "0"))
+        # Parallel jobs of random forest training; 0 means the worker's cores
+        self.training_jobs: int = int(os.getenv("TRAINING_JOBS", "0"))
+        
         # Environment
         self.environment: str = os.getenv("ENVIRONMENT", "development")
 
@@ -26,3 +26,11 @@ class PredictionError(HTTPException):
         super().__init__(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail
         )
+
+
+class UnsupportedMediaTypeError(HTTPException):
+    """Unsupported request body format"""
+    def __init__(self, detail: str = "Unsupported media type"):
+        super().__init__(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=detail
+        )
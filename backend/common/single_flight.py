@@ -0,0 +1,61 @@
+"""
+Coalescing of identical concurrent calls into one computation
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Share one in-flight computation between concurrent callers of a key
+
+    The first caller of a key starts the computation as a task; callers
+    that arrive with the same key while it runs await that task instead of
+    starting their own, and all of them receive its result or exception.
+    Nothing is kept once the task finishes, so this is not a cache: the
+    next call starts a new computation. A caller that is cancelled stops
+    waiting without cancelling the computation for the others.
+
+    Calls must come from a single event loop.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.calls = 0
+        self.executions = 0
+        self.max_waiters = 0
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of ``function()``, or of the in-flight call with the same key"""
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            self.executions += 1
+            flight = asyncio.ensure_future(function())
+            self._flights[key] = flight
+            self._waiters[key] = 0
+            flight.add_done_callback(lambda done: self._land(key, done))
+        self._waiters[key] += 1
+        self.max_waiters = max(self.max_waiters, self._waiters[key])
+        return await asyncio.shield(flight)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Calls, computations actually run and how many calls each served"""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.calls - self.executions,
+            # Calls served per computation; 1.0 means nothing was shared
+            "collapse_ratio": round(self.calls / self.executions, 4) if self.executions else 0.0,
+            "max_waiters": self.max_waiters,
+            "in_flight": len(self._flights)
+        }
+
+    def _land(self, key: Hashable, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+            del self._waiters[key]
+        # Mark the exception retrieved even if every caller was cancelled
+        if not flight.cancelled():
+            flight.exception()
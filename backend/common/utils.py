@@ -15,6 +15,16 @@ def setup_logging():
     return logging.getLogger(__name__)
 
 
+def parse_model_weights(spec: str) -> Dict[str, float]:
+    """Parse a weight list such as ``"SVM:2,RandomForest:0.5"``"""
+    weights = {}
+    for entry in spec.split(","):
+        if ":" in entry:
+            name, weight = entry.split(":", 1)
+            weights[name.strip()] = float(weight)
+    return weights
+
+
 def format_response(data: Any, message: str = "Success") -> Dict[str, Any]:
     """Format API response"""
     return {
@@ -1,3 +1,3 @@
 """
-Infrastructure layer - ML Algorithms
+Infrastructure layer - ML Algorithms and data decoding
 """
@@ -0,0 +1,3 @@
+"""
+Data Infrastructure - Tabular payload decoding
+"""
@@ -0,0 +1,68 @@
+"""
+Response body encoders: JSON (orjson when installed) and MessagePack
+"""
+import json
+from typing import Any, Dict, List
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack responses are optional
+    msgpack = None
+
+MSGPACK = "application/msgpack"
+# Other names clients use for MessagePack
+MSGPACK_ALIASES = ("application/x-msgpack", "application/vnd.msgpack")
+
+
+def _default(value: Any) -> Any:
+    """NumPy scalars and arrays, the only non-JSON types results carry"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None
+
+
+def dumps_json(data: Any) -> bytes:
+    """Compact UTF-8 JSON, the same document FastAPI's JSONResponse renders"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        data, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def dumps_msgpack(data: Any) -> bytes:
+    if msgpack is None:
+        raise RuntimeError("MessagePack support requires the msgpack package")
+    return msgpack.packb(data, default=_default)
+
+
+def loads_msgpack(payload: bytes) -> Any:
+    if msgpack is None:
+        raise RuntimeError("MessagePack support requires the msgpack package")
+    return msgpack.unpackb(payload)
+
+
+def ndjson_records(records: List[Dict[str, Any]]) -> bytes:
+    """One JSON line per record"""
+    return b"".join(dumps_json(record) + b"\n" for record in records)
+
+
+def msgpack_records(records: List[Dict[str, Any]]) -> bytes:
+    """Concatenated MessagePack maps, read back with ``msgpack.Unpacker``"""
+    if msgpack is None:
+        raise RuntimeError("MessagePack support requires the msgpack package")
+    packer = msgpack.Packer(default=_default)
+    return b"".join(packer.pack(record) for record in records)
+
@@ -0,0 +1,376 @@
+"""
+Data Infrastructure - Typed table schemas with cached categorical encodings
+"""
+import hashlib
+import json
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+NUMERIC = "numeric"
+CATEGORICAL = "categorical"
+COLUMN_TYPES = [NUMERIC, CATEGORICAL]
+
+# pandas.api.types.infer_dtype results that are read as numbers
+_NUMERIC_KINDS = {"empty", "integer", "floating", "mixed-integer-float", "boolean", "decimal"}
+
+# A JSON feature row: values in schema order, or keyed by column name
+FeatureRow = Union[Sequence[Any], Dict[str, Any]]
+
+
+def _key(value: Any) -> Optional[str]:
+    """Dictionary key of a categorical value (None for a missing value)"""
+    if isinstance(value, str):
+        return value
+    if value is None or value != value:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def columns_of_records(records: List[Dict[str, Any]]) -> Tuple[List[str], List[list]]:
+    """
+    Column names (in order of first appearance) and values of JSON rows
+
+    A key missing from a row is a missing value, as in ``pd.DataFrame``.
+    """
+    if not records:
+        return [], []
+    keys = records[0].keys()
+    names = list(keys)
+    if any(record.keys() != keys for record in records):
+        names = list(dict.fromkeys(key for record in records for key in record))
+    if len(names) < 2:
+        return names, [[record.get(name) for record in records] for name in names]
+    # Transpose with C-level item lookups; rows missing a key fall back to get()
+    row = itemgetter(*names)
+    rows = []
+    for record in records:
+        try:
+            rows.append(row(record))
+        except KeyError:
+            rows.append(tuple(record.get(name) for name in names))
+    return names, [list(column) for column in zip(*rows)]
+
+
+class Column:
+    """
+    A typed feature column
+
+    Categorical values are compared as strings and looked up in a fixed
+    dictionary of categories, so unseen values get no code. Missing
+    numeric values take ``fill``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        type: str = NUMERIC,
+        categories: Optional[List[Any]] = None,
+        fill: Optional[float] = None
+    ):
+        if type not in COLUMN_TYPES:
+            raise ValueError(f"Column '{name}' has unknown type '{type}', use one of {COLUMN_TYPES}")
+        self.name = name
+        self.type = type
+        self.fill = fill
+        self.set_categories(categories)
+
+    def set_categories(self, categories: Optional[List[Any]]):
+        if categories is None or self.type == NUMERIC:
+            self.categories = None
+            self._codes: Dict[str, int] = {}
+            self._index = None
+            return
+        keys = (_key(category) for category in categories)
+        self.categories = list(dict.fromkeys(key for key in keys if key is not None))
+        # Dict for single rows, hash index for whole columns
+        self._codes = {category: code for code, category in enumerate(self.categories)}
+        self._index = pd.Index(self.categories, dtype=object)
+
+    @property
+    def fitted(self) -> bool:
+        return self.fill is not None if self.type == NUMERIC else self.categories is not None
+
+    def fit(self, values):
+        """Learn the fill value or the category dictionary from training values"""
+        if self.type == NUMERIC:
+            numbers = self._numbers(values)
+            self.fill = float(np.nanmean(numbers)) if not np.isnan(numbers).all() else 0.0
+        else:
+            unique = pd.unique(np.asarray(values, dtype=object))
+            self.set_categories(sorted({_key(value) for value in unique} - {None}))
+
+    def number(self, value: Any) -> float:
+        if value is None:
+            return self.fill
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Column '{self.name}' must be numeric, got {value!r}")
+        return self.fill if number != number else number
+
+    def code(self, value: Any) -> int:
+        return self._codes.get(_key(value), -1)
+
+    def numbers(self, values) -> np.ndarray:
+        """Float values with missing entries filled"""
+        numbers = self._numbers(values)
+        missing = np.isnan(numbers)
+        if missing.any():
+            numbers = np.where(missing, self.fill, numbers)
+        return numbers
+
+    def codes(self, values) -> np.ndarray:
+        """Category codes, -1 for unseen or missing values"""
+        values = values if isinstance(values, np.ndarray) else np.asarray(values, dtype=object)
+        if values.dtype.kind in "iub":
+            values = values.astype(str)
+        elif values.dtype.kind != "U" and pd.api.types.infer_dtype(values, skipna=False) != "string":
+            values = np.array([_key(value) for value in values.tolist()], dtype=object)
+        return self._index.get_indexer(values)
+
+    def _numbers(self, values) -> np.ndarray:
+        try:
+            return np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"Column '{self.name}' must be numeric")
+
+    def to_dict(self) -> Dict[str, Any]:
+        spec = {"name": self.name, "type": self.type}
+        if self.type == NUMERIC:
+            spec["fill"] = self.fill
+        else:
+            spec["categories"] = self.categories
+        return spec
+
+
+class TableSchema:
+    """
+    Typed feature columns and target of a training table
+
+    Inferred once from the training data (or declared), then reused to
+    encode every prediction request into a contiguous ``dtype`` matrix
+    (float32 by default) without building a DataFrame. Categorical
+    columns become their dictionary code, or one indicator column per
+    category with ``one_hot`` (for linear models); unseen categories
+    encode as -1, or as all zeros with ``one_hot``.
+    """
+
+    def __init__(
+        self,
+        columns: List[Column],
+        target: Optional[str] = None,
+        one_hot: bool = False,
+        dtype: str = "float32"
+    ):
+        names = [column.name for column in columns]
+        if not columns:
+            raise ValueError("Data must have at least one feature column")
+        if len(set(names)) != len(names):
+            raise ValueError("Feature column names must be unique")
+        if target in names:
+            raise ValueError(f"Target column '{target}' cannot also be a feature")
+        self.columns = columns
+        self.target = target
+        self.one_hot = one_hot
+        self.dtype = np.dtype(dtype)
+        self._layout()
+
+    @classmethod
+    def infer(
+        cls,
+        names: List[str],
+        columns: List[Any],
+        target: Optional[str] = None,
+        one_hot: bool = False,
+        dtype: str = "float32"
+    ) -> "TableSchema":
+        """
+        Infer column types from training columns and fit their encodings
+
+        Columns of numbers (with gaps) are numeric, anything else is
+        categorical. The target defaults to the last column.
+        """
+        if len(names) < 2:
+            raise ValueError("Data must have at least 2 columns (features and target)")
+        target = names[-1] if target is None else target
+        if target not in names:
+            raise ValueError(f"Target column '{target}' not found")
+        features = [
+            Column(name, _infer_type(values))
+            for name, values in zip(names, columns) if name != target
+        ]
+        schema = cls(features, target, one_hot, dtype)
+        return schema.fit(dict(zip(names, columns)))
+
+    @classmethod
+    def numeric(cls, n_features: int, dtype: str = "float32") -> "TableSchema":
+        """Schema of an all-numeric matrix, columns named f0, f1, ..."""
+        return cls([Column(f"f{i}", NUMERIC, fill=0.0) for i in range(n_features)], dtype=dtype)
+
+    @classmethod
+    def from_dict(
+        cls, spec: Dict[str, Any], one_hot: bool = False, dtype: str = "float32"
+    ) -> "TableSchema":
+        """Declared or saved schema; columns without categories or fill still need ``fit``"""
+        columns = [
+            Column(column["name"], column.get("type", NUMERIC),
+                   column.get("categories"), column.get("fill"))
+            for column in spec.get("columns", [])
+        ]
+        return cls(
+            columns, spec.get("target"), spec.get("one_hot", one_hot), spec.get("dtype", dtype)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "columns": [column.to_dict() for column in self.columns],
+            "target": self.target,
+            "one_hot": self.one_hot,
+            "dtype": self.dtype.name,
+            "width": self.width
+        }
+
+    def fingerprint(self) -> str:
+        """Hash of the columns, encodings and layout, to match models to schemas"""
+        canonical = json.dumps(self.to_dict(), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+    @property
+    def has_categoricals(self) -> bool:
+        return any(column.type == CATEGORICAL for column in self.columns)
+
+    def fit(self, data: Dict[str, Any]) -> "TableSchema":
+        """Fit the encodings a declared schema left open"""
+        for column in self.columns:
+            if not column.fitted:
+                column.fit(self._values(data, column.name))
+        self._layout()
+        return self
+
+    def target_values(self, data: Dict[str, Any], numeric: bool = False) -> np.ndarray:
+        """Target column of training data, checked for missing values"""
+        if self.target is None or self.target not in data:
+            raise ValueError(f"Target column '{self.target}' not found")
+        values = data[self.target]
+        try:
+            y = np.asarray(values, dtype=np.float64 if numeric else None)
+        except (TypeError, ValueError):
+            raise ValueError(f"Target column '{self.target}' must be numeric")
+        if pd.isna(y).any():
+            raise ValueError(f"Target column '{self.target}' has missing values")
+        return y
+
+    def encode_columns(self, data: Dict[str, Any]) -> np.ndarray:
+        """
+        Encode a table given as ``{name: values}``
+
+        Columns are matched by name. Position is used only when one side has
+        no real names: a headerless table (columns "0", "1", ...) or a
+        schema of an unnamed matrix (f0, f1, ...); the table must then have
+        exactly one column per feature.
+
+        Raises:
+            ValueError: Listing every feature column missing from ``data``
+        """
+        missing = [name for name in self.feature_names if name not in data]
+        if missing:
+            unnamed = _is_positional(data) or _is_positional(self.feature_names, "f")
+            if len(data) == len(self.columns) and unnamed:
+                data = dict(zip(self.feature_names, data.values()))
+            else:
+                raise ValueError(f"Missing feature columns: {', '.join(map(repr, missing))}")
+        n_rows = len(self._values(data, self.columns[0].name))
+        X = np.empty((n_rows, self.width), dtype=self.dtype)
+        for column, offset in zip(self.columns, self._offsets):
+            values = self._values(data, column.name)
+            if len(values) != n_rows:
+                raise ValueError("Feature columns must have the same length")
+            if column.type == NUMERIC:
+                X[:, offset] = column.numbers(values)
+            elif not self.one_hot:
+                X[:, offset] = column.codes(values)
+            else:
+                codes = column.codes(values)
+                block = X[:, offset:offset + len(column.categories)]
+                block[:] = 0
+                known = np.flatnonzero(codes >= 0)
+                block[known, codes[known]] = 1
+        return X
+
+    def encode_records(self, rows: List[FeatureRow]) -> np.ndarray:
+        """Encode JSON rows (all keyed by name, or all in schema order)"""
+        if not rows:
+            raise ValueError("Features cannot be empty")
+        if all(isinstance(row, dict) for row in rows):
+            return self.encode_columns(
+                {name: [row.get(name) for row in rows] for name in self.feature_names}
+            )
+        if any(isinstance(row, dict) or len(row) != len(self.columns) for row in rows):
+            raise ValueError(f"Every feature row must have {len(self.columns)} values")
+        if not self.has_categoricals:
+            return self.encode_matrix(np.array(rows, dtype=np.float64))
+        return self.encode_columns(dict(zip(self.feature_names, zip(*rows))))
+
+    def encode_row(self, row: FeatureRow) -> np.ndarray:
+        """Encode one JSON row into a 1 x width matrix with dictionary lookups"""
+        if isinstance(row, dict):
+            values = [row.get(name) for name in self.feature_names]
+        elif len(row) != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} feature values, got {len(row)}")
+        else:
+            values = row
+        X = np.zeros((1, self.width), dtype=self.dtype)
+        for column, offset, value in zip(self.columns, self._offsets, values):
+            if column.type == NUMERIC:
+                X[0, offset] = column.number(value)
+            elif not self.one_hot:
+                X[0, offset] = column.code(value)
+            else:
+                code = column.code(value)
+                if code >= 0:
+                    X[0, offset + code] = 1
+        return X
+
+    def encode_matrix(self, X: np.ndarray) -> np.ndarray:
+        """Encode a numeric matrix holding one column per feature"""
+        if X.ndim != 2 or X.shape[1] != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} feature columns, got {X.shape[-1]}")
+        if self.has_categoricals:
+            return self.encode_columns(dict(zip(self.feature_names, X.T)))
+        X = np.ascontiguousarray(X, dtype=self.dtype)
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, np.array([column.fill for column in self.columns], self.dtype), X)
+        return X
+
+    def _layout(self):
+        """Column offsets in the encoded matrix"""
+        widths = [
+            len(column.categories or ()) if column.type == CATEGORICAL and self.one_hot else 1
+            for column in self.columns
+        ]
+        self._offsets = np.concatenate([[0], np.cumsum(widths)[:-1]]).astype(int).tolist()
+        self.width = int(sum(widths))
+
+    @staticmethod
+    def _values(data: Dict[str, Any], name: str):
+        if name not in data:
+            raise ValueError(f"Missing feature column '{name}'")
+        return data[name]
+
+
+def _is_positional(names, prefix: str = "") -> bool:
+    """Whether column names are just (prefixed) positions, i.e. no real names"""
+    return [str(name) for name in names] == [f"{prefix}{i}" for i in range(len(names))]
+
+
+def _infer_type(values) -> str:
+    return NUMERIC if pd.api.types.infer_dtype(values, skipna=True) in _NUMERIC_KINDS else CATEGORICAL
@@ -0,0 +1,291 @@
+"""
+Data Infrastructure - Decoding columnar and binary table payloads
+"""
+import io
+import json
+import os
+from typing import AsyncIterator, Dict, Iterator, List, Tuple
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow payloads are optional
+    pa = None
+
+JSON = "application/json"
+CSV = "text/csv"
+NPY = "application/x-npy"
+NPZ = "application/x-npz"
+NDJSON = "application/x-ndjson"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+# Formats with named, individually typed columns
+COLUMNAR = (CSV, ARROW_STREAM, ARROW_FILE)
+
+
+def media_type_of(content_type: str) -> str:
+    """Media type of a Content-Type header without its parameters"""
+    return (content_type or JSON).split(";", 1)[0].strip().lower()
+
+
+def is_json(media_type: str) -> bool:
+    return media_type == JSON or media_type.endswith("+json")
+
+
+def supported_media_types() -> List[str]:
+    """Table formats that can be decoded in this installation"""
+    media_types = [CSV, NPY, NPZ]
+    if pa is not None:
+        media_types += [ARROW_STREAM, ARROW_FILE]
+    return media_types
+
+
+def read_training_table(body: bytes, media_type: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode a training table into a feature matrix and a target vector
+
+    The last column is the target, as for JSON rows. An ``.npz`` archive
+    may instead hold separate ``X`` and ``y`` arrays.
+
+    Raises:
+        ValueError: If the payload cannot be decoded into a table
+    """
+    if media_type == NPZ:
+        arrays = _load_npz(body)
+        if "X" in arrays:
+            if "y" not in arrays:
+                raise ValueError("An .npz training payload with 'X' also needs 'y'")
+            X, y = _as_matrix(arrays["X"]), arrays["y"]
+            if len(X) != len(y):
+                raise ValueError("'X' and 'y' must have the same number of rows")
+            return X, y
+        table = _as_matrix(_single_array(arrays))
+        return _split_target(table)
+    if media_type == NPY:
+        return _split_target(_as_matrix(_load_npy(body)))
+
+    names, columns = _read_columns(body, media_type)
+    if len(columns) < 2:
+        raise ValueError("Data must have at least 2 columns (features and target)")
+    return _stack_features(names[:-1], columns[:-1]), columns[-1]
+
+
+def read_table_columns(body: bytes, media_type: str) -> Tuple[List[str], List[np.ndarray]]:
+    """
+    Column names and typed columns of a CSV or Arrow table, for schemas
+    that encode non-numeric columns
+
+    Raises:
+        ValueError: If the payload cannot be decoded into a table
+    """
+    if media_type not in COLUMNAR:
+        raise ValueError(f"Unsupported table format: {media_type}")
+    return _read_columns(body, media_type)
+
+
+def read_feature_matrix(body: bytes, media_type: str) -> np.ndarray:
+    """
+    Decode a table of feature rows for prediction
+
+    Raises:
+        ValueError: If the payload cannot be decoded into a numeric matrix
+    """
+    if media_type == NPZ:
+        arrays = _load_npz(body)
+        return _as_matrix(arrays["X"] if "X" in arrays else _single_array(arrays))
+    if media_type == NPY:
+        return _as_matrix(_load_npy(body))
+    names, columns = _read_columns(body, media_type)
+    return _stack_features(names, columns)
+
+
+async def iter_feature_chunks(
+    body: AsyncIterator[bytes], media_type: str, chunk_rows: int
+) -> AsyncIterator[np.ndarray]:
+    """
+    Feature matrices of up to ``chunk_rows`` rows from a streamed body
+
+    The body is NDJSON (one JSON array, or object with ``features``, per
+    line) or CSV with a header line. Only the rows of the current chunk
+    and one partial line are held in memory.
+
+    Raises:
+        ValueError: If the format is not streamable or a row is malformed
+    """
+    if media_type not in (NDJSON, CSV):
+        raise ValueError(f"Unsupported stream format: {media_type}")
+    skip_header = media_type == CSV
+    partial = b""
+    lines: List[bytes] = []
+    async for data in body:
+        *complete, partial = (partial + data).split(b"\n")
+        lines.extend(line for line in complete if line.strip())
+        if skip_header and lines:
+            lines.pop(0)
+            skip_header = False
+        while len(lines) >= chunk_rows:
+            yield _parse_lines(lines[:chunk_rows], media_type)
+            del lines[:chunk_rows]
+    if partial.strip():
+        lines.append(partial)
+    if skip_header and lines:
+        lines.pop(0)
+    if lines:
+        yield _parse_lines(lines, media_type)
+
+
+def _parse_lines(lines: List[bytes], media_type: str) -> np.ndarray:
+    """Numeric matrix of complete NDJSON or CSV data lines"""
+    try:
+        if media_type == CSV:
+            frame = pd.read_csv(io.BytesIO(b"\n".join(lines)), header=None, engine="c")
+            return _stack_features([str(name) for name in frame.columns],
+                                   [frame[name].to_numpy() for name in frame.columns])
+        rows = [json.loads(line) for line in lines]
+        rows = [row["features"] if isinstance(row, dict) else row for row in rows]
+        return _as_matrix(np.asarray(rows, dtype=np.float64))
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid {media_type} rows: {e}")
+
+
+def iter_file_chunks(
+    paths: List[str], chunk_rows: int
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    ``(X, y)`` chunks of local training tables, the last column being the target
+
+    ``.npy`` files are read one block of rows at a time and ``.csv`` files
+    parsed in chunks, so only one chunk of rows is in memory at a time.
+
+    Raises:
+        ValueError: If a file has an unsupported type or layout
+    """
+    for path in paths:
+        suffix = os.path.splitext(path)[1].lower()
+        if suffix == ".npy":
+            with open(path, "rb") as f:
+                shape, fortran_order, dtype = _read_npy_header(f)
+                if len(shape) != 2 or shape[1] < 2 or dtype.kind not in "biuf":
+                    raise ValueError(f"{path}: expected a numeric 2-D table with a target column")
+                n_rows, n_columns = shape
+                if fortran_order:
+                    # Rows are not contiguous on disk, copy them out of a map
+                    table = np.load(path, mmap_mode="r", allow_pickle=False)
+                    for start in range(0, n_rows, chunk_rows):
+                        block = np.array(table[start:start + chunk_rows])
+                        yield block[:, :-1], block[:, -1]
+                    continue
+                for start in range(0, n_rows, chunk_rows):
+                    count = min(chunk_rows, n_rows - start) * n_columns
+                    block = np.fromfile(f, dtype=dtype, count=count)
+                    if len(block) < count:
+                        raise ValueError(f"{path}: truncated .npy file")
+                    block = block.reshape(-1, n_columns)
+                    yield block[:, :-1], block[:, -1]
+        elif suffix == ".csv":
+            for frame in pd.read_csv(path, chunksize=chunk_rows, engine="c"):
+                if len(frame.columns) < 2:
+                    raise ValueError(f"{path}: data must have at least 2 columns")
+                names = [str(name) for name in frame.columns]
+                columns = [frame[name].to_numpy() for name in frame.columns]
+                yield _stack_features(names[:-1], columns[:-1]), columns[-1]
+        else:
+            raise ValueError(f"{path}: unsupported file type, use .npy or .csv")
+
+
+def _read_npy_header(stream) -> Tuple[tuple, bool, np.dtype]:
+    """Shape, order and dtype of an .npy stream, left positioned at the data"""
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            header = np.lib.format.read_array_header_1_0(stream)
+        elif version == (2, 0):
+            header = np.lib.format.read_array_header_2_0(stream)
+        else:
+            raise ValueError(f"unsupported format version {version}")
+    except ValueError as e:
+        raise ValueError(f"Invalid .npy payload: {e}")
+    if header[2].hasobject:
+        raise ValueError("Object arrays are not accepted")
+    return header
+
+
+def _load_npy(body: bytes) -> np.ndarray:
+    """Read an .npy payload as a read-only view of the request body"""
+    stream = io.BytesIO(body)
+    shape, fortran_order, dtype = _read_npy_header(stream)
+    count = int(np.prod(shape))
+    if len(body) - stream.tell() < count * dtype.itemsize:
+        raise ValueError("Truncated .npy payload")
+    array = np.frombuffer(body, dtype=dtype, count=count, offset=stream.tell())
+    return array.reshape(shape, order="F" if fortran_order else "C")
+
+
+def _load_npz(body: bytes) -> Dict[str, np.ndarray]:
+    try:
+        with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+            return {name: archive[name] for name in archive.files}
+    except Exception as e:
+        raise ValueError(f"Invalid .npz payload: {e}")
+
+
+def _single_array(arrays: Dict[str, np.ndarray]) -> np.ndarray:
+    if len(arrays) != 1:
+        raise ValueError("An .npz payload needs an 'X' array or exactly one array")
+    return next(iter(arrays.values()))
+
+
+def _read_columns(body: bytes, media_type: str) -> Tuple[List[str], List[np.ndarray]]:
+    """Column names and typed column arrays of a CSV or Arrow payload"""
+    if media_type == CSV:
+        try:
+            frame = pd.read_csv(io.BytesIO(body), engine="c")
+        except Exception as e:
+            raise ValueError(f"Invalid CSV payload: {e}")
+        names = [str(name) for name in frame.columns]
+        columns = [frame[name].to_numpy() for name in frame.columns]
+    elif media_type in (ARROW_STREAM, ARROW_FILE) and pa is not None:
+        try:
+            reader = pa.ipc.open_stream if media_type == ARROW_STREAM else pa.ipc.open_file
+            table = reader(pa.py_buffer(body)).read_all()
+        except Exception as e:
+            raise ValueError(f"Invalid Arrow payload: {e}")
+        names = list(table.column_names)
+        # Zero-copy for numeric columns without nulls
+        columns = [column.to_numpy() for column in table.columns]
+    else:
+        raise ValueError(f"Unsupported table format: {media_type}")
+    if not columns or len(columns[0]) == 0:
+        raise ValueError("Table cannot be empty")
+    return names, columns
+
+
+def _stack_features(names: List[str], columns: List[np.ndarray]) -> np.ndarray:
+    """Pack numeric feature columns into one row-major matrix"""
+    for name, column in zip(names, columns):
+        if column.dtype.kind not in "biuf":
+            raise ValueError(f"Feature column '{name}' is not numeric")
+    if not columns:
+        raise ValueError("Data must have at least one feature column")
+    matrix = np.empty((len(columns[0]), len(columns)), dtype=np.result_type(*columns))
+    for i, column in enumerate(columns):
+        matrix[:, i] = column
+    return matrix
+
+
+def _as_matrix(array: np.ndarray) -> np.ndarray:
+    if array.dtype.kind not in "biuf":
+        raise ValueError("Feature arrays must be numeric")
+    if array.ndim == 1:
+        array = array.reshape(1, -1)
+    if array.ndim != 2 or array.shape[0] == 0:
+        raise ValueError("Expected a non-empty 2-D array")
+    return array
+
+
+def _split_target(table: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Use the last column of a numeric matrix as the target"""
+    if table.shape[1] < 2:
+        raise ValueError("Data must have at least 2 columns (features and target)")
+    return table[:, :-1], table[:, -1]
@@ -8,9 +8,20 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, mean_squared_error
-from typing import Tuple, Any
+from typing import Any, Dict, Optional, Tuple
 import joblib
+import json
 import os
+from infrastructure.data.schema import TableSchema
+from infrastructure.ml.compiled_forest import CompiledForest
+from infrastructure.ml.compute import compute_resources
+from infrastructure.ml.least_squares import LeastSquaresStatistics
+from infrastructure.ml.out_of_core import ChunkSource, train_out_of_core
+
+MODEL_FILE = "model.joblib"
+SCHEMA_FILE = "schema.json"
+COMPILED_DIR = "compiled_forest"
+STATISTICS_FILE = "statistics.npz"
 
 
 class MLModel:
@@ -19,6 +30,10 @@ class MLModel:
     def __init__(self):
         self.model = None
         self.is_trained = False
+        # Column types and categorical encodings of the training table
+        self.schema: Optional[TableSchema] = None
+        # Training metadata of the saved version this model matches
+        self.metadata: Dict[str, Any] = {}
         
     def train(self, X: np.ndarray, y: np.ndarray) -> dict:
         """Train the model"""
@@ -28,29 +43,59 @@ class MLModel:
         """Make predictions"""
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
-        return self.model.predict(X)
+        with compute_resources.inference():
+            return self.model.predict(X)
+        
+    @property
+    def model_type(self) -> str:
+        """Class name of the (final) estimator"""
+        estimator = self.model.steps[-1][1] if hasattr(self.model, "steps") else self.model
+        return type(estimator).__name__
+        
+    @property
+    def n_features(self) -> Optional[int]:
+        """Number of (encoded) features the fitted model takes"""
+        return getattr(self.model, "n_features_in_", None)
         
-    def save_model(self, path: str):
-        """Save the trained model"""
+    def save_model(self, directory: str):
+        """Save the trained model and its schema into ``directory``"""
+        os.makedirs(directory, exist_ok=True)
         if self.model is not None:
-            joblib.dump(self.model, path)
+            joblib.dump(self.model, os.path.join(directory, MODEL_FILE))
+        if self.schema is not None:
+            with open(os.path.join(directory, SCHEMA_FILE), "w") as f:
+                json.dump(self.schema.to_dict(), f)
             
-    def load_model(self, path: str):
-        """Load a trained model"""
-        if os.path.exists(path):
-            self.model = joblib.load(path)
-            self.is_trained = True
+    def load_model(self, directory: str, mmap: bool = True):
+        """
+        Load a model saved with ``save_model``
+        
+        With ``mmap`` the model's NumPy arrays are memory-mapped read-only.
+        """
+        path = os.path.join(directory, MODEL_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No saved model in {directory}")
+        self.model = joblib.load(path, mmap_mode="r" if mmap else None)
+        self.is_trained = True
+        self.schema = _load_schema(directory)
 
 
 class ClassificationModel(MLModel):
     """Random Forest Classification Model"""
     
+    # Above this many rows sklearn's Cython traversal beats the lock-step
+    # numpy walk of the compiled forest (see benchmarks/compiled_forest.py)
+    COMPILED_MAX_ROWS = 32
+    
     def __init__(self, n_estimators: int = 100, random_state: int = 42):
         super().__init__()
-        self.model = RandomForestClassifier(
-            n_estimators=n_estimators, 
-            random_state=random_state
-        )
+        self.n_estimators = n_estimators
+        self.random_state = random_state
+        self.model = self._new_forest()
+        # Node arrays of a trained forest; memory-mapped after a restore
+        self.compiled: Optional[CompiledForest] = None
+        # Saved sklearn forest of a restored model, loaded on first large batch
+        self._model_path: Optional[str] = None
         
     def train(self, X: np.ndarray, y: np.ndarray) -> dict:
         """Train the classification model"""
@@ -58,7 +103,15 @@ class ClassificationModel(MLModel):
             X, y, test_size=0.2, random_state=42
         )
         
-        self.model.fit(X_train, y_train)
+        self.model = self._new_forest()
+        with compute_resources.training():
+            self.model.set_params(n_jobs=compute_resources.training_jobs)
+            try:
+                self.model.fit(X_train, y_train)
+            finally:
+                self.model.set_params(n_jobs=compute_resources.inference_threads)
+        self.compiled = CompiledForest(self.model)
+        self._model_path = None
         self.is_trained = True
         
         # Calculate accuracy
@@ -71,6 +124,92 @@ class ClassificationModel(MLModel):
             "train_size": int(len(X_train)),  # Convert to Python int
             "test_size": int(len(X_test))  # Convert to Python int
         }
+    
+    def train_out_of_core(self, chunks: ChunkSource, method: str = "forest", **options) -> dict:
+        """
+        Train from data read chunk by chunk instead of one in-memory table
+        
+        Args:
+            chunks: Callable returning a fresh iterator of (X, y) chunks
+            method: "forest" (trees added per chunk) or "sgd"
+            options: test_size, trees_per_chunk, epochs, seed
+        """
+        with compute_resources.training():
+            model, result = train_out_of_core(
+                chunks, method, n_jobs=compute_resources.training_jobs, **options
+            )
+        if method == "forest":
+            model.set_params(n_jobs=compute_resources.inference_threads)
+        self.model = model
+        self.compiled = CompiledForest(model) if method == "forest" else None
+        self._model_path = None
+        self.is_trained = True
+        return result
+    
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Make predictions, using the compiled forest for small batches"""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        with compute_resources.inference():
+            if self.compiled is not None and (
+                X.shape[0] <= self.COMPILED_MAX_ROWS or self._forest() is None
+            ):
+                return self.compiled.predict(X)
+            return self.model.predict(X)
+    
+    @property
+    def model_type(self) -> str:
+        if self.model is None and self.compiled is not None:
+            return RandomForestClassifier.__name__
+        return super().model_type
+    
+    @property
+    def n_features(self) -> Optional[int]:
+        return self.compiled.n_features if self.compiled is not None else super().n_features
+    
+    def save_model(self, directory: str):
+        """Save the forest both as sklearn model and as mappable node arrays"""
+        self._forest()
+        super().save_model(directory)
+        if self.compiled is not None:
+            self.compiled.save(os.path.join(directory, COMPILED_DIR))
+    
+    def load_model(self, directory: str, mmap: bool = True):
+        """
+        Load a saved model
+        
+        A forest is restored from its compiled node arrays, which serve
+        small batches at once; the sklearn forest is only read from disk
+        when the first large batch arrives.
+        """
+        compiled_dir = os.path.join(directory, COMPILED_DIR)
+        if not os.path.isdir(compiled_dir):
+            super().load_model(directory, mmap)
+            self.compiled = None
+            self._model_path = None
+            return
+        self.compiled = CompiledForest.load(compiled_dir, mmap)
+        self.model = None
+        self._model_path = os.path.join(directory, MODEL_FILE)
+        self.is_trained = True
+        self.schema = _load_schema(directory)
+    
+    def _forest(self):
+        """The sklearn model, loading a restored forest on first use"""
+        if self.model is None and self._model_path is not None:
+            try:
+                self.model = joblib.load(self._model_path)
+            except Exception:
+                # Pruned or unreadable: keep serving the compiled forest
+                pass
+            self._model_path = None
+        return self.model
+    
+    def _new_forest(self) -> RandomForestClassifier:
+        return RandomForestClassifier(
+            n_estimators=self.n_estimators,
+            random_state=self.random_state
+        )
 
 
 class RegressionModel(MLModel):
@@ -79,6 +218,8 @@ class RegressionModel(MLModel):
     def __init__(self):
         super().__init__()
         self.model = LinearRegression()
+        # Sufficient statistics of every row the current fit has seen
+        self.statistics: Optional[LeastSquaresStatistics] = None
         
     def train(self, X: np.ndarray, y: np.ndarray) -> dict:
         """Train the regression model"""
@@ -86,8 +227,11 @@ class RegressionModel(MLModel):
             X, y, test_size=0.2, random_state=42
         )
         
-        self.model.fit(X_train, y_train)
+        with compute_resources.training():
+            self.model.fit(X_train, y_train)
         self.is_trained = True
+        # Later incremental updates continue from this training split
+        self.statistics = LeastSquaresStatistics.from_data(X_train, y_train)
         
         # Calculate MSE
         y_pred = self.model.predict(X_test)
@@ -99,3 +243,95 @@ class RegressionModel(MLModel):
             "train_size": int(len(X_train)),  # Convert to Python int
             "test_size": int(len(X_test))  # Convert to Python int
         }
+    
+    def partial_fit(
+        self, X: np.ndarray, y: np.ndarray, forgetting: float = 1.0
+    ) -> Tuple["RegressionModel", dict]:
+        """
+        A new model with a chunk of rows added, re-solved exactly
+        
+        Only the d x d sufficient statistics are kept, so the cost per update
+        is O(rows * d^2 + d^3) no matter how many rows came before. This
+        model is left unchanged and keeps serving until the caller swaps
+        the new one in.
+        
+        Args:
+            X: Feature matrix of the new rows
+            y: Targets of the new rows
+            forgetting: Weight in (0, 1] kept by all earlier rows
+        
+        Returns:
+            The updated model and its training results
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2:
+            raise ValueError("Expected a 2-D feature matrix")
+        if self.statistics is not None and X.shape[1] != self.statistics.n_features:
+            raise ValueError(
+                f"Expected {self.statistics.n_features} features, got {X.shape[1]}"
+            )
+        statistics = self._statistics_copy(X.shape[1])
+        statistics.update(X, y, forgetting)
+        return self._with_statistics(statistics, rows=len(X), mode="incremental")
+    
+    def merge_statistics(
+        self, statistics: LeastSquaresStatistics
+    ) -> Tuple["RegressionModel", dict]:
+        """
+        A new model with statistics accumulated elsewhere (e.g. another
+        worker) merged in; this model is left unchanged
+        """
+        merged = self._statistics_copy(statistics.n_features)
+        merged.merge(statistics)
+        return self._with_statistics(merged, rows=int(round(statistics.count)), mode="merge")
+    
+    def _statistics_copy(self, n_features: int) -> LeastSquaresStatistics:
+        if self.statistics is None:
+            return LeastSquaresStatistics(n_features)
+        return self.statistics.copy()
+    
+    def _with_statistics(
+        self, statistics: LeastSquaresStatistics, rows: int, mode: str
+    ) -> Tuple["RegressionModel", dict]:
+        """Solve the normal equations into a new model with this model's schema"""
+        coef, intercept = statistics.solve()
+        updated = RegressionModel()
+        updated.model.coef_ = coef
+        updated.model.intercept_ = intercept
+        updated.model.n_features_in_ = len(coef)
+        updated.statistics = statistics
+        updated.schema = self.schema
+        updated.is_trained = True
+        
+        return updated, {
+            "model_type": "regression",
+            "mode": mode,
+            # In-sample: an incremental fit keeps no held-out rows
+            "mse": float(statistics.mse(coef)),
+            "train_size": rows,
+            "total_weight": float(statistics.count),
+            "test_size": 0
+        }
+    
+    def save_model(self, directory: str):
+        """Save the model and the least-squares statistics of its fit"""
+        super().save_model(directory)
+        if self.statistics is not None:
+            np.savez(os.path.join(directory, STATISTICS_FILE), **self.statistics.to_arrays())
+    
+    def load_model(self, directory: str, mmap: bool = True):
+        """Load a saved model; incremental updates continue from its statistics"""
+        super().load_model(directory, mmap)
+        self.statistics = None
+        path = os.path.join(directory, STATISTICS_FILE)
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as archive:
+                self.statistics = LeastSquaresStatistics.from_arrays(dict(archive))
+
+
+def _load_schema(directory: str) -> Optional[TableSchema]:
+    path = os.path.join(directory, SCHEMA_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return TableSchema.from_dict(json.load(f))
@@ -0,0 +1,166 @@
+"""
+ML Infrastructure - Confidence-gated model cascade
+"""
+import numpy as np
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+# Department classifiers ordered from cheapest to most expensive to score
+CASCADE_ORDER = ["MultinomialNB", "LogisticRegression", "SVM", "RandomForest"]
+
+
+@dataclass
+class CascadeStage:
+    """One cascade step: a model and the gate its answer must pass"""
+    model_name: str
+    min_confidence: float = 0.0
+    min_margin: float = 0.0
+
+    def accepts(self, probabilities: np.ndarray) -> bool:
+        """Whether top-1 probability and top-1/top-2 margin clear the gate"""
+        confidence, margin = top_confidence_margin(probabilities[np.newaxis, :])
+        return confidence[0] >= self.min_confidence and margin[0] >= self.min_margin
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def top_confidence_margin(probabilities: np.ndarray):
+    """Row-wise top-1 probability and its margin over the runner-up"""
+    if probabilities.shape[1] < 2:
+        top = probabilities[:, 0]
+        return top, top
+    top_two = -np.partition(-probabilities, 1, axis=1)[:, :2]
+    return top_two[:, 0], top_two[:, 0] - top_two[:, 1]
+
+
+def parse_cascade_stages(spec: str) -> List[CascadeStage]:
+    """
+    Parse a stage list such as ``"MultinomialNB:0.6:0.2,RandomForest"``
+
+    Each entry is ``model[:min_confidence[:min_margin]]``; the last stage
+    always answers, so its thresholds are ignored.
+    """
+    stages = []
+    for entry in spec.split(","):
+        parts = entry.strip().split(":")
+        if not parts[0]:
+            continue
+        stages.append(CascadeStage(
+            model_name=parts[0],
+            min_confidence=float(parts[1]) if len(parts) > 1 else 0.0,
+            min_margin=float(parts[2]) if len(parts) > 2 else 0.0
+        ))
+    return stages
+
+
+def calibrate_cascade(
+    probabilities: Dict[str, np.ndarray],
+    correct: Dict[str, np.ndarray],
+    latency_ms: Dict[str, float],
+    target_accuracy: float,
+    order: Optional[List[str]] = None,
+    confidence_grid: Optional[np.ndarray] = None,
+    margin_grid: Optional[np.ndarray] = None
+) -> Dict:
+    """
+    Choose cascade thresholds from validation predictions
+
+    Every combination of per-stage gates is simulated on the validation
+    set. Besides its gates a stage can be skipped, or gated at zero so that
+    it answers everything and the cascade ends there. Among the
+    combinations reaching ``target_accuracy`` the one with the lowest
+    expected latency wins; if none does, the most accurate one is returned.
+
+    The combinations are enumerated depth first, one stage at a time, so
+    memory stays at one gates x samples array per stage instead of growing
+    with the number of combinations; time is linear in the samples.
+
+    Args:
+        probabilities: Validation class probabilities per model
+        correct: Boolean array per model marking correct predictions
+        latency_ms: Mean single-question scoring latency per model
+        target_accuracy: Accuracy the cascade has to reach
+        order: Stage order, cheapest first; the last model always answers
+        confidence_grid: Candidate top-1 thresholds; 0.0 is always added
+        margin_grid: Candidate top-1/top-2 margin thresholds
+
+    Returns:
+        Stages, expected accuracy and expected latency of the chosen cascade
+    """
+    order = [name for name in (order or CASCADE_ORDER) if name in probabilities]
+    if not order:
+        raise ValueError("No trained models available for the cascade")
+    if confidence_grid is None:
+        confidence_grid = np.round(np.linspace(0.3, 0.9, 7), 2)
+    if margin_grid is None:
+        margin_grid = np.array([0.0, 0.1, 0.2])
+    confidence_grid = np.union1d([0.0], confidence_grid)
+    margin_grid = np.union1d([0.0], margin_grid)
+
+    # A stage gated at zero answers everything; that is the "last" option below
+    gates = [(c, m) for c in confidence_grid for m in margin_grid if c > 0 or m > 0]
+    n_samples = len(correct[order[0]])
+
+    # Rows each gate of each gated stage accepts
+    accepts = {}
+    for model_name in order[:-1]:
+        confidence, margin = top_confidence_margin(probabilities[model_name])
+        accepts[model_name] = np.array([
+            (confidence >= c) & (margin >= m) for c, m in gates
+        ])
+
+    # Per combination: correct answers, expected latency, the gate index of
+    # every gated stage (-1 means the stage is skipped) and the model that
+    # answers the rest
+    n_correct, cost, choices = [], [], []
+
+    def finish(model_name: str, pending: np.ndarray, stage_correct: int, stage_cost: float, chosen):
+        """Let ``model_name`` answer every row still pending"""
+        n_correct.append(stage_correct + int((pending & correct[model_name]).sum()))
+        cost.append(stage_cost + pending.mean() * latency_ms[model_name])
+        choices.append((chosen, model_name))
+
+    def extend(stage: int, pending: np.ndarray, stage_correct: int, stage_cost: float, chosen):
+        """Try every option of ``stage`` for the rows still pending"""
+        model_name = order[stage]
+        # Option "last": the stage answers everything, later ones are dropped
+        finish(model_name, pending, stage_correct, stage_cost, chosen)
+        if stage == len(order) - 1:
+            return
+        accept = accepts[model_name]
+        answered_correct = (pending & accept & correct[model_name]).sum(axis=1)
+        remaining = pending & ~accept
+        run_cost = stage_cost + pending.mean() * latency_ms[model_name]
+        for gate_id in range(len(gates)):
+            extend(
+                stage + 1, remaining[gate_id], stage_correct + int(answered_correct[gate_id]),
+                run_cost, chosen + (gate_id,)
+            )
+        # Option "skip": the stage is not run, nothing changes
+        extend(stage + 1, pending, stage_correct, stage_cost, chosen + (-1,))
+
+    extend(0, np.ones(n_samples, dtype=bool), 0, 0.0, ())
+    cost = np.array(cost)
+    accuracy = np.array(n_correct) / n_samples
+
+    feasible = np.flatnonzero(accuracy >= target_accuracy)
+    if len(feasible):
+        best = feasible[np.lexsort((-accuracy[feasible], cost[feasible]))[0]]
+    else:
+        best = int(np.lexsort((cost, -accuracy))[0])
+
+    chosen, last = choices[best]
+    stages = []
+    for model_name, gate_id in zip(order, chosen):
+        if gate_id >= 0:
+            min_confidence, min_margin = gates[gate_id]
+            stages.append(CascadeStage(model_name, float(min_confidence), float(min_margin)))
+    stages.append(CascadeStage(last))
+
+    return {
+        "stages": [stage.to_dict() for stage in stages],
+        "expected_accuracy": round(float(accuracy[best]), 4),
+        "expected_latency_ms": round(float(cost[best]), 4),
+        "target_met": bool(accuracy[best] >= target_accuracy)
+    }
@@ -2,6 +2,7 @@
 ML Infrastructure - Classification Algorithms
 """
 import numpy as np
+import scipy.sparse as sp
 from typing import Dict, List, Any, Optional
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
@@ -10,8 +11,19 @@ from sklearn.ensemble import RandomForestClassifier as SklearnRandomForestClassi
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
+from sklearn.preprocessing import normalize
+from sklearn.base import clone
+from infrastructure.ml.vocabulary import CompactVocabulary
+from infrastructure.ml.term_counts import TermCountCache
+from infrastructure.ml.compiled_forest import CompiledForest
+from infrastructure.ml.compression import compress_linear_model
+from infrastructure.ml.compute import compute_resources
+from common.config import settings
 import joblib
+import copy
 import os
+import shutil
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +32,10 @@ logger = logging.getLogger(__name__)
 class DepartmentClassifier:
     """Base class for department classification models"""
     
+    # Whether predict_proba spends most of its time outside the GIL, so it
+    # can usefully run on a worker thread alongside other models
+    releases_gil = False
+    
     def __init__(self, model_name: str):
         self.model_name = model_name
         self.model = None
@@ -33,19 +49,55 @@ class DepartmentClassifier:
         """Make predictions"""
         if not self.is_trained:
             raise ValueError(f"{self.model_name} model is not trained yet")
-        return self.model.predict(X)
+        with compute_resources.inference():
+            return self.model.predict(X)
         
     def predict_proba(self, X):
         """Get prediction probabilities"""
         if not self.is_trained:
             raise ValueError(f"{self.model_name} model is not trained yet")
         if hasattr(self.model, 'predict_proba'):
-            return self.model.predict_proba(X)
+            with compute_resources.inference():
+                return self.model.predict_proba(X)
         else:
             # For models that don't support predict_proba, return dummy probabilities
             predictions = self.predict(X)
             return np.ones((len(predictions), 5)) * 0.2  # Equal probability for 5 departments
     
+    def set_warm_start(
+        self, previous: "DepartmentClassifier", feature_map: np.ndarray
+    ) -> bool:
+        """
+        Offer a previously trained model as the starting point for train
+        
+        Args:
+            previous: Currently published model of the same type
+            feature_map: For each new feature, its column in the previous
+                model's feature space or -1 for new terms
+        
+        Only models with an iterative solver can use it; the default is to
+        ignore it and train from scratch.
+        """
+        return False
+    
+    # Fitted array attributes of self.model that to_float32 downcasts
+    float32_attributes = ()
+    
+    def to_float32(self):
+        """
+        Store fitted parameters in single precision
+        
+        Halves model memory, artifact size and the dense side of every
+        sparse product at inference. Models whose prediction code only
+        accepts doubles list no attributes and keep float64.
+        """
+        if not self.is_trained:
+            return
+        for name in self.float32_attributes:
+            value = getattr(self.model, name, None)
+            if value is not None:
+                setattr(self.model, name, value.astype(np.float32))
+    
     def save(self, filepath: str):
         """Save model to disk"""
         if self.is_trained:
@@ -61,6 +113,10 @@ class DepartmentClassifier:
 class MultinomialNBClassifier(DepartmentClassifier):
     """Multinomial Naive Bayes classifier for department classification"""
     
+    float32_attributes = (
+        "feature_log_prob_", "class_log_prior_", "feature_count_", "class_count_"
+    )
+    
     def __init__(self):
         super().__init__("MultinomialNB")
         self.model = MultinomialNB()
@@ -68,7 +124,8 @@ class MultinomialNBClassifier(DepartmentClassifier):
     def train(self, X, y):
         """Train Multinomial Naive Bayes model"""
         try:
-            self.model.fit(X, y)
+            with compute_resources.training():
+                self.model.fit(X, y)
             self.is_trained = True
             
             # Calculate accuracy on training data
@@ -92,6 +149,9 @@ class MultinomialNBClassifier(DepartmentClassifier):
 class SVMClassifier(DepartmentClassifier):
     """Support Vector Machine classifier for department classification"""
     
+    # libsvm only predicts from float64 support vectors, so SVC parameters
+    # stay in double precision even in float32 mode
+    
     def __init__(self):
         super().__init__("SVM")
         self.model = SVC(probability=True, kernel='linear')
@@ -99,7 +159,8 @@ class SVMClassifier(DepartmentClassifier):
     def train(self, X, y):
         """Train SVM model"""
         try:
-            self.model.fit(X, y)
+            with compute_resources.training():
+                self.model.fit(X, y)
             self.is_trained = True
             
             # Calculate accuracy on training data
@@ -123,14 +184,27 @@ class SVMClassifier(DepartmentClassifier):
 class DepartmentRandomForestClassifier(DepartmentClassifier):
     """Random Forest classifier for department classification"""
     
+    releases_gil = True
+    
+    # Above this many rows sklearn's Cython traversal beats the lock-step
+    # numpy walk of the compiled forest (see benchmarks/compiled_forest.py)
+    COMPILED_MAX_ROWS = 32
+    
     def __init__(self):
         super().__init__("RandomForest")
         self.model = SklearnRandomForestClassifier(n_estimators=100, random_state=42)
+        self.compiled: Optional[CompiledForest] = None
         
     def train(self, X, y):
         """Train Random Forest model"""
         try:
-            self.model.fit(X, y)
+            with compute_resources.training():
+                self.model.set_params(n_jobs=compute_resources.training_jobs)
+                try:
+                    self.model.fit(X, y)
+                finally:
+                    self.model.set_params(n_jobs=compute_resources.inference_threads)
+            self.compiled = CompiledForest(self.model)
             self.is_trained = True
             
             # Calculate accuracy on training data
@@ -149,19 +223,103 @@ class DepartmentRandomForestClassifier(DepartmentClassifier):
                 "model_type": self.model_name,
                 "status": f"error: {str(e)}"
             }
+    
+    def predict(self, X):
+        """Make predictions, using the compiled forest for small batches"""
+        if not self.is_trained:
+            raise ValueError(f"{self.model_name} model is not trained yet")
+        with compute_resources.inference():
+            if X.shape[0] > self.COMPILED_MAX_ROWS:
+                return self.model.predict(X)
+            return self.compiled.predict(X)
+    
+    def predict_proba(self, X):
+        """Get prediction probabilities, using the compiled forest for small batches"""
+        if not self.is_trained:
+            raise ValueError(f"{self.model_name} model is not trained yet")
+        with compute_resources.inference():
+            if X.shape[0] > self.COMPILED_MAX_ROWS:
+                return self.model.predict_proba(X)
+            return self.compiled.predict_proba(X)
+    
+    def to_float32(self):
+        """Store the compiled forest in single precision"""
+        if self.is_trained:
+            self.compiled.to_float32()
+    
+    def load(self, filepath: str):
+        """Load model from disk and compile it for inference"""
+        super().load(filepath)
+        if self.is_trained:
+            self.compiled = CompiledForest(self.model)
 
 
 class LogisticRegressionClassifier(DepartmentClassifier):
     """Logistic Regression classifier for department classification"""
     
-    def __init__(self):
+    float32_attributes = ("coef_", "intercept_")
+    
+    def __init__(self, tol: Optional[float] = None):
         super().__init__("LogisticRegression")
-        self.model = LogisticRegression(max_iter=1000, random_state=42)
+        self.model = LogisticRegression(
+            max_iter=1000,
+            random_state=42,
+            tol=settings.logistic_regression_tol if tol is None else tol
+        )
+        self._warm_start_model: Optional[LogisticRegression] = None
+        self._warm_start_features: Optional[np.ndarray] = None
+        
+    def set_warm_start(
+        self, previous: DepartmentClassifier, feature_map: np.ndarray
+    ) -> bool:
+        """Start the next train from the coefficients of a published model"""
+        if previous.is_trained and isinstance(previous.model, LogisticRegression):
+            self._warm_start_model = previous.model
+            self._warm_start_features = feature_map
+            return True
+        return False
+        
+    def _init_warm_start(self, X, y) -> bool:
+        """
+        Seed the solver with the previous coefficients when they still apply
+        
+        Coefficients of terms kept from the previous vocabulary are carried
+        over to their new columns and new terms start at zero. Falls back to
+        a cold start if the label set changed or the feature map does not fit
+        the previous model.
+        """
+        previous = self._warm_start_model
+        feature_map = self._warm_start_features
+        self._warm_start_model = None
+        self._warm_start_features = None
+        if previous is None:
+            return False
+        
+        if (
+            not np.array_equal(previous.classes_, np.unique(y))
+            or len(feature_map) != X.shape[1]
+            or feature_map.max(initial=-1) >= previous.coef_.shape[1]
+        ):
+            logger.info(f"{self.model_name}: label set or features changed, cold start")
+            return False
+        
+        # Build fresh arrays so the published model keeps serving untouched
+        known = feature_map >= 0
+        coef = np.zeros((previous.coef_.shape[0], X.shape[1]))
+        coef[:, known] = previous.coef_[:, feature_map[known]]
+        self.model.set_params(warm_start=True)
+        self.model.coef_ = coef
+        self.model.intercept_ = previous.intercept_.copy()
+        return True
         
     def train(self, X, y):
         """Train Logistic Regression model"""
         try:
-            self.model.fit(X, y)
+            start_time = time.perf_counter()
+            warm_started = self._init_warm_start(X, y)
+            with compute_resources.training():
+                self.model.fit(X, y)
+            training_time = time.perf_counter() - start_time
             self.is_trained = True
             
             # Calculate accuracy on training data
@@ -171,7 +329,10 @@ class LogisticRegressionClassifier(DepartmentClassifier):
             return {
                 "accuracy": round(accuracy, 3),
                 "model_type": self.model_name,
-                "status": "trained"
+                "status": "trained",
+                "warm_start": warm_started,
+                "n_iter": int(np.max(self.model.n_iter_)),
+                "training_time": round(training_time, 4)
             }
         except Exception as e:
             logger.error(f"Error training {self.model_name}: {str(e)}")
@@ -182,48 +343,332 @@ class LogisticRegressionClassifier(DepartmentClassifier):
             }
 
 
+class DistilledLinearClassifier(DepartmentClassifier):
+    """Linear student model trained on a teacher's class probabilities"""
+    
+    float32_attributes = ("coef_", "intercept_")
+    
+    def __init__(self):
+        super().__init__("Distilled")
+        self.model = LogisticRegression(max_iter=1000, random_state=42)
+        
+    def distill(self, X, soft_targets: np.ndarray, classes: List[str], min_weight: float = 1e-4):
+        """
+        Fit the student to soft targets
+        
+        Every row is repeated once per class with that class as label and the
+        teacher's probability as sample weight, so the weighted log-loss that
+        LogisticRegression minimizes is exactly the cross-entropy against the
+        teacher's distribution. Near-zero weights are dropped.
+        
+        Args:
+            X: Feature matrix of the distillation corpus
+            soft_targets: Teacher probabilities, columns ordered like classes
+            classes: Class label of every soft_targets column
+            min_weight: Smallest teacher probability kept as a training row
+        """
+        try:
+            n_rows = X.shape[0]
+            rows = np.tile(np.arange(n_rows), len(classes))
+            labels = np.repeat(np.asarray(classes), n_rows)
+            weights = soft_targets.T.ravel()
+            keep = weights >= min_weight
+            
+            start_time = time.perf_counter()
+            with compute_resources.training():
+                self.model.fit(X[rows[keep]], labels[keep], sample_weight=weights[keep])
+            training_time = time.perf_counter() - start_time
+            self.is_trained = True
+            
+            teacher_labels = np.asarray(classes)[soft_targets.argmax(axis=1)]
+            agreement = accuracy_score(teacher_labels, self.model.predict(X))
+            
+            return {
+                "teacher_agreement": round(agreement, 3),
+                "model_type": self.model_name,
+                "status": "trained",
+                "samples": int(n_rows),
+                "weighted_rows": int(keep.sum()),
+                "training_time": round(training_time, 4)
+            }
+        except Exception as e:
+            logger.error(f"Error distilling {self.model_name}: {str(e)}")
+            return {
+                "teacher_agreement": 0.0,
+                "model_type": self.model_name,
+                "status": f"error: {str(e)}"
+            }
+
+
+class CompressedLinearClassifier(DepartmentClassifier):
+    """Pruned and/or int8-quantized export of a trained linear classifier"""
+    
+    def __init__(self, model_name: str, model=None):
+        super().__init__(model_name)
+        self.model = model
+        self.is_trained = model is not None
+    
+    @classmethod
+    def from_classifier(
+        cls, classifier: DepartmentClassifier, prune_ratio: float = 0.0, quantize: bool = True
+    ) -> "CompressedLinearClassifier":
+        """Compress a trained MultinomialNB, LogisticRegression, SVM or Distilled model"""
+        if not classifier.is_trained:
+            raise ValueError(f"{classifier.model_name} model is not trained yet")
+        return cls(
+            classifier.model_name,
+            compress_linear_model(classifier.model, prune_ratio, quantize)
+        )
+    
+    def train(self, X, y):
+        """Compressed models are exported from trained models, never trained"""
+        raise ValueError("Compressed models are created with from_classifier")
+
+
 class TextVectorizer:
     """Text vectorization for department classification"""
     
-    def __init__(self):
+    ARTIFACT_FORMAT = "compact-v1"
+    ANALYSIS_PARAMS = (
+        "analyzer", "lowercase", "ngram_range", "preprocessor",
+        "stop_words", "strip_accents", "token_pattern", "tokenizer"
+    )
+    
+    def __init__(self, dtype=np.float64):
         self.vectorizer = TfidfVectorizer(
             max_features=5000,
             stop_words='english',
             lowercase=True,
-            ngram_range=(1, 2)
+            ngram_range=(1, 2),
+            dtype=dtype
         )
+        self.vocabulary: Optional[CompactVocabulary] = None
+        self.idf_: Optional[np.ndarray] = None
+        self._analyzer = None
+        self._term_counts = TermCountCache(self._analysis_key())
+        # Saved term counts not read yet: path and the stat they were saved with
+        self._term_counts_file: Optional[tuple] = None
+        self.last_fit_stats: Dict[str, int] = {}
         self.is_fitted = False
         
+    @property
+    def term_counts(self) -> TermCountCache:
+        """
+        Cached training term counts
+        
+        Counts registered with load_term_counts are read on first use, and
+        only if the file was not replaced since.
+        """
+        if self._term_counts_file is not None:
+            filepath, saved = self._term_counts_file
+            cache = TermCountCache(self._analysis_key())
+            if os.path.exists(filepath) and self._file_stat(filepath) == saved:
+                cache.load(filepath)
+            self._term_counts, self._term_counts_file = cache, None
+        return self._term_counts
+    
+    def copy(self) -> "TextVectorizer":
+        """Copy that can be refitted without changing this vectorizer"""
+        clone = copy.copy(self)
+        if self._term_counts_file is None:
+            clone._term_counts = self._term_counts.copy()
+        return clone
+    
     def fit_transform(self, texts: List[str]):
-        """Fit vectorizer and transform texts"""
+        """
+        Fit vectorizer and transform texts
+        
+        Term counts come from the content-hash keyed cache, so only samples
+        that were not part of the previous fit are run through the analyzer.
+        The vocabulary and smoothed idf follow TfidfVectorizer's rules for the
+        configured max_features with default min_df/max_df.
+        """
         try:
-            X = self.vectorizer.fit_transform(texts)
-            self.is_fitted = True
-            return X
+            keys, stats = self.term_counts.update(texts, self._get_analyzer())
+            feature_terms = self.term_counts.select_features(self.vectorizer.max_features)
+            vocabulary = {
+                self.term_counts.terms[term_id]: i
+                for i, term_id in enumerate(feature_terms)
+            }
+            self._set_fitted_state(vocabulary, self.term_counts.smooth_idf(feature_terms))
+            self.last_fit_stats = stats
+            X = self.term_counts.build_counts(keys, feature_terms, self.vectorizer.dtype)
+            return self._apply_idf(X)
         except Exception as e:
             logger.error(f"Error fitting vectorizer: {str(e)}")
             raise
             
+    def transform_training_corpus(self):
+        """
+        TF-IDF rows of the corpus the vectorizer was last fitted on
+        
+        Rebuilt from the cached term counts, so the texts need not be kept
+        and none is analyzed again. Rows come grouped by distinct text.
+        
+        Raises:
+            ValueError: If no training corpus matching the vocabulary is cached
+        """
+        keys = list(self.term_counts.corpus.elements())
+        if not self.is_fitted or not keys:
+            raise ValueError("No training corpus is cached")
+        features = self.vocabulary.lookup(self.term_counts.terms)
+        known = np.flatnonzero(features >= 0)
+        if len(known) != self.n_features:
+            raise ValueError("Cached training term counts do not match the vocabulary")
+        feature_terms = np.empty(len(known), dtype=np.int64)
+        feature_terms[features[known]] = known
+        X = self.term_counts.build_counts(keys, feature_terms, self.vectorizer.dtype)
+        return self._apply_idf(X)
+    
     def transform(self, texts: List[str]):
         """Transform texts using fitted vectorizer"""
+        return self.transform_with_stats(texts)[0]
+    
+    def transform_with_stats(self, texts: List[str]):
+        """
+        Transform texts and count their tokens
+        
+        Returns:
+            The feature matrix, the analyzer tokens of each text and how many
+            of them are not in the vocabulary (int arrays aligned with texts)
+        """
         if not self.is_fitted:
             raise ValueError("Vectorizer is not fitted. Call fit_transform first.")
         try:
-            return self.vectorizer.transform(texts)
+            return self._transform_compact(texts)
         except Exception as e:
             logger.error(f"Error transforming texts: {str(e)}")
             raise
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the vocabulary, idf and term counts read so far"""
+        total = self._term_counts.nbytes
+        if self.is_fitted:
+            total += self.vocabulary.nbytes + self.idf_.nbytes
+        return int(total)
+    
+    @property
+    def n_features(self) -> int:
+        """Number of features produced by transform"""
+        return len(self.idf_) if self.idf_ is not None else 0
+    
+    def _set_fitted_state(self, vocabulary: Dict[str, int], idf: np.ndarray):
+        """Keep only the compact inference state of a fitted vectorizer"""
+        self.vocabulary = CompactVocabulary.from_mapping(vocabulary)
+        self.idf_ = np.asarray(idf, dtype=self.vectorizer.dtype)
+        self.is_fitted = True
+    
+    def _get_analyzer(self):
+        """Build (once) the tokenizer configured on the sklearn vectorizer"""
+        if self._analyzer is None:
+            self._analyzer = self.vectorizer.build_analyzer()
+        return self._analyzer
+    
+    def _analysis_key(self) -> str:
+        """Fingerprint of the parameters that affect tokenization"""
+        params = self.vectorizer.get_params()
+        return repr([(name, params[name]) for name in self.ANALYSIS_PARAMS])
+    
+    def _apply_idf(self, X):
+        """Weight raw term counts by idf and l2-normalize rows"""
+        X.data *= self.idf_[X.indices]
+        return normalize(X, norm=self.vectorizer.norm, copy=False)
+    
+    def _transform_compact(self, texts: List[str]):
+        """
+        Count terms via the compact vocabulary and apply TF-IDF weighting
+        
+        Also returns the number of tokens and of unknown tokens of each text.
+        """
+        analyzer = self._get_analyzer()
+        
+        tokens = []
+        indptr = [0]
+        for text in texts:
+            doc_tokens = analyzer(text)
+            tokens.extend(doc_tokens)
+            indptr.append(len(tokens))
+        
+        feature_ids = self.vocabulary.lookup(tokens)
+        lengths = np.diff(indptr)
+        row_ids = np.repeat(np.arange(len(texts)), lengths)
+        known = feature_ids >= 0
+        
+        dtype = self.vectorizer.dtype
+        X = sp.csr_matrix(
+            (
+                np.ones(int(known.sum()), dtype=dtype),
+                (row_ids[known], feature_ids[known])
+            ),
+            shape=(len(texts), self.n_features),
+            dtype=dtype
+        )
+        X.sum_duplicates()
+        unknown = lengths - np.bincount(row_ids[known], minlength=len(texts))
+        return self._apply_idf(X), lengths, unknown
             
     def save(self, filepath: str):
         """Save vectorizer to disk"""
         if self.is_fitted:
-            joblib.dump(self.vectorizer, filepath)
+            joblib.dump({
+                "format": self.ARTIFACT_FORMAT,
+                "params": self.vectorizer.get_params(),
+                "vocabulary": self.vocabulary,
+                "idf": self.idf_
+            }, filepath)
             
     def load(self, filepath: str):
-        """Load vectorizer from disk"""
+        """
+        Load vectorizer from disk
+        
+        Features keep the dtype this vectorizer was created with, not the
+        one the artifact was saved with.
+        """
         if os.path.exists(filepath):
-            self.vectorizer = joblib.load(filepath)
-            self.is_fitted = True
+            dtype = self.vectorizer.dtype
+            artifact = joblib.load(filepath)
+            if isinstance(artifact, TfidfVectorizer):
+                # Artifact written before the compact format existed; keep
+                # an unfitted copy that only carries the configuration
+                self.vectorizer = clone(artifact).set_params(dtype=dtype)
+                self._set_fitted_state(artifact.vocabulary_, artifact.idf_)
+            else:
+                self.vectorizer = TfidfVectorizer(**{**artifact["params"], "dtype": dtype})
+                self.vocabulary = artifact["vocabulary"]
+                self.idf_ = np.asarray(artifact["idf"], dtype=dtype)
+                self.is_fitted = True
+            self._analyzer = None
+    
+    def save_term_counts(self, filepath: str):
+        """Save the cached training term counts to disk"""
+        if self._term_counts_file is not None:
+            # Never read; copy the file unless it is the one being written
+            source, saved = self._term_counts_file
+            if (
+                os.path.abspath(source) != os.path.abspath(filepath)
+                and os.path.exists(source)
+                and self._file_stat(source) == saved
+            ):
+                shutil.copyfile(source, filepath)
+        elif self._term_counts.documents:
+            self._term_counts.save(filepath)
+    
+    def load_term_counts(self, filepath: str) -> bool:
+        """
+        Register cached training term counts saved by save_term_counts
+        
+        They are only needed to refit, so the file is read on first use.
+        """
+        if not os.path.exists(filepath):
+            return False
+        self._term_counts_file = (filepath, self._file_stat(filepath))
+        return True
+    
+    @staticmethod
+    def _file_stat(filepath: str) -> tuple:
+        stat = os.stat(filepath)
+        return stat.st_mtime_ns, stat.st_size
 
 
 def create_classifier(model_name: str) -> DepartmentClassifier:
@@ -232,7 +677,8 @@ def create_classifier(model_name: str) -> DepartmentClassifier:
         "MultinomialNB": MultinomialNBClassifier,
         "SVM": SVMClassifier,
         "RandomForest": DepartmentRandomForestClassifier,
-        "LogisticRegression": LogisticRegressionClassifier
+        "LogisticRegression": LogisticRegressionClassifier,
+        "Distilled": DistilledLinearClassifier
     }
     
     if model_name not in classifiers:
@@ -247,5 +693,6 @@ def get_available_models() -> List[Dict[str, str]]:
         {"value": "MultinomialNB", "label": "Multinomial Naive Bayes"},
         {"value": "SVM", "label": "Support Vector Machine"},
         {"value": "RandomForest", "label": "Random Forest"},
-        {"value": "LogisticRegression", "label": "Logistic Regression"}
+        {"value": "LogisticRegression", "label": "Logistic Regression"},
+        {"value": "Distilled", "label": "Distilled Linear Student"}
     ]
@@ -0,0 +1,155 @@
+"""
+ML Infrastructure - Array-based inference for trained random forests
+"""
+import json
+import os
+import numpy as np
+import scipy.sparse as sp
+
+
+class CompiledForest:
+    """
+    All trees of a fitted sklearn forest flattened into contiguous arrays.
+
+    Nodes of every tree live in shared ``feature``/``threshold``/``children``
+    arrays, with child indices already offset to global positions.
+    Leaves point to themselves with an infinite threshold, so a batch of
+    rows walks all trees in lock-step with a handful of numpy operations per
+    depth level and no per-tree Python dispatch. ``leaf_proba`` holds each
+    node's normalized class distribution.
+    """
+
+    # Rows densified per traversal chunk; bounds memory on large batches
+    CHUNK_ROWS = 256
+
+    def __init__(self, forest):
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        n_nodes = int(offsets[-1])
+
+        self.classes_ = forest.classes_
+        self.n_features = forest.n_features_in_
+        self.roots = offsets[:-1].astype(np.int64)
+        self.max_depth = max(tree.max_depth for tree in trees)
+        self.feature = np.empty(n_nodes, dtype=np.int32)
+        self.threshold = np.empty(n_nodes, dtype=np.float64)
+        # children[:, 0] is the left child, children[:, 1] the right one
+        self.children = np.empty((n_nodes, 2), dtype=np.int64)
+        self.leaf_proba = np.empty((n_nodes, len(self.classes_)), dtype=np.float64)
+
+        for tree, offset in zip(trees, self.roots):
+            nodes = slice(offset, offset + tree.node_count)
+            is_leaf = tree.children_left < 0
+            node_ids = np.arange(tree.node_count) + offset
+
+            self.feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            self.threshold[nodes] = np.where(is_leaf, np.inf, tree.threshold)
+            self.children[nodes, 0] = np.where(is_leaf, node_ids, tree.children_left + offset)
+            self.children[nodes, 1] = np.where(is_leaf, node_ids, tree.children_right + offset)
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :len(self.classes_)]
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            self.leaf_proba[nodes] = value / normalizer
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the node arrays"""
+        return int(
+            self.feature.nbytes + self.threshold.nbytes + self.children.nbytes
+            + self.leaf_proba.nbytes + self.roots.nbytes
+        )
+
+    def save(self, directory: str):
+        """Write the node arrays as .npy files plus a small JSON header"""
+        os.makedirs(directory, exist_ok=True)
+        for name in self._ARRAYS:
+            array = getattr(self, name)
+            if array.dtype == object:
+                # Label arrays from pandas; .npy needs a fixed-width dtype
+                array = np.asarray(array.tolist())
+            np.save(os.path.join(directory, f"{name}.npy"), array, allow_pickle=False)
+        with open(os.path.join(directory, "forest.json"), "w") as f:
+            json.dump({"n_features": int(self.n_features), "max_depth": int(self.max_depth)}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "CompiledForest":
+        """
+        Open saved node arrays, memory-mapped by default
+
+        Mapped arrays are read-only and their pages are shared by every
+        process that opens the same files.
+        """
+        forest = cls.__new__(cls)
+        with open(os.path.join(directory, "forest.json")) as f:
+            header = json.load(f)
+        forest.n_features = header["n_features"]
+        forest.max_depth = header["max_depth"]
+        for name in cls._ARRAYS:
+            setattr(forest, name, np.load(
+                os.path.join(directory, f"{name}.npy"),
+                mmap_mode="r" if mmap else None, allow_pickle=False
+            ))
+        return forest
+
+    _ARRAYS = ("classes_", "roots", "feature", "threshold", "children", "leaf_proba")
+
+    def to_float32(self):
+        """
+        Store thresholds and leaf distributions in single precision
+
+        Each threshold is rounded down to the nearest float32, which keeps
+        ``value <= threshold`` unchanged for every float32 feature value, so
+        the leaves reached are exactly the same; only the probabilities lose
+        precision.
+        """
+        if self.threshold.dtype == np.float32:
+            return
+        threshold = self.threshold.astype(np.float32)
+        rounded_up = threshold.astype(np.float64) > self.threshold
+        threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+        self.threshold = threshold
+        self.leaf_proba = self.leaf_proba.astype(np.float32)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities, identical to the source forest's predict_proba"""
+        n_rows = X.shape[0]
+        proba = np.empty((n_rows, len(self.classes_)), dtype=self.leaf_proba.dtype)
+        for start in range(0, n_rows, self.CHUNK_ROWS):
+            chunk = X[start:start + self.CHUNK_ROWS]
+            dense = chunk.toarray() if sp.issparse(chunk) else np.asarray(chunk)
+            # Trees compare float32 feature values, as sklearn does
+            proba[start:start + len(dense)] = self._predict_dense(dense.astype(np.float32))
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        """Most probable class per row"""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def _predict_dense(self, X: np.ndarray) -> np.ndarray:
+        n_rows = X.shape[0]
+        n_trees = len(self.roots)
+        leaves = np.tile(self.roots, n_rows)
+
+        # Walk only the (row, tree) paths that have not reached a leaf yet;
+        # finished paths are retired every few levels so the work follows
+        # the real path lengths instead of the deepest tree
+        active = np.arange(n_rows * n_trees)
+        rows = active // n_trees
+        nodes = leaves.copy()
+        for depth in range(self.max_depth):
+            go_right = X[rows, self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[nodes, go_right.view(np.int8)]
+            if depth % 4 == 3 or depth == self.max_depth - 1:
+                done = self.children[nodes, 0] == nodes
+                leaves[active[done]] = nodes[done]
+                remaining = ~done
+                active, rows, nodes = active[remaining], rows[remaining], nodes[remaining]
+                if len(active) == 0:
+                    break
+
+        # Summing over the tree axis accumulates trees in order, matching
+        # the forest's sequential accumulation bit for bit
+        leaf_proba = self.leaf_proba[leaves].reshape(n_rows, n_trees, -1)
+        return np.add.reduce(leaf_proba, axis=1) / n_trees
@@ -0,0 +1,239 @@
+"""
+ML Infrastructure - Pruned and int8-quantized linear models for export
+"""
+import numpy as np
+import scipy.sparse as sp
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.svm import SVC
+
+# Same clipping libsvm applies to pairwise Platt probabilities
+MIN_PAIRWISE_PROB = 1e-7
+
+
+class CompressedLinearModel:
+    """
+    Linear class scores ``X @ W * scale + intercept`` on a compressed ``W``.
+
+    ``W`` has one column per class (softmax models) or per class pair
+    (one-vs-one SVC). Small-magnitude weights can be pruned away, in which
+    case ``W`` is stored as a sparse matrix, and the remaining weights can
+    be quantized to int8 with one scale factor per column. The int8 form
+    shrinks the artifact and the resident model; it does not save work at
+    scoring time, since ``X @ W`` upcasts the weights it touches to the
+    float dtype of ``X`` (all of them for batches, only the row's columns
+    in ``predict_proba_row``).
+    """
+
+    def __init__(self, weights, scale, intercept, classes, kind: str,
+                 prob_a=None, prob_b=None):
+        self.weights = weights
+        self.scale = scale
+        self.intercept = intercept
+        self.classes_ = classes
+        self.kind = kind
+        self.prob_a = prob_a
+        self.prob_b = prob_b
+
+    @property
+    def n_features(self) -> int:
+        return self.weights.shape[0]
+
+    @property
+    def density(self) -> float:
+        """Share of weights kept after pruning"""
+        if sp.issparse(self.weights):
+            return self.weights.nnz / float(np.prod(self.weights.shape))
+        return float(np.mean(self.weights != 0))
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the weights and per-column parameters"""
+        if sp.issparse(self.weights):
+            weight_bytes = (
+                self.weights.data.nbytes + self.weights.indices.nbytes
+                + self.weights.indptr.nbytes
+            )
+        else:
+            weight_bytes = self.weights.nbytes
+        extra = sum(
+            array.nbytes for array in (self.prob_a, self.prob_b) if array is not None
+        )
+        return int(weight_bytes + self.scale.nbytes + self.intercept.nbytes + extra)
+
+    def decision_function(self, X) -> np.ndarray:
+        """Per-column linear scores"""
+        scores = X @ self.weights
+        if sp.issparse(scores):
+            scores = scores.toarray()
+        return np.asarray(scores) * self.scale + self.intercept
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self._probabilities(self.decision_function(X))
+
+    def predict_proba_row(self, columns: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Probabilities of a single row given as its non-zero columns and values
+
+        Skips building a sparse matrix, which dominates the cost of scoring
+        one row against a small model.
+        """
+        if sp.issparse(self.weights):
+            row = sp.csr_matrix(
+                (values, columns, [0, len(columns)]), shape=(1, self.n_features)
+            )
+            return self.predict_proba(row)[0]
+        scores = values @ self.weights[columns] * self.scale + self.intercept
+        return self._probabilities(scores[np.newaxis, :].astype(np.float64))[0]
+
+    def _probabilities(self, scores: np.ndarray) -> np.ndarray:
+        if self.kind == "ovo":
+            return self._couple_pairwise(scores)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict(self, X) -> np.ndarray:
+        if self.kind == "ovo":
+            return self.classes_.take(self._vote_pairwise(self.decision_function(X)), axis=0)
+        return self.classes_.take(np.argmax(self.decision_function(X), axis=1), axis=0)
+
+    def _vote_pairwise(self, decision: np.ndarray) -> np.ndarray:
+        """
+        One-vs-one majority vote, which is what SVC.predict returns
+
+        Platt-scaled probabilities can disagree with the vote (notably on
+        small training sets), so labels are not derived from them.
+        """
+        n_classes = len(self.classes_)
+        first, second = np.triu_indices(n_classes, k=1)
+        winners = np.where(decision > 0, first, second)
+        votes = np.zeros((decision.shape[0], n_classes), dtype=np.int64)
+        np.add.at(votes, (np.arange(decision.shape[0])[:, np.newaxis], winners), 1)
+        # Ties go to the lowest class index, as in libsvm
+        return np.argmax(votes, axis=1)
+
+    def _couple_pairwise(self, decision: np.ndarray) -> np.ndarray:
+        """
+        Multiclass probabilities from one-vs-one scores, as libsvm does
+
+        Pairwise Platt probabilities are combined with the second method of
+        Wu, Lin & Weng (2004), solved exactly as a small linear system per
+        row instead of libsvm's fixed-point iteration (which stops within
+        0.005 / n_classes of it, so results differ from SVC by that much).
+        """
+        n_rows, n_classes = decision.shape[0], len(self.classes_)
+        f_apb = decision * self.prob_a + self.prob_b
+        # Numerically stable 1 / (1 + exp(f_apb))
+        pairwise = np.where(
+            f_apb >= 0,
+            np.exp(-np.abs(f_apb)) / (1.0 + np.exp(-np.abs(f_apb))),
+            1.0 / (1.0 + np.exp(-np.abs(f_apb)))
+        )
+        pairwise = np.clip(pairwise, MIN_PAIRWISE_PROB, 1 - MIN_PAIRWISE_PROB)
+
+        r = np.zeros((n_rows, n_classes, n_classes))
+        first, second = np.triu_indices(n_classes, k=1)
+        r[:, first, second] = pairwise
+        r[:, second, first] = 1.0 - pairwise
+
+        # Q[t, t] = sum_s r[s, t]^2 and Q[t, s] = -r[s, t] * r[t, s]
+        q = -r.transpose(0, 2, 1) * r
+        diagonal = np.arange(n_classes)
+        q[:, diagonal, diagonal] = (r ** 2).sum(axis=1)
+
+        # Minimize p' Q p subject to sum(p) = 1 via the KKT system
+        system = np.zeros((n_rows, n_classes + 1, n_classes + 1))
+        system[:, :n_classes, :n_classes] = q
+        system[:, :n_classes, n_classes] = 1.0
+        system[:, n_classes, :n_classes] = 1.0
+        rhs = np.zeros((n_rows, n_classes + 1, 1))
+        rhs[:, n_classes] = 1.0
+        return np.linalg.solve(system, rhs)[:, :n_classes, 0]
+
+
+def _linear_parameters(model):
+    """Extract ``(W, intercept, kind)`` with one column of W per output"""
+    if isinstance(model, MultinomialNB):
+        return model.feature_log_prob_.T, model.class_log_prior_, "softmax"
+    if isinstance(model, LogisticRegression):
+        if len(model.classes_) == 2:
+            # sigmoid(z) is the softmax of (0, z)
+            weights = np.column_stack((np.zeros(model.coef_.shape[1]), model.coef_[0]))
+            return weights, np.array([0.0, model.intercept_[0]]), "softmax"
+        if model.multi_class == "ovr" or model.solver == "liblinear":
+            raise ValueError("Only multinomial LogisticRegression can be compressed")
+        return model.coef_.T, model.intercept_, "softmax"
+    if isinstance(model, SVC):
+        if model.kernel != "linear" or not model.probability:
+            raise ValueError("Only linear SVC with probability estimates can be compressed")
+        if len(model.classes_) <= 2:
+            raise ValueError("Binary SVC compression is not supported")
+        coef = model.coef_
+        coef = coef.toarray() if sp.issparse(coef) else coef
+        return coef.T, model.intercept_, "ovo"
+    raise ValueError(f"Cannot compress model of type {type(model).__name__}")
+
+
+def compress_linear_model(
+    model, prune_ratio: float = 0.0, quantize: bool = True
+) -> CompressedLinearModel:
+    """
+    Build a compressed copy of a fitted linear model
+
+    Softmax models are first centred per feature across classes, which
+    leaves their probabilities unchanged and moves weights that do not
+    discriminate between classes towards zero before pruning.
+
+    Args:
+        model: Fitted MultinomialNB, binary or multinomial
+            LogisticRegression or linear SVC with probability estimates
+        prune_ratio: Share of smallest-magnitude weights zeroed per column
+        quantize: Store the remaining weights as int8 with a per-column scale
+
+    Returns:
+        The compressed model
+    """
+    if not 0.0 <= prune_ratio < 1.0:
+        raise ValueError("prune_ratio must be in [0, 1)")
+
+    weights, intercept, kind = _linear_parameters(model)
+    weights = np.array(weights, dtype=np.float64)
+    if kind == "softmax":
+        weights -= weights.mean(axis=1, keepdims=True)
+
+    if prune_ratio > 0:
+        magnitude = np.abs(weights)
+        cutoff = np.quantile(magnitude, prune_ratio, axis=0, keepdims=True)
+        weights[magnitude <= cutoff] = 0.0
+
+    if quantize:
+        scale = np.abs(weights).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        stored = np.rint(weights / scale).astype(np.int8)
+    else:
+        scale = np.ones(weights.shape[1])
+        stored = weights.astype(np.float32)
+
+    # Column-compressed storage pays a 4-byte row index per kept weight;
+    # use it only when pruning removed enough weights for that to be smaller
+    nnz = int(np.count_nonzero(stored))
+    sparse_bytes = nnz * (stored.itemsize + 4) + (stored.shape[1] + 1) * 4
+    if sparse_bytes < stored.nbytes:
+        stored = sp.csc_matrix(stored)
+
+    prob_a = prob_b = None
+    if kind == "ovo":
+        prob_a = model.probA_.astype(np.float64)
+        prob_b = model.probB_.astype(np.float64)
+
+    return CompressedLinearModel(
+        weights=stored,
+        scale=scale.astype(np.float32),
+        intercept=np.asarray(intercept, dtype=np.float32),
+        classes=model.classes_,
+        kind=kind,
+        prob_a=prob_a,
+        prob_b=prob_b
+    )
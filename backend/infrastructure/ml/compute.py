@@ -0,0 +1,155 @@
+"""
+ML Infrastructure - Native thread limits for inference and training
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from threadpoolctl import ThreadpoolController
+from common.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def available_cores() -> int:
+    """Cores this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class ComputeResources:
+    """
+    Native thread budgets (BLAS, OpenMP, joblib) of one worker process
+
+    Every worker gets ``cores // workers`` cores. Model calls made under
+    ``inference()`` use ``inference_threads`` native threads, so the
+    requests running side by side on the thread pool do not each start a
+    full set of BLAS/OpenMP threads; calls under ``training()`` use
+    ``training_threads``, and forests train with ``training_jobs`` joblib
+    workers.
+
+    OpenMP limits belong to the calling thread and are switched when a
+    thread moves between inference and training. The BLAS pool is shared by
+    the whole process: it is held at the inference limit and raised to the
+    training limit while at least one training runs.
+    """
+
+    def __init__(
+        self,
+        inference_threads: int,
+        training_threads: int,
+        training_jobs: int,
+        workers: int = 1,
+        enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.cores = available_cores()
+        self.workers = max(workers, 1)
+        self.cores_per_worker = max(self.cores // self.workers, 1)
+        self.inference_threads = self._count(inference_threads)
+        self.training_threads = self._count(training_threads)
+        self.training_jobs = self._count(training_jobs)
+        self._controller: Optional[ThreadpoolController] = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._trainings = 0
+
+    def _count(self, threads: int) -> int:
+        """A configured count as is; 0 (or less) means all cores of the worker"""
+        return threads if threads > 0 else self.cores_per_worker
+
+    @property
+    def controller(self) -> ThreadpoolController:
+        """Native thread pools of the libraries loaded when first needed"""
+        if self._controller is None:
+            self._controller = ThreadpoolController()
+        return self._controller
+
+    def apply(self):
+        """Hold the shared BLAS pool to the inference limit; called at startup"""
+        if not self.enabled:
+            return
+        self._controller = ThreadpoolController()
+        with self._lock:
+            if self._trainings == 0:
+                self.controller.limit(limits=self.inference_threads, user_api="blas")
+        logger.info(
+            f"Native threads per worker: inference={self.inference_threads} "
+            f"training={self.training_threads} jobs={self.training_jobs} "
+            f"({self.cores} cores, {self.workers} workers)"
+        )
+
+    @contextmanager
+    def inference(self) -> Iterator[None]:
+        """Run the calling thread's model calls within the inference budget"""
+        if self.enabled and getattr(self._local, "training_depth", 0) == 0:
+            self._limit_thread(self.inference_threads)
+        yield
+
+    @contextmanager
+    def training(self) -> Iterator[None]:
+        """Run the calling thread's model calls within the training budget"""
+        depth = getattr(self._local, "training_depth", 0)
+        if not self.enabled or depth > 0:
+            self._local.training_depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.training_depth = depth
+            return
+
+        self._local.training_depth = 1
+        with self._lock:
+            self._trainings += 1
+            if self._trainings == 1:
+                self.controller.limit(limits=self.training_threads, user_api="blas")
+        self._limit_thread(self.training_threads)
+        try:
+            yield
+        finally:
+            self._local.training_depth = 0
+            with self._lock:
+                self._trainings -= 1
+                if self._trainings == 0:
+                    self.controller.limit(limits=self.inference_threads, user_api="blas")
+            self._limit_thread(self.inference_threads)
+
+    def _limit_thread(self, threads: int):
+        """Set the calling thread's OpenMP limit if it differs"""
+        if getattr(self._local, "openmp_threads", None) != threads:
+            self.controller.limit(limits=threads, user_api="openmp")
+            self._local.openmp_threads = threads
+
+    def get_settings(self) -> Dict[str, Any]:
+        """Effective limits and the native pools as seen from the calling thread"""
+        return {
+            "enabled": self.enabled,
+            "cores": self.cores,
+            "workers": self.workers,
+            "cores_per_worker": self.cores_per_worker,
+            "inference_threads": self.inference_threads,
+            "training_threads": self.training_threads,
+            "training_jobs": self.training_jobs,
+            "active_trainings": self._trainings,
+            "native_pools": [
+                {
+                    "user_api": pool["user_api"],
+                    "internal_api": pool["internal_api"],
+                    "num_threads": pool["num_threads"]
+                }
+                for pool in self.controller.info()
+            ]
+        }
+
+
+# Create a singleton instance
+compute_resources = ComputeResources(
+    settings.inference_threads,
+    settings.training_threads,
+    settings.training_jobs,
+    workers=settings.web_concurrency,
+    enabled=settings.thread_limits
+)
@@ -0,0 +1,241 @@
+"""
+ML Infrastructure - Hierarchical (taxonomy-aware) classification
+"""
+import heapq
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+import scipy.sparse as sp
+from infrastructure.ml.classifiers import create_classifier
+from infrastructure.ml.compression import CompressedLinearModel, compress_linear_model
+
+ROOT = ""
+# Floor for child probabilities before taking logs
+MIN_PROBABILITY = 1e-12
+
+
+class HierarchicalClassifier:
+    """
+    Top-k leaf prediction over a label tree such as department/team/queue.
+
+    Every internal node with more than one child gets its own small model
+    that only tells its children apart, trained on the samples below that
+    node and on the feature columns those samples actually use. Inference
+    is a beam search from the root: only the children of the nodes kept in
+    the beam are scored, so the cost follows the depth of the tree and the
+    beam width rather than the number of leaves.
+
+    Linear node models (MultinomialNB, LogisticRegression, linear SVM) are
+    kept as CompressedLinearModel scorers without quantization, which gives
+    the same probabilities without sklearn's per-call input validation.
+    """
+
+    def __init__(self, node_model: str = "LogisticRegression", separator: str = "/"):
+        self.node_model = node_model
+        self.separator = separator
+        # Node path -> child node paths; leaves have no entry
+        self.children: Dict[str, List[str]] = {}
+        # Node path -> model choosing among its children (predict_proba)
+        self.models: Dict[str, object] = {}
+        # Node path -> child paths in the order of the model's columns
+        self.node_classes: Dict[str, np.ndarray] = {}
+        # Node path -> sorted global feature indices its model was trained on
+        self.node_features: Dict[str, np.ndarray] = {}
+        self.n_features = 0
+        self.is_trained = False
+
+    @property
+    def leaves(self) -> List[str]:
+        internal = set(self.children)
+        return [
+            child for children in self.children.values() for child in children
+            if child not in internal
+        ]
+
+    @property
+    def depth(self) -> int:
+        return max((leaf.count(self.separator) + 1 for leaf in self.leaves), default=0)
+
+    def fit(self, X, paths: List[str]) -> Dict:
+        """
+        Train one classifier per internal node
+
+        Args:
+            X: Feature matrix (CSR)
+            paths: Leaf path of every sample, e.g. ``"IT/Network/VPN"``
+
+        Returns:
+            Taxonomy size and training statistics
+        """
+        if X.shape[0] != len(paths):
+            raise ValueError("Samples and label paths must have the same length")
+        start_time = time.perf_counter()
+        X = sp.csr_matrix(X)
+
+        # Node path of every sample at every depth
+        parts = [path.split(self.separator) for path in paths]
+        if any(not part for split in parts for part in split):
+            raise ValueError("Label paths must not contain empty segments")
+        node_paths = [
+            [self.separator.join(split[:depth]) for depth in range(len(split) + 1)]
+            for split in parts
+        ]
+
+        children: Dict[str, Dict[str, None]] = {}
+        members: Dict[str, List[int]] = {}
+        for row, nodes in enumerate(node_paths):
+            for parent, child in zip(nodes[:-1], nodes[1:]):
+                children.setdefault(parent, {})[child] = None
+                members.setdefault(parent, []).append(row)
+        leaf_labels = {nodes[-1] for nodes in node_paths}
+        overlap = leaf_labels & set(children)
+        if overlap:
+            raise ValueError(
+                f"Labels must be leaves, but these also have children: {sorted(overlap)[:5]}"
+            )
+
+        self.children = {node: list(child_map) for node, child_map in children.items()}
+        self.models = {}
+        self.node_classes = {}
+        self.node_features = {}
+        self.n_features = X.shape[1]
+        node_results = {}
+
+        for node, child_list in self.children.items():
+            if len(child_list) < 2:
+                continue
+            rows = np.asarray(members[node])
+            depth = 0 if node == ROOT else node.count(self.separator) + 1
+            y = [node_paths[row][depth + 1] for row in rows]
+
+            X_node = X[rows]
+            features = np.unique(X_node.indices).astype(np.int32)
+            X_node = self._restrict(X_node, features)
+
+            classifier = create_classifier(self.node_model)
+            result = classifier.train(X_node, y)
+            if not classifier.is_trained:
+                raise ValueError(f"Training node '{node}' failed: {result['status']}")
+            try:
+                self.models[node] = compress_linear_model(classifier.model, quantize=False)
+            except ValueError:
+                self.models[node] = classifier
+            self.node_classes[node] = np.asarray(classifier.model.classes_)
+            self.node_features[node] = features
+            node_results[node] = result
+
+        self.is_trained = True
+        accuracies = [result["accuracy"] for result in node_results.values()]
+        return {
+            "node_model": self.node_model,
+            "leaves": len(leaf_labels),
+            "internal_nodes": len(self.children),
+            "node_models": len(self.models),
+            "depth": self.depth,
+            "mean_node_accuracy": round(float(np.mean(accuracies)), 3) if accuracies else 1.0,
+            "training_time": round(time.perf_counter() - start_time, 4)
+        }
+
+    def predict_top_k(
+        self, X, k: int = 5, beam_width: int = 10
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Most probable leaves per row via beam search
+
+        A leaf's probability is the product of the child probabilities along
+        its path. Search stops once no path left in the beam can beat the
+        k-th best leaf found so far.
+
+        Returns:
+            Per row, up to ``k`` ``(leaf_path, probability)`` pairs, best first
+        """
+        if not self.is_trained:
+            raise ValueError("Hierarchical classifier is not trained yet")
+        X = sp.csr_matrix(X)
+        X.sort_indices()
+        return [
+            self._beam_search(
+                X.indices[X.indptr[row]:X.indptr[row + 1]],
+                X.data[X.indptr[row]:X.indptr[row + 1]],
+                k, max(beam_width, k)
+            )
+            for row in range(X.shape[0])
+        ]
+
+    def _beam_search(
+        self, columns: np.ndarray, values: np.ndarray, k: int, beam_width: int
+    ) -> List[Tuple[str, float]]:
+        beam = [(0.0, ROOT)]
+        finished: List[Tuple[float, str]] = []
+        while beam:
+            candidates = []
+            for log_prob, node in beam:
+                child_list = self.children.get(node)
+                if child_list is None:
+                    finished.append((log_prob, node))
+                    continue
+                scores = self._score_children(columns, values, node, child_list)
+                for child, child_log_prob in scores:
+                    candidates.append((log_prob + child_log_prob, child))
+
+            finished = heapq.nlargest(k, finished)
+            beam = heapq.nlargest(beam_width, candidates)
+            # Path probabilities only shrink further down the tree
+            if len(finished) == k and (not beam or beam[0][0] <= finished[-1][0]):
+                break
+        return [(leaf, float(np.exp(log_prob))) for log_prob, leaf in finished]
+
+    def _score_children(
+        self, columns: np.ndarray, values: np.ndarray, node: str, child_list: List[str]
+    ):
+        """Log-probability of each child of ``node`` for a single row"""
+        model = self.models.get(node)
+        if model is None:
+            return [(child_list[0], 0.0)]
+        features = self.node_features[node]
+        if len(features) == 0:
+            positions = kept = np.zeros(0, dtype=np.int64)
+        else:
+            positions = np.searchsorted(features, columns)
+            positions[positions == len(features)] = 0
+            kept = features[positions] == columns
+        if isinstance(model, CompressedLinearModel):
+            probabilities = model.predict_proba_row(positions[kept], values[kept])
+        else:
+            row = sp.csr_matrix(
+                (values[kept], positions[kept], [0, int(kept.sum())]),
+                shape=(1, len(features))
+            )
+            probabilities = model.predict_proba(row)[0]
+        log_probs = np.log(np.maximum(probabilities, MIN_PROBABILITY))
+        return zip(self.node_classes[node], log_probs)
+
+    @staticmethod
+    def _restrict(X: sp.csr_matrix, features: np.ndarray) -> sp.csr_matrix:
+        """Keep and renumber the columns a node model was trained on"""
+        if len(features) == 0:
+            return sp.csr_matrix((X.shape[0], 0), dtype=X.dtype)
+        positions = np.searchsorted(features, X.indices)
+        positions[positions == len(features)] = 0
+        kept = features[positions] == X.indices
+        indptr = np.concatenate(([0], np.cumsum(kept)))[X.indptr]
+        return sp.csr_matrix(
+            (X.data[kept], positions[kept], indptr), shape=(X.shape[0], len(features))
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory of the node feature lists and compiled linear node models
+
+        Tree and kernel node models kept as classifiers are not counted.
+        """
+        total = sum(features.nbytes for features in self.node_features.values())
+        total += sum(getattr(model, "nbytes", 0) for model in self.models.values())
+        return int(total)
+
+    def to_float32(self):
+        """Store node classifiers that were not compiled in single precision"""
+        for model in self.models.values():
+            if hasattr(model, "to_float32"):
+                model.to_float32()
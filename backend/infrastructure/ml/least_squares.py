@@ -0,0 +1,166 @@
+"""
+ML Infrastructure - Sufficient statistics for exact online least squares
+"""
+from typing import Dict, Tuple
+import numpy as np
+
+
+class LeastSquaresStatistics:
+    """
+    Running sufficient statistics of ordinary least squares with intercept.
+
+    Holds the (weighted) row count, the feature and target means and the
+    centered scatter matrices C_xx = Xc^T Xc, C_xy = Xc^T yc, C_yy = yc^T yc.
+    These carry the same information as X^T X, X^T y, n and the column sums,
+    but chunks are combined with the pairwise update of Chan et al., which
+    avoids the cancellation of forming X^T X - n * mean mean^T from raw
+    sums. Chunks can therefore arrive in any order or be accumulated on
+    separate workers and merged; the solution is the OLS fit on all rows.
+
+    Exponential forgetting scales the weight of everything seen so far
+    before a new chunk is added.
+    """
+
+    def __init__(self, n_features: int):
+        self.n_features = n_features
+        self.count = 0.0
+        self.mean_x = np.zeros(n_features)
+        self.mean_y = 0.0
+        self.c_xx = np.zeros((n_features, n_features))
+        self.c_xy = np.zeros(n_features)
+        self.c_yy = 0.0
+
+    @classmethod
+    def from_data(cls, X: np.ndarray, y: np.ndarray) -> "LeastSquaresStatistics":
+        X, y = _as_float_arrays(X, y)
+        statistics = cls(X.shape[1])
+        if len(y) == 0:
+            return statistics
+        statistics.count = float(len(y))
+        statistics.mean_x = X.mean(axis=0)
+        statistics.mean_y = float(y.mean())
+        X_centered = X - statistics.mean_x
+        y_centered = y - statistics.mean_y
+        statistics.c_xx = X_centered.T @ X_centered
+        statistics.c_xy = X_centered.T @ y_centered
+        statistics.c_yy = float(y_centered @ y_centered)
+        return statistics
+
+    def copy(self) -> "LeastSquaresStatistics":
+        """Independent copy, e.g. to update while the original stays in use"""
+        statistics = LeastSquaresStatistics(self.n_features)
+        statistics.count = self.count
+        statistics.mean_x = self.mean_x.copy()
+        statistics.mean_y = self.mean_y
+        statistics.c_xx = self.c_xx.copy()
+        statistics.c_xy = self.c_xy.copy()
+        statistics.c_yy = self.c_yy
+        return statistics
+
+    def update(self, X: np.ndarray, y: np.ndarray, forgetting: float = 1.0):
+        """
+        Add a chunk of rows
+
+        Args:
+            X: Feature matrix of the chunk
+            y: Targets of the chunk
+            forgetting: Weight in (0, 1] kept by all previous rows
+        """
+        if not 0.0 < forgetting <= 1.0:
+            raise ValueError("Forgetting factor must be in (0, 1]")
+        if forgetting < 1.0:
+            self.count *= forgetting
+            self.c_xx *= forgetting
+            self.c_xy *= forgetting
+            self.c_yy *= forgetting
+        self.merge(LeastSquaresStatistics.from_data(X, y))
+
+    def merge(self, other: "LeastSquaresStatistics"):
+        """Combine with statistics accumulated over other rows"""
+        if other.n_features != self.n_features:
+            raise ValueError(
+                f"Cannot merge statistics over {other.n_features} features "
+                f"into {self.n_features}"
+            )
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta_x = other.mean_x - self.mean_x
+        delta_y = other.mean_y - self.mean_y
+        scale = self.count * other.count / total
+        self.c_xx += other.c_xx + scale * np.outer(delta_x, delta_x)
+        self.c_xy += other.c_xy + scale * delta_x * delta_y
+        self.c_yy += other.c_yy + scale * delta_y * delta_y
+        self.mean_x = self.mean_x + delta_x * (other.count / total)
+        self.mean_y = self.mean_y + delta_y * (other.count / total)
+        self.count = total
+
+    def solve(self) -> Tuple[np.ndarray, float]:
+        """
+        Coefficients and intercept of the least-squares fit
+
+        Solves the d x d normal equations. Rank-deficient systems get the
+        minimum-norm solution, as LinearRegression does.
+        """
+        if self.count == 0:
+            raise ValueError("No rows have been added")
+        coef = np.linalg.lstsq(self.c_xx, self.c_xy, rcond=None)[0]
+        intercept = self.mean_y - float(self.mean_x @ coef)
+        return coef, intercept
+
+    def mse(self, coef: np.ndarray) -> float:
+        """Weighted mean squared residual of ``coef`` over all added rows"""
+        if self.count == 0:
+            return 0.0
+        sse = self.c_yy - 2 * float(coef @ self.c_xy) + float(coef @ self.c_xx @ coef)
+        return max(sse, 0.0) / self.count
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Plain arrays, e.g. for ``np.savez`` on a worker"""
+        return {
+            "count": np.array(self.count),
+            "mean_x": self.mean_x,
+            "mean_y": np.array(self.mean_y),
+            "c_xx": self.c_xx,
+            "c_xy": self.c_xy,
+            "c_yy": np.array(self.c_yy)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "LeastSquaresStatistics":
+        """
+        Rebuild statistics saved with ``to_arrays``
+
+        Raises:
+            ValueError: If an array is missing, has the wrong shape or holds
+                NaN or infinite values
+        """
+        try:
+            mean_x = np.asarray(arrays["mean_x"], dtype=np.float64)
+            statistics = cls(len(mean_x))
+            statistics.count = float(arrays["count"])
+            statistics.mean_x = mean_x
+            statistics.mean_y = float(arrays["mean_y"])
+            statistics.c_xx = np.asarray(arrays["c_xx"], dtype=np.float64)
+            statistics.c_xy = np.asarray(arrays["c_xy"], dtype=np.float64)
+            statistics.c_yy = float(arrays["c_yy"])
+        except KeyError as e:
+            raise ValueError(f"Missing statistics array: {e}")
+        except TypeError as e:
+            raise ValueError(f"Invalid statistics array: {e}")
+        d = statistics.n_features
+        if statistics.c_xx.shape != (d, d) or statistics.c_xy.shape != (d,):
+            raise ValueError("Statistics arrays have inconsistent shapes")
+        if not all(np.isfinite(value).all() for value in statistics.to_arrays().values()):
+            raise ValueError("Statistics arrays must hold finite values")
+        if statistics.count < 0:
+            raise ValueError("Statistics row count cannot be negative")
+        return statistics
+
+
+def _as_float_arrays(X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64).ravel()
+    if X.ndim != 2 or len(X) != len(y):
+        raise ValueError("Expected a 2-D feature matrix with one target per row")
+    return X, y
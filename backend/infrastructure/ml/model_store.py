@@ -0,0 +1,201 @@
+"""
+ML Infrastructure - Versioned on-disk store for the generic ML models
+"""
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import sklearn
+from infrastructure.ml.base_models import MLModel
+import logging
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT = "ml-model-v1"
+METADATA_FILE = "metadata.json"
+CURRENT_FILE = "CURRENT"
+VERSION_PATTERN = re.compile(r"^\d{6}$")
+
+
+class ModelStore:
+    """
+    Versioned directories of saved models
+
+    Each model name owns ``<root_dir>/<name>/<version>/`` holding the files
+    of ``MLModel.save_model`` plus ``metadata.json`` (store format, training
+    data shape, schema hash, metrics). A version is written to a staging
+    directory and renamed into place before ``CURRENT`` is atomically
+    switched to it, so other workers never open a half-written version.
+    Versions beyond ``keep_versions`` are deleted; processes that still
+    map their files keep reading the unlinked pages.
+    """
+
+    def __init__(self, root_dir: str, keep_versions: int = 3):
+        self.root_dir = root_dir
+        self.keep_versions = max(keep_versions, 1)
+
+    def save(self, name: str, model: MLModel, metadata: Dict[str, Any]) -> str:
+        """
+        Save ``model`` as the new current version of ``name``
+
+        Returns:
+            The version id
+        """
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        staging = os.path.join(model_dir, f".staging-{os.getpid()}-{threading.get_ident()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            model.save_model(staging)
+            while True:
+                version = f"{self._latest_number(name) + 1:06d}"
+                with open(os.path.join(staging, METADATA_FILE), "w") as f:
+                    json.dump({
+                        **metadata,
+                        "format": STORE_FORMAT,
+                        "version": version,
+                        "saved_at": datetime.now().isoformat(),
+                        "sklearn_version": sklearn.__version__
+                    }, f)
+                try:
+                    os.rename(staging, os.path.join(model_dir, version))
+                    break
+                except OSError:
+                    # Another worker saved this version number first
+                    if not os.path.isdir(os.path.join(model_dir, version)):
+                        raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        current = os.path.join(model_dir, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+        with open(current, "w") as f:
+            f.write(version)
+        os.replace(current, os.path.join(model_dir, CURRENT_FILE))
+        self._prune(name)
+        return version
+
+    def load(
+        self,
+        name: str,
+        factory: Callable[[], MLModel],
+        version: Optional[str] = None,
+        mmap: bool = True
+    ) -> Optional[Tuple[MLModel, Dict[str, Any]]]:
+        """
+        Load the current version of ``name`` into a new model from ``factory``
+
+        A current version that is stale (other store format, or a schema or
+        feature count that does not match its metadata) or unreadable is
+        skipped in favour of the newest older version that loads.
+
+        Returns:
+            The model and its metadata, or None if no usable version exists
+
+        Raises:
+            ValueError: If an explicitly requested version is malformed,
+                missing or stale
+        """
+        if version is not None:
+            # Only ids of saved versions may become part of a path
+            if not VERSION_PATTERN.match(version):
+                raise ValueError("A version is a six-digit version id")
+            if version not in self._versions(name):
+                raise ValueError(f"No saved {name} version {version}")
+        candidates = [version] if version is not None else self._candidates(name)
+        for candidate in candidates:
+            directory = os.path.join(self._model_dir(name), candidate)
+            try:
+                with open(os.path.join(directory, METADATA_FILE)) as f:
+                    metadata = json.load(f)
+                model = factory()
+                model.load_model(directory, mmap)
+                self._check(model, metadata)
+            except Exception as e:
+                if version is not None:
+                    raise ValueError(
+                        f"Cannot restore {name} version {candidate}: {self._reason(e)}"
+                    )
+                logger.warning(f"Skipping saved {name} model version {candidate}: {e}")
+                continue
+            if metadata.get("sklearn_version") != sklearn.__version__:
+                logger.warning(
+                    f"{name} model version {candidate} was saved with scikit-learn "
+                    f"{metadata.get('sklearn_version')}, running {sklearn.__version__}"
+                )
+            return model, metadata
+        return None
+
+    def versions(self, name: str) -> List[Dict[str, Any]]:
+        """Metadata of the saved versions of ``name``, newest first"""
+        current = self._current(name)
+        listed = []
+        for version in reversed(self._versions(name)):
+            try:
+                with open(os.path.join(self._model_dir(name), version, METADATA_FILE)) as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                metadata = {"version": version, "format": None}
+            listed.append({**metadata, "current": version == current})
+        return listed
+
+    @staticmethod
+    def _reason(error: Exception) -> str:
+        """Why a version failed to load, without the file paths OS errors carry"""
+        if isinstance(error, OSError):
+            return error.strerror or type(error).__name__
+        return str(error) or type(error).__name__
+
+    @staticmethod
+    def _check(model: MLModel, metadata: Dict[str, Any]):
+        """Raise ValueError if a loaded model does not match its metadata"""
+        if metadata.get("format") != STORE_FORMAT:
+            raise ValueError(f"unsupported store format {metadata.get('format')!r}")
+        if model.schema is None or model.schema.fingerprint() != metadata.get("schema_hash"):
+            raise ValueError("schema does not match the schema hash it was saved with")
+        n_features = model.n_features
+        if n_features is not None and n_features != metadata.get("data_shape", [None, None])[1]:
+            raise ValueError(
+                f"model takes {n_features} features, metadata says {metadata.get('data_shape')}"
+            )
+
+    def _candidates(self, name: str) -> List[str]:
+        versions = list(reversed(self._versions(name)))
+        current = self._current(name)
+        if current in versions:
+            versions.remove(current)
+            versions.insert(0, current)
+        return versions
+
+    def _current(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self._model_dir(name), CURRENT_FILE)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _versions(self, name: str) -> List[str]:
+        """Saved version ids, oldest first"""
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        return sorted(
+            entry for entry in os.listdir(model_dir)
+            if VERSION_PATTERN.match(entry) and os.path.isdir(os.path.join(model_dir, entry))
+        )
+
+    def _latest_number(self, name: str) -> int:
+        versions = self._versions(name)
+        return int(versions[-1]) if versions else 0
+
+    def _prune(self, name: str):
+        """Delete the oldest versions beyond ``keep_versions``, never the current one"""
+        current = self._current(name)
+        stale = [v for v in self._versions(name) if v != current][:-(self.keep_versions - 1) or None]
+        for version in stale:
+            shutil.rmtree(os.path.join(self._model_dir(name), version), ignore_errors=True)
+
+    def _model_dir(self, name: str) -> str:
+        return os.path.join(self.root_dir, name)
@@ -0,0 +1,364 @@
+"""
+ML Infrastructure - Streaming drift monitoring of served classifications
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+# Histogram bins of confidences and per-question out-of-vocabulary rates
+CONFIDENCE_BINS = 20
+OOV_BINS = 10
+# Token counts are kept exactly below this; longer questions share the last bin
+MAX_TRACKED_LENGTH = 128
+# Bins of the reference distribution (by quantile) that PSI compares
+PSI_GROUPS = 10
+# Share given to empty bins so PSI stays finite
+PSI_EPSILON = 1e-4
+
+
+def _bin(value: float, bins: int) -> int:
+    """Histogram bin of a value in [0, 1]"""
+    index = int(value * bins)
+    return index if index < bins else bins - 1
+
+
+def _oov_rate(tokens: int, unknown_tokens: int) -> float:
+    """Share of unknown tokens; a question without tokens has nothing known"""
+    return unknown_tokens / tokens if tokens else 1.0
+
+
+@dataclass
+class ReferenceProfile:
+    """Distributions of the training data that live traffic is compared to"""
+    samples: int
+    # Training label counts
+    departments: Dict[str, int]
+    # Histograms over a sample of the training questions
+    confidence: Dict[str, List[int]]
+    length: List[int]
+    oov_rate: List[int]
+    tokens: int
+    unknown_tokens: int
+    created_at: str
+
+    @classmethod
+    def build(
+        cls,
+        labels: Sequence[str],
+        confidences: Dict[str, np.ndarray],
+        lengths: np.ndarray,
+        unknown: np.ndarray
+    ) -> "ReferenceProfile":
+        """
+        Profile training data
+
+        Args:
+            labels: Department of every training question
+            confidences: Per model, top probability on the sampled questions
+            lengths: Analyzer tokens of each sampled question
+            unknown: Tokens of each sampled question not in the vocabulary
+        """
+        departments: Dict[str, int] = {}
+        for label in labels:
+            departments[label] = departments.get(label, 0) + 1
+        rates = np.where(lengths > 0, unknown / np.maximum(lengths, 1), 1.0)
+        return cls(
+            samples=len(lengths),
+            departments=departments,
+            confidence={
+                name: np.bincount(
+                    np.minimum((values * CONFIDENCE_BINS).astype(int), CONFIDENCE_BINS - 1),
+                    minlength=CONFIDENCE_BINS
+                ).tolist()
+                for name, values in confidences.items()
+            },
+            length=np.bincount(
+                np.minimum(lengths, MAX_TRACKED_LENGTH), minlength=MAX_TRACKED_LENGTH + 1
+            ).tolist(),
+            oov_rate=np.bincount(
+                np.minimum((rates * OOV_BINS).astype(int), OOV_BINS - 1), minlength=OOV_BINS
+            ).tolist(),
+            tokens=int(lengths.sum()),
+            unknown_tokens=int(unknown.sum()),
+            created_at=datetime.now().isoformat()
+        )
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class _Bucket:
+    """Sketches of the questions classified during one time bucket"""
+
+    __slots__ = (
+        "id", "count", "departments", "confidence", "confidence_sum",
+        "length", "oov_rate", "tokens", "unknown_tokens"
+    )
+
+    def __init__(self, bucket_id: int):
+        self.id = bucket_id
+        self.count = 0
+        self.departments: Dict[str, int] = {}
+        self.confidence: Dict[str, List[int]] = {}
+        self.confidence_sum: Dict[str, float] = {}
+        self.length = [0] * (MAX_TRACKED_LENGTH + 1)
+        self.oov_rate = [0] * OOV_BINS
+        self.tokens = 0
+        self.unknown_tokens = 0
+
+    def copy(self) -> "_Bucket":
+        bucket = _Bucket(self.id)
+        bucket.count = self.count
+        bucket.departments = dict(self.departments)
+        bucket.confidence = {name: list(histogram) for name, histogram in self.confidence.items()}
+        bucket.confidence_sum = dict(self.confidence_sum)
+        bucket.length = list(self.length)
+        bucket.oov_rate = list(self.oov_rate)
+        bucket.tokens = self.tokens
+        bucket.unknown_tokens = self.unknown_tokens
+        return bucket
+
+
+class DriftMonitor:
+    """
+    Sliding-window sketches of live classifications against a reference
+
+    Every classified question updates a handful of counters in the bucket
+    of the current ``bucket_seconds`` interval: predicted department,
+    a confidence histogram of the model used, the question's length in
+    analyzer tokens and its out-of-vocabulary rate. The buckets form a ring
+    as long as the largest window, so memory is fixed and an update is O(1).
+    Reports sum the buckets of each window and compare them with the
+    reference profile of the training data by population stability index
+    (PSI); sketches above ``psi_threshold`` are reported as drifting once a
+    window holds ``min_samples`` questions.
+
+    Counts are per computed classification, not per request: concurrent
+    identical /classify-question requests coalesced by single-flight
+    classification are observed once.
+    """
+
+    def __init__(
+        self,
+        reference: Optional[ReferenceProfile] = None,
+        windows: Sequence[int] = (300, 3600),
+        bucket_seconds: int = 60,
+        psi_threshold: float = 0.2,
+        min_samples: int = 200,
+        enabled: bool = True
+    ):
+        self.reference = reference
+        self.bucket_seconds = max(bucket_seconds, 1)
+        self.windows = sorted(set(windows)) or [3600]
+        self.psi_threshold = psi_threshold
+        self.min_samples = min_samples
+        self.enabled = enabled
+        self.observed = 0
+        size = max(math.ceil(window / self.bucket_seconds) for window in self.windows)
+        self._buckets: List[Optional[_Bucket]] = [None] * size
+        self._lock = threading.Lock()
+
+    def observe(
+        self,
+        model_name: str,
+        department: str,
+        confidence: float,
+        tokens: int,
+        unknown_tokens: int
+    ):
+        """Count one classified question"""
+        if not self.enabled:
+            return
+        bucket_id = int(time.monotonic() // self.bucket_seconds)
+        confidence_bin = _bin(confidence, CONFIDENCE_BINS)
+        oov_bin = _bin(_oov_rate(tokens, unknown_tokens), OOV_BINS)
+        with self._lock:
+            slot = bucket_id % len(self._buckets)
+            bucket = self._buckets[slot]
+            if bucket is None or bucket.id != bucket_id:
+                bucket = self._buckets[slot] = _Bucket(bucket_id)
+            bucket.count += 1
+            bucket.departments[department] = bucket.departments.get(department, 0) + 1
+            histogram = bucket.confidence.get(model_name)
+            if histogram is None:
+                histogram = bucket.confidence[model_name] = [0] * CONFIDENCE_BINS
+                bucket.confidence_sum[model_name] = 0.0
+            histogram[confidence_bin] += 1
+            bucket.confidence_sum[model_name] += confidence
+            bucket.length[tokens if tokens < MAX_TRACKED_LENGTH else MAX_TRACKED_LENGTH] += 1
+            bucket.oov_rate[oov_bin] += 1
+            bucket.tokens += tokens
+            bucket.unknown_tokens += unknown_tokens
+            self.observed += 1
+
+    def get_report(self) -> Dict[str, Any]:
+        """Live distributions of every window and their drift from the reference"""
+        current = int(time.monotonic() // self.bucket_seconds)
+        with self._lock:
+            # Only the current bucket is still written to
+            buckets = [
+                bucket.copy() if bucket.id == current else bucket
+                for bucket in self._buckets if bucket is not None
+            ]
+            observed = self.observed
+        windows = [self._report_window(window, buckets, current) for window in self.windows]
+        reference = self.reference
+        return {
+            "enabled": self.enabled,
+            "observed": observed,
+            "bucket_seconds": self.bucket_seconds,
+            "psi_threshold": self.psi_threshold,
+            "min_samples": self.min_samples,
+            "reference": {
+                "samples": reference.samples,
+                "training_questions": sum(reference.departments.values()),
+                "models": sorted(reference.confidence),
+                "created_at": reference.created_at
+            } if reference is not None else None,
+            "windows": windows
+        }
+
+    def _report_window(
+        self, window: int, buckets: List[_Bucket], current: int
+    ) -> Dict[str, Any]:
+        first = current - math.ceil(window / self.bucket_seconds)
+        buckets = [bucket for bucket in buckets if first < bucket.id <= current]
+        count = sum(bucket.count for bucket in buckets)
+        reference = self.reference
+
+        departments: Dict[str, int] = {}
+        confidence: Dict[str, np.ndarray] = {}
+        confidence_sum: Dict[str, float] = {}
+        length = np.zeros(MAX_TRACKED_LENGTH + 1, dtype=np.int64)
+        oov_rate = np.zeros(OOV_BINS, dtype=np.int64)
+        tokens = unknown_tokens = 0
+        for bucket in buckets:
+            for department, n in bucket.departments.items():
+                departments[department] = departments.get(department, 0) + n
+            for name, histogram in bucket.confidence.items():
+                if name not in confidence:
+                    confidence[name] = np.zeros(CONFIDENCE_BINS, dtype=np.int64)
+                    confidence_sum[name] = 0.0
+                confidence[name] += histogram
+                confidence_sum[name] += bucket.confidence_sum[name]
+            length += bucket.length
+            oov_rate += bucket.oov_rate
+            tokens += bucket.tokens
+            unknown_tokens += bucket.unknown_tokens
+
+        names = list(reference.departments) if reference is not None else []
+        names += [name for name in departments if name not in names]
+        report = {
+            "window_seconds": window,
+            "samples": count,
+            "departments": {
+                "live": _shares([departments.get(name, 0) for name in names], names),
+                "reference": _shares(
+                    [reference.departments.get(name, 0) for name in names], names
+                ) if reference is not None else None,
+                "psi": _psi(
+                    np.array([departments.get(name, 0) for name in names]),
+                    np.array([reference.departments.get(name, 0) for name in names])
+                ) if reference is not None else None
+            },
+            "confidence": {
+                name: {
+                    "samples": int(histogram.sum()),
+                    "mean": round(confidence_sum[name] / histogram.sum(), 4),
+                    "reference_mean": (
+                        _histogram_mean(reference.confidence[name])
+                        if reference is not None and name in reference.confidence else None
+                    ),
+                    "psi": (
+                        _psi(histogram, np.array(reference.confidence[name]), regroup=True)
+                        if reference is not None and name in reference.confidence else None
+                    )
+                }
+                for name, histogram in confidence.items()
+            },
+            "oov_rate": {
+                "live": round(unknown_tokens / tokens, 4) if tokens else None,
+                "reference": (
+                    round(reference.unknown_tokens / reference.tokens, 4)
+                    if reference is not None and reference.tokens else None
+                ),
+                "psi": (
+                    _psi(oov_rate, np.array(reference.oov_rate), regroup=True)
+                    if reference is not None else None
+                )
+            },
+            "length_tokens": {
+                "live": _quantiles(length),
+                "reference": _quantiles(np.array(reference.length)) if reference is not None else None,
+                "psi": (
+                    _psi(length, np.array(reference.length), regroup=True)
+                    if reference is not None else None
+                )
+            }
+        }
+
+        drift = []
+        if count >= self.min_samples:
+            scores = [
+                ("departments", report["departments"]["psi"]),
+                ("oov_rate", report["oov_rate"]["psi"]),
+                ("length_tokens", report["length_tokens"]["psi"])
+            ] + [
+                (f"confidence:{name}", sketch["psi"])
+                for name, sketch in report["confidence"].items()
+                if sketch["samples"] >= self.min_samples
+            ]
+            drift = [name for name, psi in scores if psi is not None and psi > self.psi_threshold]
+        report["drift"] = drift
+        return report
+
+
+def _shares(counts: List[int], names: List[str]) -> Dict[str, float]:
+    total = sum(counts)
+    return {name: round(n / total, 4) if total else 0.0 for name, n in zip(names, counts)}
+
+
+def _histogram_mean(histogram: List[int]) -> Optional[float]:
+    """Mean of a [0, 1] histogram taken at the bin centers"""
+    counts = np.array(histogram)
+    if not counts.sum():
+        return None
+    centers = (np.arange(len(counts)) + 0.5) / len(counts)
+    return round(float(counts @ centers / counts.sum()), 4)
+
+
+def _quantiles(histogram: np.ndarray) -> Optional[Dict[str, int]]:
+    """p50/p90/p99 of a histogram of token counts (the last bin is open-ended)"""
+    total = histogram.sum()
+    if not total:
+        return None
+    cumulative = np.cumsum(histogram)
+    return {
+        f"p{q}": int(np.searchsorted(cumulative, total * q / 100))
+        for q in (50, 90, 99)
+    }
+
+
+def _psi(live: np.ndarray, reference: np.ndarray, regroup: bool = False) -> Optional[float]:
+    """
+    Population stability index of two histograms over the same bins
+
+    With ``regroup`` adjacent bins are first merged into about PSI_GROUPS
+    groups holding equal shares of the reference, so sparse fine-grained
+    histograms are not dominated by sampling noise.
+    """
+    if not live.sum() or not reference.sum():
+        return None
+    if regroup:
+        cumulative = np.cumsum(reference) / reference.sum()
+        cuts = np.searchsorted(cumulative, np.arange(1, PSI_GROUPS) / PSI_GROUPS, side="right") + 1
+        starts = np.unique(np.concatenate([[0], cuts[cuts < len(reference)]]))
+        live = np.add.reduceat(live, starts)
+        reference = np.add.reduceat(reference, starts)
+    p = np.maximum(live / live.sum(), PSI_EPSILON)
+    q = np.maximum(reference / reference.sum(), PSI_EPSILON)
+    return round(float(np.sum((p - q) * np.log(p / q))), 4)
@@ -0,0 +1,161 @@
+"""
+ML Infrastructure - Out-of-core training for the generic classifier
+"""
+import time
+from typing import Callable, Iterable, Tuple
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+# Returns a fresh iterator of (X, y) chunks in the same order on every call
+ChunkSource = Callable[[], Iterable[Tuple[np.ndarray, np.ndarray]]]
+
+OUT_OF_CORE_METHODS = ["forest", "sgd"]
+
+
+def holdout_mask(chunk_index: int, n_rows: int, test_size: float, seed: int) -> np.ndarray:
+    """
+    Held-out rows of a chunk
+
+    Drawn from a generator seeded by the chunk index, so every pass over
+    the same chunks selects the same rows without storing them.
+    """
+    return np.random.default_rng([seed, chunk_index]).random(n_rows) < test_size
+
+
+def scan(chunks: ChunkSource, test_size: float, seed: int):
+    """
+    First pass: class labels, feature scaling and row counts
+
+    Returns:
+        Sorted classes, a StandardScaler fitted on the training rows, and
+        the number of training and held-out rows
+    """
+    classes = set()
+    scaler = StandardScaler()
+    n_train = n_test = 0
+    for index, (X, y) in enumerate(chunks()):
+        mask = holdout_mask(index, len(y), test_size, seed)
+        classes.update(np.unique(y).tolist())
+        if (~mask).any():
+            scaler.partial_fit(X[~mask])
+        n_train += int((~mask).sum())
+        n_test += int(mask.sum())
+    if n_train == 0:
+        raise ValueError("No training rows left after the held-out split")
+    if len(classes) < 2:
+        raise ValueError("Need at least 2 classes for classification")
+    try:
+        classes = np.array(sorted(classes))
+    except TypeError:
+        raise ValueError("Target labels must all be numbers or all be strings")
+    return classes, scaler, n_train, n_test
+
+
+def fit_forest(
+    chunks: ChunkSource,
+    classes: np.ndarray,
+    test_size: float,
+    seed: int,
+    trees_per_chunk: int = 10,
+    n_jobs: int = -1
+) -> RandomForestClassifier:
+    """
+    Grow a random forest chunk by chunk with ``warm_start``
+
+    Each chunk's training rows get ``trees_per_chunk`` new trees while the
+    earlier trees are kept, so only one chunk is in memory. Every chunk is
+    padded with one zero-weight row per class so that all trees share the
+    same ``classes_``, even when a chunk misses a class. Trees of a chunk
+    are built in parallel by ``n_jobs`` workers.
+    """
+    model = RandomForestClassifier(
+        n_estimators=0, warm_start=True, random_state=seed, n_jobs=n_jobs
+    )
+    for index, (X, y) in enumerate(chunks()):
+        train = ~holdout_mask(index, len(y), test_size, seed)
+        if not train.any():
+            continue
+        X_train, y_train = X[train], y[train]
+        X_fit = np.vstack([X_train, np.repeat(X_train[:1], len(classes), axis=0)])
+        # A common dtype, so fixed-width labels of either side are not cut short
+        dtype = np.result_type(y_train.dtype, classes.dtype)
+        y_fit = np.concatenate([y_train.astype(dtype), classes.astype(dtype)])
+        weights = np.concatenate([np.ones(len(y_train)), np.zeros(len(classes))])
+        model.n_estimators += trees_per_chunk
+        model.fit(X_fit, y_fit, sample_weight=weights)
+    return model
+
+
+def fit_sgd(
+    chunks: ChunkSource,
+    classes: np.ndarray,
+    scaler: StandardScaler,
+    test_size: float,
+    seed: int,
+    epochs: int = 1
+):
+    """Logistic-loss SGD over standardized features, one ``partial_fit`` per chunk"""
+    model = SGDClassifier(loss="log_loss", random_state=seed)
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        for index, (X, y) in enumerate(chunks()):
+            train = ~holdout_mask(index, len(y), test_size, seed)
+            if not train.any():
+                continue
+            order = rng.permutation(int(train.sum()))
+            model.partial_fit(
+                scaler.transform(X[train][order]), y[train][order], classes=classes
+            )
+    return make_pipeline(scaler, model)
+
+
+def evaluate(model, chunks: ChunkSource, test_size: float, seed: int) -> Tuple[float, int]:
+    """Accuracy on the held-out rows, predicted chunk by chunk"""
+    correct = total = 0
+    for index, (X, y) in enumerate(chunks()):
+        mask = holdout_mask(index, len(y), test_size, seed)
+        if mask.any():
+            correct += int((model.predict(X[mask]) == y[mask]).sum())
+            total += int(mask.sum())
+    return (correct / total if total else 0.0), total
+
+
+def train_out_of_core(
+    chunks: ChunkSource,
+    method: str = "forest",
+    test_size: float = 0.2,
+    trees_per_chunk: int = 10,
+    epochs: int = 1,
+    seed: int = 42,
+    n_jobs: int = -1
+):
+    """
+    Fit a classifier on data that is only ever read chunk by chunk
+
+    Makes a scan pass, one training pass per epoch and an evaluation pass
+    over ``chunks``. Forest trees are built by ``n_jobs`` workers.
+
+    Returns:
+        The fitted model and training statistics
+    """
+    if method not in OUT_OF_CORE_METHODS:
+        raise ValueError(f"Unknown method '{method}', use one of {OUT_OF_CORE_METHODS}")
+    start_time = time.perf_counter()
+    classes, scaler, n_train, n_test = scan(chunks, test_size, seed)
+    if method == "forest":
+        model = fit_forest(chunks, classes, test_size, seed, trees_per_chunk, n_jobs)
+    else:
+        model = fit_sgd(chunks, classes, scaler, test_size, seed, epochs)
+    accuracy, _ = evaluate(model, chunks, test_size, seed)
+    return model, {
+        "model_type": "classification",
+        "method": method,
+        "accuracy": float(accuracy),
+        "train_size": n_train,
+        "test_size": n_test,
+        "classes": len(classes),
+        "training_time": round(time.perf_counter() - start_time, 3)
+    }
@@ -0,0 +1,279 @@
+"""
+ML Infrastructure - Inverted index for similar-question retrieval
+"""
+import json
+import os
+import shutil
+from typing import List, Tuple
+import numpy as np
+import scipy.sparse as sp
+
+INDEX_FORMAT = "inverted-v1"
+
+
+class InvertedIndex:
+    """
+    Term-to-document posting lists over L2-normalized TF-IDF rows.
+
+    Every feature column owns a posting list of document ids (ascending)
+    and their TF-IDF weights, plus the largest weight in the list. Since
+    rows are normalized, the cosine similarity of a query is the sum over
+    its terms of query weight times posting weight.
+
+    Search is term-at-a-time with MaxScore pruning: terms are processed in
+    decreasing order of their best possible contribution. Once the k-th
+    best accumulated score reaches the sum of what the remaining terms can
+    still add, no unseen document can make the top k; the remaining (long,
+    low-idf) posting lists are then only probed for the surviving
+    candidates by binary search instead of being scanned. Results are
+    exact. Partial scores are kept only for documents a posting list
+    touched, so a query does no work per indexed document.
+
+    All arrays are plain ``.npy`` files so a saved index can be
+    memory-mapped instead of read into memory.
+    """
+
+    def __init__(self, indptr, doc_ids, weights, max_weights, text_offsets, text_bytes,
+                 label_codes, labels: List[str]):
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.max_weights = max_weights
+        self.text_offsets = text_offsets
+        self.text_bytes = text_bytes
+        self.label_codes = label_codes
+        self.labels = labels
+
+    @classmethod
+    def build(cls, X, texts: List[str], labels: List[str]) -> "InvertedIndex":
+        """
+        Index the rows of a TF-IDF matrix
+
+        Args:
+            X: L2-normalized document-term matrix, one row per text
+            texts: Indexed questions, returned with search results
+            labels: Department of every question
+        """
+        if X.shape[0] != len(texts) or len(texts) != len(labels):
+            raise ValueError("Rows, texts and labels must have the same length")
+        postings = sp.csc_matrix(X, dtype=np.float32)
+        postings.sort_indices()
+        max_weights = np.zeros(X.shape[1], dtype=np.float32)
+        non_empty = np.diff(postings.indptr) > 0
+        max_weights[non_empty] = np.maximum.reduceat(
+            postings.data, postings.indptr[:-1][non_empty]
+        ) if postings.nnz else 0.0
+
+        encoded = [text.encode("utf-8") for text in texts]
+        text_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=text_offsets[1:])
+        text_bytes = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        label_names = list(dict.fromkeys(labels))
+        code_of = {label: i for i, label in enumerate(label_names)}
+        label_codes = np.array([code_of[label] for label in labels], dtype=np.int32)
+
+        return cls(
+            indptr=postings.indptr.astype(np.int64),
+            doc_ids=postings.indices.astype(np.int32),
+            weights=postings.data,
+            max_weights=max_weights,
+            text_offsets=text_offsets,
+            text_bytes=text_bytes,
+            label_codes=label_codes,
+            labels=label_names
+        )
+
+    def __len__(self) -> int:
+        return len(self.label_codes)
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(
+            array.nbytes for array in (
+                self.indptr, self.doc_ids, self.weights, self.max_weights,
+                self.text_offsets, self.text_bytes, self.label_codes
+            )
+        ))
+
+    @property
+    def resident_nbytes(self) -> int:
+        """Bytes of the arrays held in memory rather than memory-mapped"""
+        return int(sum(
+            getattr(self, name).nbytes for name in self._ARRAYS
+            if not isinstance(getattr(self, name), np.memmap)
+        ))
+
+    def search(self, query, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k most similar indexed questions for one query row
+
+        Args:
+            query: 1 x n_features L2-normalized TF-IDF row
+            k: Number of results
+
+        Returns:
+            Document ids and cosine similarities, best first
+        """
+        query = sp.csr_matrix(query)
+        terms, query_weights = query.indices, query.data.astype(np.float32)
+        if len(terms) == 0 or len(self) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        bounds = query_weights * self.max_weights[terms]
+        order = np.argsort(-bounds, kind="stable")
+        terms, query_weights, bounds = terms[order], query_weights[order], bounds[order]
+        # remaining[i]: most that terms i.. can still add to any document
+        remaining = np.cumsum(bounds[::-1])[::-1]
+
+        # Documents seen so far (ascending) with their partial scores, plus
+        # the scanned postings not merged into them yet
+        candidates = np.zeros(0, dtype=np.int32)
+        scores = np.zeros(0, dtype=np.float32)
+        scanned = []
+        # k-th best score at the last merge and the term index it was taken at
+        kth_best, merged_at = 0.0, 0
+        for i, term in enumerate(terms):
+            # No score can exceed what the processed terms may add, so the
+            # k-th best is only worth computing once that beats the rest;
+            # nor can it grow by more than the terms scanned since the last
+            # merge add, so merging is skipped while that stays below
+            if (remaining[0] - remaining[i] >= remaining[i]
+                    and kth_best + remaining[merged_at] - remaining[i] >= remaining[i]):
+                candidates, scores = _merge(candidates, scores, scanned)
+                scanned = []
+                if len(candidates) >= k:
+                    kth_best, merged_at = np.partition(scores, -k)[-k], i
+                    if kth_best >= remaining[i]:
+                        candidates, scores = self._probe(
+                            candidates, scores, kth_best, k,
+                            terms[i:], query_weights[i:], remaining[i:]
+                        )
+                        break
+            ids, weights = self._postings(term)
+            scanned.append((ids, query_weights[i] * weights))
+        candidates, scores = _merge(candidates, scores, scanned)
+
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return candidates[order].astype(np.int64), scores[order]
+
+    def search_exhaustive(self, query, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """Same result as search by scoring every posting of every query term"""
+        query = sp.csr_matrix(query)
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term, query_weight in zip(query.indices, query.data):
+            ids, weights = self._postings(term)
+            scores[ids] += np.float32(query_weight) * weights
+        seen = np.flatnonzero(scores)
+        if len(seen) > k:
+            seen = seen[np.argpartition(-scores[seen], k - 1)[:k]]
+        best = seen[np.argsort(-scores[seen], kind="stable")]
+        return best.astype(np.int64), scores[best]
+
+    def _postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.indptr[term], self.indptr[term + 1]
+        return self.doc_ids[start:end], self.weights[start:end]
+
+    def _probe(self, candidates, scores, threshold, k, terms, query_weights, remaining):
+        """
+        Add the remaining terms' weights for the surviving candidates only
+
+        Candidates that cannot reach the current k-th best score even with
+        every remaining term are dropped before each term; at least the k
+        best always survive. Of the candidates and a posting list, the
+        shorter is binary-searched in the longer.
+        """
+        for term, query_weight, bound in zip(terms, query_weights, remaining):
+            keep = scores + bound >= threshold
+            candidates, scores = candidates[keep], scores[keep]
+            ids, weights = self._postings(term)
+            if len(ids) == 0:
+                continue
+            if len(candidates) >= len(ids):
+                positions = np.searchsorted(candidates, ids)
+                positions[positions == len(candidates)] = 0
+                found = candidates[positions] == ids
+                scores[positions[found]] += query_weight * weights[found]
+            else:
+                positions = np.searchsorted(ids, candidates)
+                positions[positions == len(ids)] = 0
+                found = ids[positions] == candidates
+                scores[found] += query_weight * weights[positions[found]]
+            threshold = max(threshold, np.partition(scores, -k)[-k])
+        return candidates, scores
+
+    def text(self, doc_id: int) -> str:
+        start, end = self.text_offsets[doc_id], self.text_offsets[doc_id + 1]
+        return bytes(self.text_bytes[start:end]).decode("utf-8")
+
+    def label(self, doc_id: int) -> str:
+        return self.labels[int(self.label_codes[doc_id])]
+
+    def save(self, directory: str):
+        """
+        Write the index as .npy arrays plus a small JSON header
+
+        The files are written to a sibling directory that then replaces
+        ``directory``, so an index currently memory-mapped from there keeps
+        reading its old (unlinked) files instead of truncated ones. The old
+        directory is renamed aside and only removed after the swap.
+        """
+        directory = directory.rstrip(os.sep)
+        staging = f"{directory}.tmp"
+        previous = f"{directory}.old"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in self._ARRAYS:
+            np.save(os.path.join(staging, f"{name}.npy"), np.asarray(getattr(self, name)))
+        with open(os.path.join(staging, "index.json"), "w") as f:
+            json.dump({"format": INDEX_FORMAT, "labels": self.labels}, f)
+        shutil.rmtree(previous, ignore_errors=True)
+        if os.path.exists(directory):
+            os.rename(directory, previous)
+        os.rename(staging, directory)
+        shutil.rmtree(previous, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "InvertedIndex":
+        """Open a saved index, memory-mapping its arrays by default"""
+        with open(os.path.join(directory, "index.json")) as f:
+            header = json.load(f)
+        if header.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported index format: {header.get('format')}")
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in cls._ARRAYS
+        }
+        return cls(labels=header["labels"], **arrays)
+
+    _ARRAYS = (
+        "indptr", "doc_ids", "weights", "max_weights",
+        "text_offsets", "text_bytes", "label_codes"
+    )
+
+
+def _merge(candidates, scores, postings):
+    """
+    Add scanned postings to the candidate accumulators
+
+    Args:
+        candidates: Documents seen so far, ascending
+        scores: Their partial scores
+        postings: ``(ids, contributions)`` of each scanned posting list
+
+    Returns:
+        Every document seen, ascending, with its summed score
+    """
+    if not postings:
+        return candidates, scores
+    ids = np.concatenate([candidates] + [ids for ids, _ in postings])
+    contributions = np.concatenate([scores] + [values for _, values in postings])
+    # Every part is already ascending; a stable sort merges such runs in
+    # close to linear time
+    order = np.argsort(ids, kind="stable")
+    ids, contributions = ids[order], contributions[order]
+    starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+    return ids[starts], np.add.reduceat(contributions, starts)
\ No newline at end of file
@@ -0,0 +1,278 @@
+"""
+ML Infrastructure - Cached document-term counts for incremental TF-IDF fitting
+"""
+import hashlib
+import os
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+import joblib
+import numpy as np
+import scipy.sparse as sp
+
+
+def content_key(text: str) -> str:
+    """Stable cache key for a training sample"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class TermCountCache:
+    """
+    Per-sample term counts plus corpus-wide term and document frequencies.
+
+    Each distinct training text is analyzed once and stored as term-id and
+    count arrays keyed by its content hash. The aggregate statistics are
+    updated by applying only the samples that were added to or removed from
+    the corpus since the previous fit, so refitting the vectorizer after a
+    small change costs time proportional to the change rather than to the
+    corpus.
+    """
+
+    def __init__(self, analysis_key: str = ""):
+        self.analysis_key = analysis_key
+        self.terms: List[str] = []
+        self.term_index: Dict[str, int] = {}
+        self.documents: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.corpus: Counter = Counter()
+        self.term_totals = np.zeros(0, dtype=np.int64)
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+
+    def copy(self) -> "TermCountCache":
+        """
+        Copy that can be updated without changing this cache
+
+        The per-sample arrays are shared; updates replace them rather than
+        modify them in place.
+        """
+        clone = TermCountCache(self.analysis_key)
+        clone.terms = list(self.terms)
+        clone.term_index = dict(self.term_index)
+        clone.documents = dict(self.documents)
+        clone.corpus = Counter(self.corpus)
+        clone.term_totals = self.term_totals.copy()
+        clone.doc_freq = self.doc_freq.copy()
+        return clone
+
+    @property
+    def n_documents(self) -> int:
+        """Number of samples, with multiplicity, in the current corpus"""
+        return sum(self.corpus.values())
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the per-sample and corpus-wide count arrays"""
+        return int(
+            sum(ids.nbytes + counts.nbytes for ids, counts in self.documents.values())
+            + self.term_totals.nbytes + self.doc_freq.nbytes
+        )
+
+    def update(
+        self, texts: List[str], analyzer: Callable[[str], List[str]]
+    ) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Make ``texts`` the current corpus
+
+        Args:
+            texts: Full training corpus, in training order
+            analyzer: Tokenizer used for samples that are not cached yet
+
+        Returns:
+            Content keys aligned with ``texts`` and counts of reused,
+            analyzed and removed samples
+        """
+        keys = [content_key(text) for text in texts]
+        new_corpus = Counter(keys)
+        stats = {"reused": 0, "analyzed": 0, "removed": 0}
+        changes = []
+        removed = []
+
+        for key, multiplicity in self.corpus.items():
+            delta = new_corpus.get(key, 0) - multiplicity
+            if delta:
+                changes.append((key, delta))
+            if key not in new_corpus:
+                stats["removed"] += multiplicity
+                removed.append(key)
+
+        for key, text in zip(keys, texts):
+            if key not in self.documents:
+                self.documents[key] = self._count(analyzer(text))
+                changes.append((key, new_corpus[key]))
+                stats["analyzed"] += 1
+            else:
+                stats["reused"] += 1
+
+        self._apply(changes)
+        for key in removed:
+            del self.documents[key]
+        self.corpus = new_corpus
+        if removed:
+            self._compact()
+        return keys, stats
+
+    def select_features(self, max_features: int = None) -> np.ndarray:
+        """
+        Pick the vocabulary the way ``TfidfVectorizer`` does
+
+        Terms present in the corpus are ordered alphabetically, the
+        ``max_features`` most frequent are kept and returned in alphabetical
+        order. The frequency sort deliberately uses the same (unstable)
+        argsort as sklearn so that ties are broken identically.
+
+        Returns:
+            Term ids in feature-index order
+        """
+        active = np.flatnonzero(self.doc_freq > 0)
+        if len(active) == 0:
+            raise ValueError(
+                "empty vocabulary; perhaps the documents only contain stop words"
+            )
+        terms = self.terms
+        ordered = np.array(sorted(active, key=terms.__getitem__), dtype=np.int64)
+        if max_features is not None and len(ordered) > max_features:
+            by_frequency = np.argsort(-self.term_totals[ordered])
+            ordered = ordered[np.sort(by_frequency[:max_features])]
+        return ordered
+
+    def smooth_idf(self, feature_terms: np.ndarray) -> np.ndarray:
+        """Smoothed inverse document frequency of the selected terms"""
+        n_documents = self.n_documents
+        return np.log((1 + n_documents) / (1 + self.doc_freq[feature_terms])) + 1
+
+    def build_counts(
+        self, keys: List[str], feature_terms: np.ndarray, dtype=np.float64
+    ) -> sp.csr_matrix:
+        """Assemble the document-term count matrix from cached samples"""
+        lookup = np.full(len(self.terms), -1, dtype=np.int64)
+        lookup[feature_terms] = np.arange(len(feature_terms))
+
+        term_ids = [self.documents[key][0] for key in keys]
+        counts = [self.documents[key][1] for key in keys]
+        lengths = np.array([len(ids) for ids in term_ids], dtype=np.int64)
+        if len(term_ids):
+            columns = lookup[np.concatenate(term_ids)]
+            data = np.concatenate(counts)
+        else:
+            columns = np.zeros(0, dtype=np.int64)
+            data = np.zeros(0, dtype=np.int64)
+
+        # Drop pruned terms while keeping the row boundaries intact
+        kept = columns >= 0
+        rows = np.repeat(np.arange(len(keys)), lengths)[kept]
+        X = sp.csr_matrix(
+            (data[kept].astype(dtype), (rows, columns[kept])),
+            shape=(len(keys), len(feature_terms)),
+            dtype=dtype
+        )
+        X.sort_indices()
+        return X
+
+    def _count(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Convert a token list into term ids and counts"""
+        token_counts = Counter(tokens)
+        ids = np.empty(len(token_counts), dtype=np.int64)
+        for i, token in enumerate(token_counts):
+            term_id = self.term_index.get(token)
+            if term_id is None:
+                term_id = len(self.terms)
+                self.term_index[token] = term_id
+                self.terms.append(token)
+            ids[i] = term_id
+        counts = np.fromiter(token_counts.values(), dtype=np.int64, count=len(ids))
+        return ids, counts
+
+    def _apply(self, changes: List[Tuple[str, int]]):
+        """Add (or with a negative multiplicity, remove) samples' counts"""
+        size = len(self.terms)
+        if size > len(self.term_totals):
+            padding = np.zeros(max(size, 2 * len(self.term_totals)) - len(self.term_totals), dtype=np.int64)
+            self.term_totals = np.concatenate((self.term_totals, padding))
+            self.doc_freq = np.concatenate((self.doc_freq, padding))
+        if not changes:
+            return
+
+        ids = np.concatenate([self.documents[key][0] for key, _ in changes])
+        counts = np.concatenate([self.documents[key][1] for key, _ in changes])
+        multiplicities = np.repeat(
+            [delta for _, delta in changes],
+            [len(self.documents[key][0]) for key, _ in changes]
+        )
+        # Weighted bincount accumulates in float64, which is exact for any
+        # realistic corpus size
+        length = len(self.term_totals)
+        self.term_totals += np.rint(
+            np.bincount(ids, weights=counts * multiplicities, minlength=length)
+        ).astype(np.int64)
+        self.doc_freq += np.rint(
+            np.bincount(ids, weights=multiplicities, minlength=length)
+        ).astype(np.int64)
+
+    def _compact(self):
+        """
+        Drop terms that no cached document uses any more
+
+        Removing documents leaves their terms behind with a zero document
+        frequency. Once such terms make up more than half of the table the
+        live ones are renumbered and the rest dropped, so the table stays
+        proportional to the current corpus at an amortized O(1) per term.
+        """
+        size = len(self.terms)
+        used = self.doc_freq[:size] > 0
+        n_used = int(used.sum())
+        if size - n_used <= n_used:
+            return
+        new_ids = np.full(size, -1, dtype=np.int64)
+        new_ids[used] = np.arange(n_used)
+        self.terms = [term for term, keep in zip(self.terms, used) if keep]
+        self.term_index = {term: i for i, term in enumerate(self.terms)}
+        self.documents = {
+            key: (new_ids[ids], counts) for key, (ids, counts) in self.documents.items()
+        }
+        self.term_totals = self.term_totals[:size][used]
+        self.doc_freq = self.doc_freq[:size][used]
+
+    def save(self, filepath: str):
+        """Save the cache to disk as packed arrays"""
+        keys = list(self.documents)
+        lengths = np.array([len(self.documents[key][0]) for key in keys], dtype=np.int64)
+        joblib.dump({
+            "analysis_key": self.analysis_key,
+            "terms": self.terms,
+            "keys": keys,
+            "indptr": np.concatenate(([0], np.cumsum(lengths))),
+            "term_ids": np.concatenate([self.documents[key][0] for key in keys])
+            if keys else np.zeros(0, dtype=np.int64),
+            "counts": np.concatenate([self.documents[key][1] for key in keys])
+            if keys else np.zeros(0, dtype=np.int64),
+            "corpus": dict(self.corpus),
+            "term_totals": self.term_totals[:len(self.terms)],
+            "doc_freq": self.doc_freq[:len(self.terms)]
+        }, filepath)
+
+    def load(self, filepath: str) -> bool:
+        """
+        Load a saved cache
+
+        Returns:
+            False when there is no cache or it was built with a different
+            analyzer configuration, in which case the cache stays empty
+        """
+        if not os.path.exists(filepath):
+            return False
+        packed = joblib.load(filepath)
+        if packed["analysis_key"] != self.analysis_key:
+            return False
+
+        self.terms = packed["terms"]
+        self.term_index = {term: i for i, term in enumerate(self.terms)}
+        indptr = packed["indptr"]
+        self.documents = {
+            key: (
+                packed["term_ids"][indptr[i]:indptr[i + 1]],
+                packed["counts"][indptr[i]:indptr[i + 1]]
+            )
+            for i, key in enumerate(packed["keys"])
+        }
+        self.corpus = Counter(packed["corpus"])
+        self.term_totals = packed["term_totals"].copy()
+        self.doc_freq = packed["doc_freq"].copy()
+        return True
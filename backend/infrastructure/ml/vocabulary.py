@@ -0,0 +1,83 @@
+"""
+ML Infrastructure - Compact vocabulary storage for text vectorization
+"""
+import numpy as np
+from typing import Dict, List
+
+
+class CompactVocabulary:
+    """
+    Term to feature-index mapping stored as a sorted byte-string table.
+
+    Terms are kept UTF-8 encoded in a single fixed-width numpy array sorted
+    lexicographically, with a parallel array holding each term's feature
+    index. Lookups are a vectorized binary search, so a whole batch of
+    tokens is resolved with one ``np.searchsorted`` call and the structure
+    pickles as two contiguous buffers instead of a dict of Python strings.
+    """
+
+    def __init__(self, terms: np.ndarray, indices: np.ndarray):
+        self.terms = terms
+        self.indices = indices
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, int]) -> "CompactVocabulary":
+        """Build a compact vocabulary from a ``{term: index}`` dict"""
+        encoded = sorted(
+            (term.encode("utf-8"), index) for term, index in mapping.items()
+        )
+        if encoded:
+            terms = np.array([term for term, _ in encoded])
+        else:
+            terms = np.array([], dtype="S1")
+        indices = np.array([index for _, index in encoded], dtype=np.int32)
+        return cls(terms, indices)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the term table and index array"""
+        return int(self.terms.nbytes + self.indices.nbytes)
+
+    def feature_map(self, previous: "CompactVocabulary") -> np.ndarray:
+        """
+        Align this vocabulary's features with an older vocabulary
+
+        Returns:
+            int32 array giving, for each feature index of this vocabulary, the
+            index of the same term in ``previous`` or ``-1`` if it is new
+        """
+        result = np.full(len(self.terms), -1, dtype=np.int32)
+        if len(self.terms) == 0 or len(previous.terms) == 0:
+            return result
+        positions = np.searchsorted(previous.terms, self.terms)
+        positions[positions == len(previous.terms)] = 0
+        found = previous.terms[positions] == self.terms
+        result[self.indices[found]] = previous.indices[positions[found]]
+        return result
+
+    def lookup(self, tokens: List[str]) -> np.ndarray:
+        """
+        Resolve tokens to feature indices
+
+        Args:
+            tokens: Tokens produced by the vectorizer analyzer
+
+        Returns:
+            int32 array aligned with ``tokens``; ``-1`` marks unknown terms
+        """
+        if not tokens or len(self.terms) == 0:
+            return np.full(len(tokens), -1, dtype=np.int32)
+
+        # Let numpy size the key array to the longest token so nothing is
+        # truncated into a false prefix match against the table.
+        keys = np.array([token.encode("utf-8") for token in tokens])
+        positions = np.searchsorted(self.terms, keys)
+        positions[positions == len(self.terms)] = 0
+        found = self.terms[positions] == keys
+
+        result = np.full(len(tokens), -1, dtype=np.int32)
+        result[found] = self.indices[positions[found]]
+        return result
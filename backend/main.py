@@ -1,14 +1,17 @@
 """
 FastAPI Application Entry Point
 """
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from api.admission import AdmissionMiddleware, admission_controller, check_deadline
 from api.routes.ml_routes import router as ml_router
 from api.routes.classification_routes import router as classification_router
 from common.config import settings
 from common.utils import setup_logging
 from business.services.classification_service import classification_service
+from api.dependencies import ml_service
 from business.services.training_data import get_training_data
+from infrastructure.ml.compute import compute_resources
 
 # Setup logging
 logger = setup_logging()
@@ -20,6 +23,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Admit requests per route class; inside CORS so rejections carry its headers
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,10 +36,15 @@ app.add_middleware(
 )
 
 # Include routers
-app.include_router(ml_router, prefix=f"/api/{settings.api_version}")
+app.include_router(
+    ml_router,
+    prefix=f"/api/{settings.api_version}",
+    dependencies=[Depends(check_deadline)]
+)
 app.include_router(
     classification_router,
-    prefix=f"/api/{settings.api_version}"
+    prefix=f"/api/{settings.api_version}",
+    dependencies=[Depends(check_deadline)]
 )
 
 
@@ -42,6 +53,9 @@ async def startup_event():
     """Initialize application on startup"""
     logger.info("Starting ML API Service...")
     
+    # Hold BLAS/OpenMP thread pools to this worker's share of the cores
+    compute_resources.apply()
+    
     try:
         # Try to load existing models first
         load_result = classification_service.load_models()
@@ -79,6 +93,13 @@ async def startup_event():
         logger.error(f"Error during startup initialization: {str(e)}")
         # Continue startup even if training fails
     
+    try:
+        # Warm-restore the generic ML models saved by earlier runs
+        restored = ml_service.restore_models()["data"]["restored"]
+        logger.info(f"Restored ML models: {restored}")
+    except Exception as e:
+        logger.error(f"Error restoring ML models: {str(e)}")
+    
     logger.info("ML API Service startup completed")
 
 
@@ -97,6 +118,12 @@ async def health():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+@app.get("/admission")
+async def admission():
+    """Slots, queues and rejections of each route class"""
+    return admission_controller.get_metrics()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(